@@ -0,0 +1,57 @@
+"""
+Сравнение JSON-кодирования элементов очереди с бинарным VideoTaskCodec.
+
+Запуск: python -m benchmarks.bench_codecs
+"""
+import random
+import timeit
+
+from src.queues.codecs import JsonCodec, VideoTaskCodec
+from src.queues.models import VideoTaskRecord
+
+ITEMS = 10_000
+REPEAT = 5
+
+
+def make_items(count: int) -> list:
+    items = []
+    for _ in range(count):
+        if random.random() < 0.7:
+            video_id = random.randint(7_000_000_000_000_000_000, 7_400_000_000_000_000_000)
+            url = f"https://www.tiktok.com/@user{random.randint(0, 10 ** 6)}/video/{video_id}"
+        else:
+            code = "".join(random.choices("ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz23456789", k=9))
+            url = f"https://vm.tiktok.com/{code}/"
+        items.append({"url": url})
+    return items
+
+
+def bench(name: str, codec, items: list) -> None:
+    encoded = [codec.encode(item) for item in items]
+    size = sum(len(data) for data in encoded) / len(encoded)
+
+    encode_time = min(timeit.repeat(lambda: [codec.encode(item) for item in items], number=1, repeat=REPEAT))
+    decode_time = min(timeit.repeat(lambda: [codec.decode(data) for data in encoded], number=1, repeat=REPEAT))
+
+    print(
+        f"{name:<12} {size:8.1f} B/item"
+        f" {encode_time / len(items) * 1e6:8.2f} us encode"
+        f" {decode_time / len(items) * 1e6:8.2f} us decode"
+    )
+
+
+def main():
+    random.seed(0)
+    items = make_items(ITEMS)
+    records = [VideoTaskRecord.from_dict(item) for item in items]
+    # Те же поля, что хранит запись: ссылка, счетчик попыток и время постановки
+    full_items = [record.to_dict() for record in records]
+
+    bench("json url", JsonCodec(), items)
+    bench("json full", JsonCodec(), full_items)
+    bench("video dict", VideoTaskCodec(), items)
+    bench("video rec", VideoTaskCodec(), records)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Пропускная способность InMemoryQueue: поштучный get против get_batch.
+
+Производитель добавляет элементы пачками (как handle_video_submission),
+потребитель забирает их поштучно или пакетами за одно пробуждение.
+Сценарий drain измеряет только потребителя на заранее заполненной очереди.
+
+Запуск: python -m benchmarks.bench_inmemory_batch
+"""
+import asyncio
+import time
+
+from src.queues.implementations.inmemory import InMemoryQueue
+
+ITEMS = 200_000
+BURST = 500
+BATCH_SIZE = 256
+LINGER = 0.002
+REPEAT = 3
+
+
+async def produce(queue: InMemoryQueue, count: int) -> None:
+    for start in range(0, count, BURST):
+        await queue.put_many({"url": f"https://vm.tiktok.com/{i}/"} for i in range(start, start + BURST))
+        # Отдаем управление потребителю между пачками
+        await asyncio.sleep(0)
+
+
+async def consume_single(queue: InMemoryQueue, count: int) -> None:
+    for _ in range(count):
+        await queue.get()
+
+
+async def consume_batch(queue: InMemoryQueue, count: int) -> None:
+    received = 0
+    while received < count:
+        received += len(await queue.get_batch(BATCH_SIZE, LINGER))
+
+
+async def run(consumer) -> float:
+    queue = InMemoryQueue()
+    start = time.perf_counter()
+    await asyncio.gather(produce(queue, ITEMS), consumer(queue, ITEMS))
+    return ITEMS / (time.perf_counter() - start)
+
+
+async def run_drain(consumer) -> float:
+    queue = InMemoryQueue()
+    await produce(queue, ITEMS)
+    start = time.perf_counter()
+    await consumer(queue, ITEMS)
+    return ITEMS / (time.perf_counter() - start)
+
+
+async def main():
+    consumers = (("get", consume_single), (f"get_batch({BATCH_SIZE})", consume_batch))
+    for scenario, runner in (("burst", run), ("drain", run_drain)):
+        for name, consumer in consumers:
+            rate = max([await runner(consumer) for _ in range(REPEAT)])
+            print(f"{scenario:<6} {name:<16} {rate:12,.0f} items/s")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
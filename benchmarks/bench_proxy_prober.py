@@ -0,0 +1,174 @@
+"""
+Проверка ProxyProber на локальных прокси-заглушках.
+
+Поднимаются HTTPS-сервер с самоподписанным сертификатом (цель проверки),
+HTTP-прокси с CONNECT, такой же прокси за TLS (https://), прокси, требующий
+другой пароль, и закрытый порт. Прокси добавляются в SQLite в памяти,
+ProxyProber проверяет их одним проходом; печатается время этапов, а
+результат сравнивается с ожидаемым (исправны только первые два).
+
+Нужна утилита openssl для генерации сертификата.
+
+Запуск: python -m benchmarks.bench_proxy_prober
+"""
+import asyncio
+import base64
+import os
+import socket
+import ssl
+import subprocess
+import sys
+import tempfile
+
+from aiohttp import web
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from src.models import Base
+from src.repository.proxy import ProxyRepository
+from src.repository.proxy_probes import ProxyProbeRepository
+from src.services.proxy_health import ProxyHealth
+from src.services.proxy_prober import ProxyProber
+
+HOST = "127.0.0.1"
+USERNAME = "user"
+PASSWORD = "secret"
+
+
+def make_certificate(directory: str) -> tuple:
+    cert = os.path.join(directory, "cert.pem")
+    key = os.path.join(directory, "key.pem")
+    subprocess.run(
+        [
+            "openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1",
+            "-keyout", key, "-out", cert, "-subj", "/CN=localhost",
+            "-addext", "subjectAltName=DNS:localhost,IP:127.0.0.1",
+        ],
+        check=True,
+        capture_output=True,
+    )
+    return cert, key
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind((HOST, 0))
+        return sock.getsockname()[1]
+
+
+async def pipe(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    try:
+        while True:
+            data = await reader.read(65536)
+            if not data:
+                break
+            writer.write(data)
+            await writer.drain()
+    except (ConnectionError, OSError):
+        pass
+    finally:
+        writer.close()
+
+
+def stand_in_proxy(password: str):
+    """Минимальный HTTP-прокси: CONNECT с проверкой Proxy-Authorization"""
+    expected = "Basic " + base64.b64encode(f"{USERNAME}:{password}".encode()).decode()
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        head = (await reader.readuntil(b"\r\n\r\n")).decode()
+        lines = head.split("\r\n")
+        method, target, _ = lines[0].split()
+        headers = dict(line.split(": ", 1) for line in lines[1:] if ": " in line)
+        if headers.get("Proxy-Authorization") != expected:
+            writer.write(b"HTTP/1.1 407 Proxy Authentication Required\r\n\r\n")
+            await writer.drain()
+            writer.close()
+            return
+        if method != "CONNECT":
+            writer.write(b"HTTP/1.1 405 Method Not Allowed\r\n\r\n")
+            await writer.drain()
+            writer.close()
+            return
+        host, port = target.rsplit(":", 1)
+        upstream_reader, upstream_writer = await asyncio.open_connection(host, int(port))
+        writer.write(b"HTTP/1.1 200 Connection established\r\n\r\n")
+        await writer.drain()
+        await asyncio.gather(pipe(reader, upstream_writer), pipe(upstream_reader, writer))
+
+    return handle
+
+
+async def main() -> int:
+    with tempfile.TemporaryDirectory() as directory:
+        cert, key = make_certificate(directory)
+        server_context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+        server_context.load_cert_chain(cert, key)
+        client_context = ssl.create_default_context(cafile=cert)
+
+        app = web.Application()
+        app.router.add_get("/robots.txt", lambda request: web.Response(text="User-agent: *\n" * 100))
+        runner = web.AppRunner(app)
+        await runner.setup()
+        target_port = free_port()
+        await web.TCPSite(runner, HOST, target_port, ssl_context=server_context).start()
+
+        ports = {name: free_port() for name in ("http", "https", "wrong_password", "closed")}
+        servers = [
+            await asyncio.start_server(stand_in_proxy(PASSWORD), HOST, ports["http"]),
+            await asyncio.start_server(stand_in_proxy(PASSWORD), HOST, ports["https"], ssl=server_context),
+            await asyncio.start_server(stand_in_proxy("other"), HOST, ports["wrong_password"]),
+        ]
+
+        engine = create_async_engine("sqlite+aiosqlite://")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        session_maker = async_sessionmaker(engine, expire_on_commit=False)
+        health = ProxyHealth()
+        proxy_repository = ProxyRepository(session_maker, health=health)
+        probe_repository = ProxyProbeRepository(session_maker)
+
+        cases = {
+            "http": ("http", True),
+            "https": ("https", True),
+            "wrong_password": ("http", False),
+            "closed": ("http", False),
+        }
+        for name, (scheme, _) in cases.items():
+            await proxy_repository.add_proxy(f"{scheme}://{HOST}:{ports[name]}", USERNAME, PASSWORD)
+        names = {proxy.id: name for proxy, name in zip(await proxy_repository.get_proxies(), cases)}
+
+        prober = ProxyProber(
+            proxy_repository,
+            probe_repository,
+            target_url=f"https://localhost:{target_port}/robots.txt",
+            timeout=5.0,
+            ssl_context=client_context,
+            proxy_ssl_context=client_context,
+        )
+        results = await prober.probe_all()
+
+        failures = 0
+        for proxy_id, result in results.items():
+            name = names[proxy_id]
+            expected = cases[name][1]
+            timings = ", ".join(
+                f"{stage} {value * 1000:6.1f} ms"
+                for stage, value in (("TCP", result.connect_time), ("TLS", result.tls_time), ("fetch", result.fetch_time))
+                if value is not None
+            )
+            verdict = "OK  " if result.ok == expected else "FAIL"
+            failures += result.ok != expected
+            # Исключение из ротации должно совпадать с результатом проверки
+            failures += health.is_available(proxy_id) != result.ok
+            print(f"{verdict} {name:15} ok={result.ok!s:5} {timings} {result.error or ''}")
+
+        for server in servers:
+            server.close()
+        await runner.cleanup()
+        await engine.dispose()
+
+    print("Все проверки прошли" if not failures else f"Несовпадений: {failures}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
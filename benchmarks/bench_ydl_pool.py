@@ -0,0 +1,82 @@
+"""
+Накладные расходы yt-dlp на одно видео: новый YoutubeDL на каждый вызов
+против экземпляра из YoutubeDLPool.
+
+Сеть не используется: замеряется подготовка экземпляра, которую yt-dlp
+выполняет перед первым запросом (экстракторы, файл cookies, HTTP-клиент).
+Параметры совпадают с AsyncYtDlpProvider.download_video, пул тот же,
+что держит каждый рабочий процесс yt-dlp.
+
+Запуск: python -m benchmarks.bench_ydl_pool
+"""
+import os
+import tempfile
+import time
+
+from yt_dlp import YoutubeDL
+
+from src.provider.providers import AsyncYtDlpProvider
+from src.provider.ydl_pool import YoutubeDLPool
+
+CALLS = 50
+COOKIES = 200
+PROXIES = ("http://10.0.0.1:8080", "http://10.0.0.2:8080")
+
+
+def write_cookies(path: str) -> None:
+    with open(path, "w") as f:
+        f.write("# Netscape HTTP Cookie File\n")
+        for i in range(COOKIES):
+            f.write(f".tiktok.com\tTRUE\t/\tTRUE\t2000000000\tcookie{i}\tvalue{i}\n")
+
+
+def prepare(ydl: YoutubeDL) -> None:
+    """То, что yt-dlp делает перед первым запросом видео"""
+    ydl.cookiejar
+    ydl._request_director
+
+
+def fresh(options_list) -> float:
+    start = time.perf_counter()
+    for options, overrides in options_list:
+        with YoutubeDL({**options, **overrides}) as ydl:
+            prepare(ydl)
+    return (time.perf_counter() - start) / len(options_list)
+
+
+def pooled(pool: YoutubeDLPool, options_list) -> float:
+    start = time.perf_counter()
+    for options, overrides in options_list:
+        with pool.acquire(options, overrides) as ydl:
+            prepare(ydl)
+    return (time.perf_counter() - start) / len(options_list)
+
+
+def main():
+    with tempfile.TemporaryDirectory() as directory:
+        cwd = os.getcwd()
+        os.chdir(directory)
+        try:
+            write_cookies("cookies.txt")
+            provider = AsyncYtDlpProvider(download_path=directory)
+            # Прокси чередуются, как при ротации, имя файла у каждого видео свое
+            options_list = [
+                (provider._get_ydl_opts(proxy_url=PROXIES[i % len(PROXIES)]),
+                 provider._output_overrides(f"video_{i}"))
+                for i in range(CALLS)
+            ]
+
+            before = fresh(options_list)
+            pool = YoutubeDLPool()
+            after = pooled(pool, options_list)
+            pool.close()
+        finally:
+            os.chdir(cwd)
+
+    print(f"YoutubeDL на вызов  {before * 1000:8.2f} ms/video")
+    print(f"YoutubeDLPool       {after * 1000:8.2f} ms/video")
+    print(f"Ускорение           {before / after:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,4 @@
-from typing import List
+from typing import List, Optional
 
 from pydantic_settings import BaseSettings
 
@@ -9,10 +9,47 @@ class AppConfig(BaseSettings):
     bot_token: str
     debug: bool = False
     queue_name: str = "default"
+    queue_type: str = "redis"  # redis, redis_stream, redis_priority, local_durable
+    queue_path: str = "queue.sqlite3"  # Файл очереди local_durable
+    queue_codec: str = "json"  # json, video_task
     redis_url: str = "redis://localhost:6379"
+    redis_max_connections: int = 32
+    redis_health_check_interval: int = 15
     queue_maxsize: int = 10000
+    queue_reliable: bool = False
+    queue_consumer_id: Optional[str] = None
+    queue_visibility_timeout: float = 900.0
+    queue_group_name: str = "workers"
+    queue_dedup: str = "window"  # none, window, bloom
+    queue_dedup_window: float = 7 * 24 * 3600  # 0 - хранить историю бессрочно
+    queue_bloom_capacity: int = 1_000_000
+    queue_bloom_error_rate: float = 0.001
+    # Срочность одного уровня приоритета: на сколько секунд элемент обгоняет обычные
+    queue_priority_aging_interval: float = 24 * 3600
+    schedule_queue_type: str = "redis"  # redis, in_memory; также для повторов и dead-letter очереди
+    queue_max_retries: int = 5
+    queue_retry_backoff: float = 300.0  # Задержка перед первым повтором, удваивается с каждым
+    queue_retry_backoff_cap: float = 6 * 3600
     facts_dir_path: str = "./facts/"
     videos_dir_path: str = "./temp_videos/"
+    ydl_pool_size: int = 8  # Свободные экземпляры YoutubeDL в процессе (по прокси, формату и cookies)
+    ydl_workers: int = 2  # Рабочие процессы yt-dlp
+    ydl_job_timeout: float = 600.0  # После таймаута процесс завершается, файлы удаляются
+    ydl_hedge: bool = True  # Вторая загрузка через другой прокси, если первая остановилась
+    ydl_hedge_delay: float = 30.0  # Пока нет статистики; затем p90 длительности загрузки
+    prefetch_depth: int = 3  # Сколько ближайших видео очереди держать скачанными (0 - выключено)
+    prefetch_max_bytes: int = 300 * 2 ** 20
+    video_cache_max_bytes: int = 2 * 2 ** 30  # Кеш скачанных видео в videos_dir_path/cache (0 - выключен)
+    short_link_cache: str = "redis"  # redis, in_memory; кеш разрешенных коротких ссылок
+    short_link_ttl: float = 30 * 24 * 3600
+    short_link_concurrency: int = 8
+    proxy_failure_threshold: int = 3  # Ошибок подряд до исключения прокси из ротации
+    proxy_open_timeout: float = 60.0  # Пауза до пробной попытки, удваивается после неудачной
+    proxy_write_back_interval: float = 60.0  # Период записи времени использования прокси в БД
+    proxy_probe_interval: float = 600.0  # Период фоновой проверки прокси (0 - выключена)
+    proxy_probe_concurrency: int = 8
+    proxy_probe_timeout: float = 10.0
+    proxy_probe_url: str = "https://www.tiktok.com/robots.txt"
     short_facts_file: str = "short_facts.txt"
     medium_facts_file: str = "medium_facts.txt"
 
@@ -1,35 +1,115 @@
+import asyncio
+import hashlib
 import uuid
-from pathlib import Path
 
 import aiohttp
 import os
 from contextlib import asynccontextmanager
 from aiogram.types import FSInputFile
-from typing import AsyncGenerator
+from typing import AsyncGenerator, Optional
 
 from src.config import AppConfig
 
+# Размер куска при потоковой записи: столько видео одновременно держится в памяти
+CHUNK_SIZE = 256 * 1024
+# Ограничение Bot API на отправку файлов
+DEFAULT_MAX_BYTES = 50 * 2 ** 20
+
+_session: Optional[aiohttp.ClientSession] = None
+
+
+def get_http_session() -> aiohttp.ClientSession:
+    """
+    Возвращает общую для процесса HTTP-сессию.
+
+    Соединения и DNS-ответы переиспользуются между загрузками. Таймаут
+    задан на подключение и на паузу между кусками, а не на всю загрузку,
+    чтобы большие файлы на медленном канале не обрывались.
+    """
+    global _session
+    if _session is None or _session.closed:
+        _session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=32, ttl_dns_cache=300),
+            timeout=aiohttp.ClientTimeout(total=None, sock_connect=10, sock_read=60),
+        )
+    return _session
+
+
+async def close_http_session() -> None:
+    """Закрывает общую HTTP-сессию (при остановке процесса)"""
+    global _session
+    if _session is not None:
+        session, _session = _session, None
+        await session.close()
+
+
+async def _stream_to_file(
+        resp: aiohttp.ClientResponse,
+        path: str,
+        max_bytes: Optional[int],
+        sha256: Optional[str],
+) -> None:
+    """Пишет тело ответа в файл кусками; запись на диск выполняется в потоке"""
+    expected = resp.content_length
+    if max_bytes is not None and expected is not None and expected > max_bytes:
+        raise ValueError(f"Видео слишком большое: {expected} байт (максимум {max_bytes})")
+
+    digest = hashlib.sha256()
+    received = 0
+    f = await asyncio.to_thread(open, path, "wb")
+    try:
+        async for chunk in resp.content.iter_chunked(CHUNK_SIZE):
+            received += len(chunk)
+            if max_bytes is not None and received > max_bytes:
+                raise ValueError(f"Видео слишком большое: больше {max_bytes} байт")
+            digest.update(chunk)
+            await asyncio.to_thread(f.write, chunk)
+    finally:
+        await asyncio.to_thread(f.close)
+
+    if expected is not None and received != expected:
+        raise ValueError(f"Видео скачано не полностью: {received} из {expected} байт")
+    if sha256 is not None and digest.hexdigest() != sha256.lower():
+        raise ValueError("Контрольная сумма видео не совпадает")
+
 
 @asynccontextmanager
-async def context_video(url: str, filename: str = f"{uuid.uuid4()}.mp4") -> AsyncGenerator[FSInputFile, None]:
+async def context_video(
+        url: str,
+        filename: Optional[str] = None,
+        max_bytes: Optional[int] = DEFAULT_MAX_BYTES,
+        sha256: Optional[str] = None,
+) -> AsyncGenerator[FSInputFile, None]:
     """
     Асинхронный контекстный менеджер для скачивания видео и автоматического удаления файла.
 
+    Тело ответа не буферизуется целиком: куски пишутся во временный файл,
+    который переименовывается после проверки размера и контрольной суммы.
+
     Использование:
-        async with download_video(url) as video_file:
+        async with context_video(url) as video_file:
             await bot.send_video(chat_id, video_file)
+
+    :param url: Ссылка на файл видео
+    :param filename: Имя файла в каталоге видео (по умолчанию случайное .mp4)
+    :param max_bytes: Максимальный размер видео (None - без ограничения)
+    :param sha256: Ожидаемый SHA-256 содержимого в hex (None - без проверки)
     """
-    # Скачиваем видео
     config = AppConfig()
-    async with aiohttp.ClientSession() as session:
-        async with session.get(url) as resp:
+    os.makedirs(config.videos_dir_path, exist_ok=True)
+    path = os.path.join(config.videos_dir_path, filename or f"{uuid.uuid4()}.mp4")
+    tmp_path = f"{path}.{uuid.uuid4().hex}.part"
+
+    # Скачиваем видео
+    try:
+        async with get_http_session().get(url) as resp:
             if resp.status != 200:
                 raise ValueError(f"Не удалось скачать видео: {url}")
-            content = await resp.read()
-    path = Path(config, filename)
-    # Сохраняем в файл
-    with open(path, "wb") as f:
-        f.write(content)
+            await _stream_to_file(resp, tmp_path, max_bytes, sha256)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
 
     # Передаём FSInputFile в блок
     try:
@@ -1,6 +1,7 @@
 import asyncio
 import logging
 import random
+from datetime import datetime
 from typing import Tuple
 
 from aiogram import Router
@@ -11,23 +12,38 @@ from repository.publication_slot import PublicationSlotRepository
 
 from src import facts as fct
 from src.config import AppConfig
-from src.models import FactType
+from src.models import FactType, ProxyProbe
 from src.provider.factories import AsyncTaskFactory
 from src.provider.manager import AsyncBrowserProviderManager, AsyncProviderManager
+from src.provider.prefetch import VideoPrefetcher
 from src.provider.providers import AsyncYtDlpProvider
 from src.queues.factories import TaskFactory, TaskType
-from src.queues.interfaces import AsyncQueue
+from src.queues.interfaces import AsyncQueue, DelayedQueue
+from src.queues.models import item_priority
+from src.queues.retry import RetryScheduler
 from src.repository.facts import FactRepository
 from src.repository.proxy import ProxyRepository
+from src.repository.proxy_probes import ProxyProbeRepository
+from src.repository.telegram_files import TelegramFileRepository
+from src.services.short_links import ShortLinkResolver
+from src.scheduler import schedule_slot
 from src.utils import extract_tiktok_links, parse_proxy
 
 router = Router()
 logger = logging.getLogger()
 
+# Приоритет ссылок, добавленных через /video_urgent
+URGENT_VIDEO_PRIORITY = 1
+# Сколько последних записей показывает /dead_letters
+DEAD_LETTERS_SHOWN = 10
+
 
 @router.message(Command("add_slot"))
 async def cmd_add_slot(
-    message: Message, db_session: AsyncSession, command: CommandObject
+    message: Message,
+    db_session: AsyncSession,
+    command: CommandObject,
+    publication_queue: DelayedQueue,
 ):
     try:
         day, time_str, type_str = command.args.split()
@@ -58,9 +74,10 @@ async def cmd_add_slot(
             )
             return
 
-        await PublicationSlotRepository.add_publication_slot(
+        slot = await PublicationSlotRepository.add_publication_slot(
             db_session, day.lower(), time_str, type_str.lower()
         )
+        await schedule_slot(publication_queue, slot)
         await message.answer(f"✅ Слот добавлен: {day} {time_str} {type_str}")
     except Exception:
         await message.answer(
@@ -69,8 +86,11 @@ async def cmd_add_slot(
 
 
 @router.message(Command("clear_slots"))
-async def cmd_clear_slots(message: Message, db_session: AsyncSession):
+async def cmd_clear_slots(
+    message: Message, db_session: AsyncSession, publication_queue: DelayedQueue
+):
     await PublicationSlotRepository.clear_slots(db_session)
+    await publication_queue.clear()
     await message.answer("✅ Все слоты публикаций удалены.")
 
 
@@ -113,9 +133,25 @@ async def cmd_video_mode_stop(message: Message, queue: AsyncQueue):
 
 
 @router.message(Command("remaining_video_count"))
-async def cmd_video_remaining(message: Message, queue: AsyncQueue):
-    count = await queue.size()
-    await message.answer(f"📦 В очереди сейчас {count} видео.")
+async def cmd_video_remaining(
+    message: Message, queue: AsyncQueue, db_session: AsyncSession, prefetcher: VideoPrefetcher
+):
+    stats = await queue.get_stats()
+    count = stats["current_size"]
+    response = f"📦 В очереди сейчас {count} видео."
+
+    prefetched = prefetcher.get_stats()
+    if prefetched["ready"]:
+        response += f"\n💾 Уже скачано: {prefetched['ready']} ({prefetched['bytes'] / 2 ** 20:.0f} МБ)."
+
+    if stats["oldest_age"] is not None:
+        response += f"\n⏳ Самое старое ждет {stats['oldest_age'] / 3600:.1f} ч."
+
+    slots = await PublicationSlotRepository.get_all_slots(db_session)
+    video_slots_per_week = sum(1 for slot in slots if slot.content_type == "video")
+    if video_slots_per_week:
+        response += f"\n📅 Хватит примерно на {count / video_slots_per_week * 7:.1f} дн."
+    await message.answer(response)
 
 
 @router.message(Command("remaining_facts_count"))
@@ -153,11 +189,16 @@ async def cmd_test_post(
     task_factory: TaskFactory,
     fact_repository: FactRepository,
     config: AppConfig,
+    retry_scheduler: RetryScheduler,
+    prefetcher: VideoPrefetcher,
+    file_ids: TelegramFileRepository,
 ):
     try:
         task_dict = await queue.get(timeout=10)
-        task = task_factory.create(TaskType.LINK, url=task_dict.get("url"))
-    except asyncio.TimeoutError:
+        task = task_factory.create(
+            TaskType.LINK, url=task_dict.get("url"), priority=item_priority(task_dict)
+        )
+    except (asyncio.TimeoutError, asyncio.QueueEmpty):
         await message.answer("Видео в очереди не найдено")
         return
 
@@ -169,7 +210,81 @@ async def cmd_test_post(
     if medium:
         await message.bot.send_message(config.channel_id, f"[test] {medium}")
 
-    await task.execute(message.bot, manager, task_browser_factory, config.channel_id)
+    try:
+        await task.execute(
+            message.bot, manager, task_browser_factory, config.channel_id, prefetcher, file_ids
+        )
+    except Exception as e:
+        retried = await retry_scheduler.fail(task_dict, str(e))
+        await message.answer(
+            f"❌ Не удалось отправить видео: {e}\n"
+            + ("Видео будет отправлено повторно позже." if retried else "Видео перенесено в /dead_letters.")
+        )
+        return
+    await queue.ack(task_dict)
+
+
+@router.message(Command("dead_letters"))
+async def cmd_dead_letters(message: Message, retry_scheduler: RetryScheduler):
+    total = await retry_scheduler.dead_letters.size()
+    if not total:
+        await message.answer("📭 Dead-letter очередь пуста.")
+        return
+
+    entries = await retry_scheduler.dead_letters.items(DEAD_LETTERS_SHOWN)
+    response = f"☠️ Не удалось опубликовать {total} видео. Последние:\n"
+    for entry in entries:
+        failed_at = datetime.fromtimestamp(entry["failed_at"]).strftime("%d.%m %H:%M")
+        response += f"\n{failed_at} {entry['item'].get('url')}\n— {entry['error'][:200]}\n"
+    response += "\nВернуть в очередь: /dead_replay [количество]"
+    await message.answer(response, disable_web_page_preview=True)
+
+
+@router.message(Command("dead_replay"))
+async def cmd_dead_replay(
+    message: Message, command: CommandObject, retry_scheduler: RetryScheduler
+):
+    try:
+        limit = int(command.args) if command.args else await retry_scheduler.dead_letters.size()
+    except ValueError:
+        await message.answer("❌ Использование: /dead_replay [количество]")
+        return
+    replayed = await retry_scheduler.replay(limit) if limit > 0 else 0
+    await message.answer(f"🔁 Возвращено в очередь: {replayed} видео.")
+
+
+@router.message(Command("dead_clear"))
+async def cmd_dead_clear(message: Message, retry_scheduler: RetryScheduler):
+    await retry_scheduler.dead_letters.clear()
+    await message.answer("✅ Dead-letter очередь очищена.")
+
+
+@router.message(Command("ytdlp_workers"))
+async def cmd_ytdlp_workers(message: Message, manager: AsyncProviderManager):
+    provider = manager.provider
+    if not isinstance(provider, AsyncYtDlpProvider):
+        await message.answer("❌ Провайдер не использует рабочие процессы yt-dlp.")
+        return
+
+    stats = provider.executor.stats()
+    response = (
+        f"⚙️ Задачи yt-dlp: выполнено {stats['completed']}, с ошибкой {stats['failed']}, "
+        f"прервано {stats['killed']}, падений процессов {stats['crashed']}\n"
+    )
+    hedge = provider.hedge_stats()
+    response += (
+        f"🔀 Параллельных загрузок: {hedge['hedges']}, из них успели первыми {hedge['hedge_wins']}, "
+        f"задержка {hedge['delay']:.1f} сек ({hedge['samples']} замеров)\n"
+    )
+    if not stats["workers"]:
+        response += "\nРабочие процессы еще не запущены."
+    for worker in stats["workers"]:
+        state = "свободен" if worker["busy_for"] is None else f"занят {worker['busy_for']:.0f} сек"
+        response += (
+            f"\nPID {worker['pid']}: {state}, задач {worker['jobs']}, "
+            f"CPU {worker['cpu_seconds']:.1f} сек, RSS {worker['rss_bytes'] / 2 ** 20:.0f} МБ"
+        )
+    await message.answer(response)
 
 
 @router.message(Command("upload"))
@@ -278,25 +393,72 @@ async def remove_all_proxies(message: Message, proxy_repository: ProxyRepository
     except Exception as e:
         await message.answer(f"Ошибка при удалении прокси: {e}")
 
+def _format_probe(probe: ProxyProbe) -> str:
+    timings = [
+        f"{name} {value * 1000:.0f} мс"
+        for name, value in (("TCP", probe.connect_time), ("TLS", probe.tls_time), ("запрос", probe.fetch_time))
+        if value is not None
+    ]
+    result = "✅" if probe.ok else f"❌ {probe.error}"
+    return f"проверка {probe.checked_at:%d.%m %H:%M}: {result}" + (f", {', '.join(timings)}" if timings else "")
+
+
 @router.message(Command("proxy_list"))
-async def proxy_list(message: Message, proxy_repository: ProxyRepository):
+async def proxy_list(
+    message: Message, proxy_repository: ProxyRepository, proxy_probes: ProxyProbeRepository
+):
     try:
         res = ""
         proxy_list = await proxy_repository.get_proxies()
         if len(proxy_list) <= 0:
             await message.answer("Список прокси пуст")
             return
+        probes = await proxy_probes.get_probes()
         for proxy in proxy_list:
             res += str(proxy) + "\n"
+            if proxy_repository.health is not None:
+                res += f"    {proxy_repository.health.describe(proxy.id)}\n"
+            probe = probes.get(proxy.id)
+            if probe is not None:
+                res += f"    {_format_probe(probe)}\n"
 
         await message.answer(res)
     except Exception as e:
         await message.answer(f"Ошибка при получении списка прокси: {e}")
 
 
+@router.message(Command("video_urgent"))
+async def cmd_video_urgent(
+    message: Message, queue: AsyncQueue, command: CommandObject, link_resolver: ShortLinkResolver
+):
+    links = extract_tiktok_links(command.args or "")
+    if not links:
+        await message.answer("❌ Использование: /video_urgent <TikTok ссылки>")
+        return
+    links = await link_resolver.canonicalize(links)
+
+    try:
+        added = await queue.put_many(
+            {"url": link, "priority": URGENT_VIDEO_PRIORITY} for link in links
+        )
+    except Exception as e:
+        logger.error(f"Failed to add urgent TikTok tasks: {e}")
+        await message.answer("❌ Ошибка при добавлении TikTok ссылок.")
+        return
+
+    if queue.supports_priority:
+        await message.answer(f"⚡ Добавлено {added} срочных TikTok ссылок в начало очереди.")
+    else:
+        await message.answer(
+            f"⚠️ Добавлено {added} TikTok ссылок в конец очереди: "
+            f"очередь {type(queue).__name__} не поддерживает приоритеты "
+            f"(нужен QUEUE_TYPE=redis_priority)."
+        )
+
+
 @router.message()
 async def handle_video_submission(
-    message: Message, queue: AsyncQueue
+    message: Message, queue: AsyncQueue, link_resolver: ShortLinkResolver
 ):
     if not await queue.get_flag():
         return
@@ -318,19 +480,25 @@ async def handle_video_submission(
             "• https://vm.tiktok.com/ABCD1234/\n"
             "• https://vt.tiktok.com/XYZ9876/"
         )
+        return
 
-    links = list(tiktok_links)
+    # Короткие ссылки разрешаются до очереди: при скачивании редиректы уже не нужны
+    links = await link_resolver.canonicalize(tiktok_links)
     random.shuffle(links)
 
-    for link in tiktok_links:
-        try:
-            await queue.put(
-                {"url": link}
-            )
-            logger.info(f"TikTok link added to queue: {link}")
+    try:
+        added = await queue.put_many({"url": link} for link in links)
+        logger.info(f"TikTok links added to queue: {added}")
 
-        except Exception as e:
-            logger.error(f"Failed to add TikTok task: {e}")
-            await message.answer("❌ Ошибка при добавлении TikTok ссылки.")
+    except Exception as e:
+        logger.error(f"Failed to add TikTok tasks: {e}")
+        await message.answer("❌ Ошибка при добавлении TikTok ссылок.")
+        return
 
-    await message.answer(f"✅ Добавлено {len(tiktok_links)} TikTok ссылок в очередь.")
+    duplicates = len(links) - added
+    if duplicates:
+        await message.answer(
+            f"✅ Добавлено {added} TikTok ссылок в очередь, пропущено дубликатов: {duplicates}."
+        )
+    else:
+        await message.answer(f"✅ Добавлено {added} TikTok ссылок в очередь.")
@@ -1,5 +1,6 @@
 import asyncio
 import logging
+import os
 
 from aiogram import Bot, Dispatcher
 from aiogram.types import BotCommand
@@ -10,16 +11,36 @@ from sqlalchemy.ext.asyncio import async_sessionmaker
 from sqlalchemy.ext.asyncio.session import AsyncSession
 
 from src.config import AppConfig
+from src.contexts import close_http_session
 from src.middlewares import AdminOnlyMiddleware, DependencyMiddleware, DbMiddleware
 from src.models import create_tables
 from src.handlers import router
 from src.provider.factories import AsyncTaskFactory
 from src.provider.manager import AsyncBrowserProviderManager, TaskManager, AsyncProviderManager
 from src.provider.models import TimeoutConfig, BrowserConfig
+from src.provider.prefetch import VideoPrefetcher
 from src.provider.providers import AsyncYtDlpProvider
-from src.queues.factories import QueueFactory, QueueType, TaskFactory
+from src.provider.video_cache import VideoCache
+from src.queues.codecs import CodecFactory, CodecType
+from src.queues.connection import RedisPoolConfig, configure_redis_pools, close_redis_pools
+from src.queues.dedup import DedupMode
+from src.queues.factories import (
+    DeadLetterQueueFactory,
+    DeadLetterQueueType,
+    DelayedQueueFactory,
+    DelayedQueueType,
+    QueueFactory,
+    QueueType,
+    TaskFactory,
+)
+from src.queues.retry import RetryScheduler
 from src.repository.facts import FactRepository
 from src.repository.proxy import ProxyRepository
+from src.repository.proxy_probes import ProxyProbeRepository
+from src.repository.telegram_files import TelegramFileRepository
+from src.services.proxy_health import ProxyHealth, ProxyHealthConfig
+from src.services.proxy_prober import ProxyProber
+from src.services.short_links import ShortLinkResolver
 
 from src.scheduler import setup_scheduler
 
@@ -39,45 +60,167 @@ async def main():
 
     session_maker = async_sessionmaker(engine, expire_on_commit=False)
 
+    configure_redis_pools(
+        RedisPoolConfig(
+            max_connections=config.redis_max_connections,
+            health_check_interval=config.redis_health_check_interval,
+        )
+    )
+
     timeout_config = TimeoutConfig()
     browser_config = BrowserConfig()
     task_browser_manager = TaskManager()
-    proxy_repository = ProxyRepository(session_maker)
+    proxy_health = ProxyHealth(
+        ProxyHealthConfig(
+            failure_threshold=config.proxy_failure_threshold,
+            open_timeout=config.proxy_open_timeout,
+        )
+    )
+    proxy_repository = ProxyRepository(session_maker, health=proxy_health)
+    proxy_probe_repository = ProxyProbeRepository(session_maker)
+    proxy_prober = ProxyProber(
+        proxy_repository,
+        proxy_probe_repository,
+        target_url=config.proxy_probe_url,
+        interval=config.proxy_probe_interval,
+        concurrency=config.proxy_probe_concurrency,
+        timeout=config.proxy_probe_timeout,
+    )
     fact_repository = FactRepository(session_maker)
-    yt_dlp_provider = AsyncYtDlpProvider()
+    file_id_repository = TelegramFileRepository(session_maker)
+    link_resolver = ShortLinkResolver(
+        redis_url=config.redis_url if config.short_link_cache == "redis" else None,
+        ttl=config.short_link_ttl,
+        concurrency=config.short_link_concurrency,
+    )
+    video_cache = None
+    if config.video_cache_max_bytes:
+        video_cache = VideoCache(
+            os.path.join(config.videos_dir_path, "cache"), config.video_cache_max_bytes
+        )
+    yt_dlp_provider = AsyncYtDlpProvider(
+        proxy_repository=proxy_repository,
+        pool_size=config.ydl_pool_size,
+        workers=config.ydl_workers,
+        job_timeout=config.ydl_job_timeout,
+        video_cache=video_cache,
+        hedge=config.ydl_hedge,
+        hedge_delay=config.ydl_hedge_delay,
+    )
     manager = AsyncProviderManager(
         provider=yt_dlp_provider,
         task_manager=task_browser_manager,
     )
 
-    task_queue = QueueFactory.create(
-        QueueType.REDIS, queue_name=config.queue_name, redis_url=config.redis_url
+    queue_type = QueueType(config.queue_type)
+    queue_kwargs = dict(
+        queue_name=config.queue_name,
+        codec=CodecFactory.create(CodecType(config.queue_codec)),
+        visibility_timeout=config.queue_visibility_timeout,
+    )
+    if queue_type == QueueType.LOCAL_DURABLE:
+        queue_kwargs.update(path=config.queue_path, reliable=config.queue_reliable)
+    elif queue_type == QueueType.REDIS_STREAM:
+        queue_kwargs.update(
+            redis_url=config.redis_url,
+            consumer_id=config.queue_consumer_id,
+            group_name=config.queue_group_name,
+        )
+    else:
+        queue_kwargs.update(redis_url=config.redis_url, consumer_id=config.queue_consumer_id)
+        dedup = DedupMode(config.queue_dedup)
+        queue_kwargs.update(
+            reliable=config.queue_reliable,
+            dedup=dedup,
+            dedup_window=config.queue_dedup_window,
+        )
+        if dedup == DedupMode.BLOOM:
+            queue_kwargs.update(
+                bloom_capacity=config.queue_bloom_capacity,
+                bloom_error_rate=config.queue_bloom_error_rate,
+            )
+        if queue_type == QueueType.REDIS_PRIORITY:
+            queue_kwargs["aging_interval"] = config.queue_priority_aging_interval
+    task_queue = QueueFactory.create(queue_type, **queue_kwargs)
+
+    schedule_queue_type = DelayedQueueType(config.schedule_queue_type)
+    if schedule_queue_type == DelayedQueueType.REDIS:
+        publication_queue = DelayedQueueFactory.create(
+            schedule_queue_type,
+            queue_name=f"{config.queue_name}:publications",
+            redis_url=config.redis_url,
+        )
+        retry_queue = DelayedQueueFactory.create(
+            schedule_queue_type,
+            queue_name=f"{config.queue_name}:retry",
+            redis_url=config.redis_url,
+            codec=queue_kwargs["codec"],
+        )
+        dead_letters = DeadLetterQueueFactory.create(
+            DeadLetterQueueType.REDIS, queue_name=f"{config.queue_name}:dead", redis_url=config.redis_url
+        )
+    else:
+        publication_queue = DelayedQueueFactory.create(
+            schedule_queue_type, name=f"{config.queue_name}:publications"
+        )
+        retry_queue = DelayedQueueFactory.create(schedule_queue_type, name=f"{config.queue_name}:retry")
+        dead_letters = DeadLetterQueueFactory.create(
+            DeadLetterQueueType.IN_MEMORY, name=f"{config.queue_name}:dead"
+        )
+    retry_scheduler = RetryScheduler(
+        task_queue,
+        retry_queue,
+        dead_letters,
+        max_retries=config.queue_max_retries,
+        backoff_base=config.queue_retry_backoff,
+        backoff_cap=config.queue_retry_backoff_cap,
     )
 
     task_factory = TaskFactory()
     async_task_factory = AsyncTaskFactory()
+    prefetcher = VideoPrefetcher(
+        task_queue,
+        manager,
+        async_task_factory,
+        directory=os.path.join(config.videos_dir_path, "prefetch"),
+        depth=config.prefetch_depth,
+        max_bytes=config.prefetch_max_bytes,
+        file_ids=file_id_repository,
+    )
 
     admin_middleware = AdminOnlyMiddleware(config.admin_ids)
     db_middleware = DbMiddleware("db_session", session_maker)
     proxy_repository_middleware = DependencyMiddleware("proxy_repository", proxy_repository)
     fact_repository_middleware = DependencyMiddleware("fact_repository", fact_repository)
     queue_middleware = DependencyMiddleware("queue", task_queue)
+    publication_queue_middleware = DependencyMiddleware("publication_queue", publication_queue)
+    retry_scheduler_middleware = DependencyMiddleware("retry_scheduler", retry_scheduler)
     task_factory_middleware = DependencyMiddleware("task_factory", task_factory)
     manager_middleware = DependencyMiddleware("manager", manager)
     task_browser_factory_middleware = DependencyMiddleware(
         "task_browser_factory", async_task_factory
     )
     config_middleware = DependencyMiddleware("config", config)
+    prefetcher_middleware = DependencyMiddleware("prefetcher", prefetcher)
+    file_ids_middleware = DependencyMiddleware("file_ids", file_id_repository)
+    link_resolver_middleware = DependencyMiddleware("link_resolver", link_resolver)
+    proxy_probes_middleware = DependencyMiddleware("proxy_probes", proxy_probe_repository)
 
     router.message.middleware(admin_middleware)
     dp.update.outer_middleware(db_middleware)
     dp.update.outer_middleware(proxy_repository_middleware)
     dp.update.outer_middleware(fact_repository_middleware)
     dp.update.outer_middleware(queue_middleware)
+    dp.update.outer_middleware(publication_queue_middleware)
+    dp.update.outer_middleware(retry_scheduler_middleware)
     dp.update.outer_middleware(task_factory_middleware)
     dp.update.outer_middleware(manager_middleware)
     dp.update.outer_middleware(task_browser_factory_middleware)
     dp.update.outer_middleware(config_middleware)
+    dp.update.outer_middleware(prefetcher_middleware)
+    dp.update.outer_middleware(file_ids_middleware)
+    dp.update.outer_middleware(link_resolver_middleware)
+    dp.update.outer_middleware(proxy_probes_middleware)
 
     dp.include_routers(router)
 
@@ -107,14 +250,63 @@ async def main():
             ),
             BotCommand(command="remaining", description="Сколько фактов осталось"),
             BotCommand(command="video_clear", description="Очистить очередь видео"),
+            BotCommand(
+                command="video_urgent", description="Добавить срочные видео в начало очереди"
+            ),
+            BotCommand(
+                command="dead_letters", description="Видео, которые не удалось опубликовать"
+            ),
+            BotCommand(
+                command="dead_replay", description="Вернуть неудачные видео в очередь"
+            ),
+            BotCommand(command="dead_clear", description="Очистить список неудачных видео"),
+            BotCommand(
+                command="ytdlp_workers", description="Нагрузка рабочих процессов yt-dlp"
+            ),
         ]
     )
 
     await create_tables(engine)
-    await setup_scheduler(
-        bot, session_maker, fact_repository, task_queue, manager, async_task_factory, task_factory, config.channel_id
+    await proxy_repository.load()
+    publications_task = await setup_scheduler(
+        bot,
+        session_maker,
+        publication_queue,
+        fact_repository,
+        task_queue,
+        retry_scheduler,
+        manager,
+        async_task_factory,
+        task_factory,
+        config.channel_id,
+        prefetcher,
+        file_id_repository,
     )
-    await dp.start_polling(bot)
+    retry_task = asyncio.create_task(retry_scheduler.run())
+    prefetch_task = asyncio.create_task(prefetcher.run())
+    proxy_write_back_task = asyncio.create_task(
+        proxy_repository.run_write_back(config.proxy_write_back_interval)
+    )
+    proxy_probe_task = None
+    if config.proxy_probe_interval:
+        proxy_probe_task = asyncio.create_task(proxy_prober.run())
+    try:
+        await dp.start_polling(bot)
+    finally:
+        publications_task.cancel()
+        retry_task.cancel()
+        prefetch_task.cancel()
+        proxy_write_back_task.cancel()
+        if proxy_probe_task is not None:
+            proxy_probe_task.cancel()
+        try:
+            await proxy_repository.flush_usage()
+        except Exception as e:
+            logging.warning(f"Не удалось записать время использования прокси: {e}")
+        prefetcher.close()
+        yt_dlp_provider.close()
+        await close_redis_pools()
+        await close_http_session()
 
 
 if __name__ == "__main__":
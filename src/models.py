@@ -1,7 +1,7 @@
 from enum import Enum
 from typing import Literal
 
-from sqlalchemy import String
+from sqlalchemy import Boolean, Float, String
 from sqlalchemy.ext.asyncio import AsyncAttrs
 from sqlalchemy.ext.asyncio.engine import AsyncEngine
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
@@ -44,6 +44,19 @@ class PublicationSlot(Base):
     )  # short_fact, medium_fact, video
 
 
+class TelegramFile(Base):
+    """Файл, уже загруженный в Telegram: повторная отправка по file_id без загрузки"""
+
+    __tablename__ = "telegram_files"
+
+    video_key: Mapped[str] = mapped_column(String, unique=True, nullable=False)
+    file_id: Mapped[str] = mapped_column(String, nullable=False)
+    file_unique_id: Mapped[str] = mapped_column(String, nullable=True)
+    created_at: Mapped[DateTime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
+
+
 class FactType(Enum):
     SHORT = "short"
     MEDIUM = "medium"
@@ -86,6 +99,21 @@ class Proxy(Base):
         return f"{self.id}. {self.server}, {self.last_used_at}"
 
 
+class ProxyProbe(Base):
+    """Результат последней фоновой проверки прокси"""
+
+    __tablename__ = "proxy_probes"
+
+    proxy_id: Mapped[int] = mapped_column(Integer, unique=True, nullable=False)
+    ok: Mapped[bool] = mapped_column(Boolean, nullable=False)
+    connect_time: Mapped[float] = mapped_column(Float, nullable=True, comment="TCP подключение, сек")
+    tls_time: Mapped[float] = mapped_column(Float, nullable=True, comment="TLS через CONNECT, сек")
+    fetch_time: Mapped[float] = mapped_column(Float, nullable=True, comment="Запрос через прокси, сек")
+    status: Mapped[int] = mapped_column(Integer, nullable=True)
+    error: Mapped[str] = mapped_column(String(255), nullable=True)
+    checked_at: Mapped[DateTime] = mapped_column(DateTime(timezone=True), nullable=False)
+
+
 async def create_tables(engine: AsyncEngine):
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
@@ -0,0 +1,272 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+import pickle
+import signal
+import time
+from itertools import count
+from multiprocessing.connection import Connection
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Сколько ждать завершения процесса после SIGKILL, сек
+KILL_JOIN_TIMEOUT = 5.0
+
+_CLOCK_TICKS = os.sysconf("SC_CLK_TCK")
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+
+
+def process_usage(pid: int) -> Dict[str, float]:
+    """
+    Потребление ресурсов процесса по данным /proc
+
+    Returns:
+        cpu_seconds (процесс и его завершенные дочерние процессы, например ffmpeg)
+        и rss_bytes; нули, если процесс уже завершен
+    """
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            # Имя процесса может содержать пробелы, поля считаются после ')'
+            fields = f.read().rsplit(")", 1)[1].split()
+    except OSError:
+        return {"cpu_seconds": 0.0, "rss_bytes": 0}
+    # Поля 14-17 (utime, stime, cutime, cstime) и 24 (rss в страницах), нумерация с 1
+    utime, stime, cutime, cstime = (int(value) for value in fields[11:15])
+    return {
+        "cpu_seconds": (utime + stime + cutime + cstime) / _CLOCK_TICKS,
+        "rss_bytes": int(fields[21]) * _PAGE_SIZE,
+    }
+
+
+def _worker_main(conn: Connection, initializer: Optional[Callable], initargs: tuple) -> None:
+    """Цикл рабочего процесса: выполняет функции из канала до его закрытия"""
+    # Своя группа процессов, чтобы при отмене завершить и дочерние процессы (ffmpeg)
+    os.setpgrp()
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    if initializer is not None:
+        initializer(*initargs)
+    # Сигнал готовности: время запуска процесса не входит в таймаут первой задачи
+    conn.send((0, True, None))
+    while True:
+        try:
+            job_id, fn, args, kwargs = conn.recv()
+        except (EOFError, OSError):
+            return
+        try:
+            conn.send((job_id, True, fn(*args, **kwargs)))
+        except Exception as e:
+            # Исключения yt-dlp содержат traceback и не всегда сериализуются
+            conn.send((job_id, False, f"{type(e).__name__}: {e}"))
+
+
+class _Worker:
+    def __init__(self, context, initializer: Optional[Callable], initargs: tuple):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(
+            target=_worker_main, args=(child_conn, initializer, initargs), daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+        self.ready = False
+        self.jobs = 0
+        self.busy_since: Optional[float] = None
+
+    @property
+    def pid(self) -> int:
+        return self.process.pid
+
+    def kill(self) -> None:
+        try:
+            os.killpg(self.pid, signal.SIGKILL)
+        except (ProcessLookupError, PermissionError):
+            # Группа еще не создана (процесс не успел вызвать setpgrp) или уже завершена
+            self.process.kill()
+        self.process.join(KILL_JOIN_TIMEOUT)
+        self.conn.close()
+
+
+class YtDlpProcessExecutor:
+    """
+    Пул рабочих процессов для блокирующей работы yt-dlp
+
+    В отличие от общего пула потоков, разбор страниц не удерживает GIL
+    основного процесса, а зависшую или отмененную задачу можно прервать:
+    рабочий процесс завершается вместе с дочерними процессами и заменяется
+    новым. Функции задач должны быть определены на уровне модуля, аргументы
+    и результат передаются через pickle.
+    """
+
+    def __init__(
+            self,
+            workers: int = 2,
+            job_timeout: Optional[float] = None,
+            initializer: Optional[Callable] = None,
+            initargs: tuple = ()
+    ):
+        """
+        Args:
+            workers: Количество рабочих процессов
+            job_timeout: Таймаут задачи по умолчанию, сек (None - без ограничения)
+            initializer: Функция уровня модуля, вызываемая при запуске рабочего процесса
+            initargs: Аргументы initializer
+        """
+        self.workers = workers
+        self.job_timeout = job_timeout
+        self.initializer = initializer
+        self.initargs = initargs
+        # spawn: рабочие процессы не наследуют потоки и event loop бота
+        self._context = multiprocessing.get_context("spawn")
+        self._idle: Optional[asyncio.Queue] = None
+        self._all: List[_Worker] = []
+        self._job_ids = count(1)
+        self._closed = False
+        self.completed = 0
+        self.failed = 0
+        self.killed = 0
+        self.crashed = 0
+
+    def _start_worker(self) -> _Worker:
+        worker = _Worker(self._context, self.initializer, self.initargs)
+        self._all.append(worker)
+        return worker
+
+    def _replace(self, worker: _Worker) -> None:
+        if worker in self._all:
+            self._all.remove(worker)
+        if not self._closed:
+            self._idle.put_nowait(self._start_worker())
+
+    def _ensure_started(self) -> None:
+        if self._idle is None:
+            self._idle = asyncio.Queue()
+            for _ in range(self.workers):
+                self._idle.put_nowait(self._start_worker())
+
+    async def _receive(self, worker: _Worker) -> Any:
+        loop = asyncio.get_running_loop()
+        ready = loop.create_future()
+        fd = worker.conn.fileno()
+        loop.add_reader(fd, lambda: ready.done() or ready.set_result(None))
+        try:
+            await ready
+        finally:
+            loop.remove_reader(fd)
+        return worker.conn.recv()
+
+    async def run(
+            self,
+            fn: Callable[..., Any],
+            *args,
+            timeout: Optional[float] = None,
+            **kwargs
+    ) -> Any:
+        """
+        Выполняет fn(*args, **kwargs) в рабочем процессе
+
+        При таймауте или отмене вызывающей корутины рабочий процесс
+        завершается (SIGKILL) и заменяется новым.
+
+        Args:
+            fn: Функция уровня модуля
+            timeout: Таймаут задачи, сек (по умолчанию job_timeout)
+
+        Returns:
+            Результат функции
+
+        Raises:
+            asyncio.TimeoutError: Если задача не завершилась за timeout
+            RuntimeError: Если функция завершилась с ошибкой или процесс упал
+        """
+        if self._closed:
+            raise RuntimeError("Executor is closed")
+        self._ensure_started()
+        if timeout is None:
+            timeout = self.job_timeout
+
+        worker = await self._idle.get()
+        job_id = next(self._job_ids)
+        try:
+            if not worker.ready:
+                await self._receive(worker)
+                worker.ready = True
+        except asyncio.CancelledError:
+            worker.kill()
+            self._replace(worker)
+            raise
+        except (EOFError, OSError) as e:
+            self.crashed += 1
+            logger.error(f"Процесс yt-dlp {worker.pid} не запустился: {e}")
+            worker.kill()
+            self._replace(worker)
+            raise RuntimeError(f"yt-dlp worker failed to start: {e}") from e
+        before = process_usage(worker.pid)
+        started = time.monotonic()
+        worker.busy_since = started
+        try:
+            try:
+                worker.conn.send((job_id, fn, args, kwargs))
+            except (TypeError, AttributeError, pickle.PicklingError):
+                # Задача не сериализуется: процесс исправен и возвращается в пул
+                worker.busy_since = None
+                self._idle.put_nowait(worker)
+                raise
+            _, ok, result = await asyncio.wait_for(self._receive(worker), timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError):
+            self.killed += 1
+            logger.warning(
+                f"Задача yt-dlp {job_id} прервана через {time.monotonic() - started:.1f} сек, "
+                f"процесс {worker.pid} завершен"
+            )
+            worker.kill()
+            self._replace(worker)
+            raise
+        except (EOFError, OSError) as e:
+            self.crashed += 1
+            logger.error(f"Процесс yt-dlp {worker.pid} завершился аварийно: {e}")
+            worker.kill()
+            self._replace(worker)
+            raise RuntimeError(f"yt-dlp worker crashed: {e}") from e
+
+        worker.busy_since = None
+        worker.jobs += 1
+        self._idle.put_nowait(worker)
+
+        after = process_usage(worker.pid)
+        logger.info(
+            f"Задача yt-dlp {job_id}: {time.monotonic() - started:.1f} сек, "
+            f"CPU {after['cpu_seconds'] - before['cpu_seconds']:.2f} сек, "
+            f"RSS {after['rss_bytes'] / 2 ** 20:.0f} МБ"
+        )
+        if not ok:
+            self.failed += 1
+            raise RuntimeError(result)
+        self.completed += 1
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        """Счетчики задач и потребление CPU и памяти каждым рабочим процессом"""
+        now = time.monotonic()
+        return {
+            "completed": self.completed,
+            "failed": self.failed,
+            "killed": self.killed,
+            "crashed": self.crashed,
+            "workers": [
+                {
+                    "pid": worker.pid,
+                    "jobs": worker.jobs,
+                    "busy_for": None if worker.busy_since is None else now - worker.busy_since,
+                    **process_usage(worker.pid),
+                }
+                for worker in self._all
+            ],
+        }
+
+    def close(self) -> None:
+        """Завершает все рабочие процессы, включая занятые"""
+        self._closed = True
+        for worker in self._all:
+            worker.kill()
+        self._all.clear()
@@ -9,6 +9,7 @@ import logging
 
 from src.browser.stealth import StealthBrowser
 from src.provider.interfaces import AsyncTask, AsyncBrowserProvider, AsyncProvider
+from src.models import Proxy
 from src.repository.proxy import ProxyRepository
 
 logger = logging.getLogger(__name__)
@@ -72,15 +73,9 @@ class TaskManager:
         """Параллельное выполнение множества задач с обработкой результатов."""
         task_coroutines = [self.execute_task(task, **dependencies) for task in tasks]
 
-        results = []
-        for future in asyncio.as_completed(task_coroutines):
-            try:
-                result = await future
-                results.append(result)
-            except Exception as e:
-                results.append(e)  # или можно использовать None/специальный объект
-
-        return results
+        # Все задачи планируются одним пакетом, параллелизм ограничивает семафор;
+        # порядок результатов совпадает с порядком задач, ошибки возвращаются как объекты
+        return await asyncio.gather(*task_coroutines, return_exceptions=True)
 
     async def execute_with_timeout(
         self, task: AsyncTask, timeout: float, **dependencies
@@ -158,6 +153,9 @@ class AsyncBrowserProviderManager:
         self.task_manager = task_manager
         self.browser = None
         self.playwright = None
+        self._proxy_id: Optional[int] = None
+        self._browser_lock = asyncio.Lock()
+        self._in_flight = 0  # Задачи, получившие текущий браузер и еще не завершенные
         self._is_running = False
 
     def _generate_fingerprint(self) -> dict:
@@ -181,20 +179,44 @@ class AsyncBrowserProviderManager:
         ]
         return [arg for arg in args if arg]
 
-    async def _launch_browser(self) -> Browser:
-        """Запуск браузера с настройками."""
+    async def _launch_browser(self, proxy: Optional[Proxy] = None) -> Browser:
+        """Запуск браузера с настройками (через proxy или следующий прокси ротации)."""
         self.playwright = await async_playwright().start()
-        proxy = await self.proxy_repository.get_next_proxy()
+        if proxy is None:
+            proxy = await self.proxy_repository.get_next_proxy()
+        self._proxy_id = proxy.id if proxy else None
         self.browser = await self.playwright.chromium.launch(
             headless=self.browser_config.headless, args=self._get_browser_args(),
             proxy= ProxySettings(server=proxy.server, username=proxy.username, password=proxy.password) if proxy else None
         )
         return self.browser
 
+    async def _close_browser(self):
+        if self.browser:
+            await self.browser.close()
+        if self.playwright:
+            await self.playwright.stop()
+        self.browser = None
+        self.playwright = None
+
     async def _get_dependencies(self) -> Dict[str, Any]:
         """Возвращает зависимости для задач."""
-        if not self.browser:
-            await self._launch_browser()
+        async with self._browser_lock:
+            if (
+                self.browser
+                and self._in_flight == 0
+                and self._proxy_id is not None
+                and not self.proxy_repository.is_available(self._proxy_id)
+            ):
+                # Прокси браузера исключен из ротации: перезапуск через другой.
+                # Браузер общий, поэтому закрывается только без задач в работе
+                proxy = await self.proxy_repository.get_next_proxy()
+                if proxy is not None and proxy.id != self._proxy_id:
+                    logger.warning(f"Proxy {self._proxy_id} is ejected, relaunching browser via proxy {proxy.id}")
+                    await self._close_browser()
+                    await self._launch_browser(proxy)
+            if not self.browser:
+                await self._launch_browser()
 
         return {
             "browser": self.browser,
@@ -209,13 +231,29 @@ class AsyncBrowserProviderManager:
             await self.start()
 
         dependencies = await self._get_dependencies()
+        proxy_id = self._proxy_id
+        started = time.monotonic()
 
-        if timeout:
-            return await self.task_manager.execute_with_timeout(
-                task, timeout, **dependencies
-            )
-        else:
-            return await self.task_manager.execute_task(task, **dependencies)
+        self._in_flight += 1
+        try:
+            if timeout:
+                result = await self.task_manager.execute_with_timeout(
+                    task, timeout, **dependencies
+                )
+            else:
+                result = await self.task_manager.execute_task(task, **dependencies)
+        except Exception:
+            self._report_proxy(proxy_id, False, time.monotonic() - started)
+            raise
+        finally:
+            self._in_flight -= 1
+        self._report_proxy(proxy_id, True, time.monotonic() - started)
+        return result
+
+    def _report_proxy(self, proxy_id: Optional[int], ok: bool, latency: float) -> None:
+        """Результат задачи для оценки состояния прокси браузера."""
+        if proxy_id is not None:
+            self.proxy_repository.report(proxy_id, ok, latency)
 
     async def process_batch(
         self, tasks: List[AsyncTask], timeout: Optional[float]
@@ -293,10 +331,7 @@ class AsyncBrowserProviderManager:
         await self.task_manager.wait_for_completion(timeout=30.0)
 
         # Закрываем браузер
-        if self.browser:
-            await self.browser.close()
-        if self.playwright:
-            await self.playwright.stop()
+        await self._close_browser()
 
         self._is_running = False
         logger.info("AsyncProviderManager stopped")
@@ -0,0 +1,216 @@
+import asyncio
+import hashlib
+import logging
+import os
+import shutil
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from src.provider.factories import AsyncTaskFactory
+from src.provider.manager import AsyncProviderManager
+from src.provider.tasks import AsyncTaskType
+from src.queues.interfaces import AsyncQueue
+from src.repository.telegram_files import TelegramFileRepository
+from src.utils import tiktok_video_key
+
+logger = logging.getLogger(__name__)
+
+# Через сколько секунд повторять предзагрузку ссылки, которую не удалось скачать
+FAILED_RETRY_INTERVAL = 15 * 60
+
+
+class VideoPrefetcher:
+    """
+    Фоновая предзагрузка ближайших видео очереди
+
+    Держит скачанными первые depth видео очереди (по peek_many, без их
+    получения), поэтому в момент слота остается только отправить готовый
+    файл. Буфер ограничен количеством и суммарным размером файлов; видео,
+    покинувшие голову очереди (опубликованы, очередь очищена, их обогнали
+    срочные), удаляются при следующем обновлении. Буфер не переживает
+    рестарт: каталог очищается при запуске.
+    """
+
+    def __init__(
+        self,
+        queue: AsyncQueue,
+        manager: AsyncProviderManager,
+        async_task_factory: AsyncTaskFactory,
+        directory: str,
+        depth: int = 3,
+        max_bytes: int = 300 * 2 ** 20,
+        interval: float = 30.0,
+        file_ids: Optional[TelegramFileRepository] = None,
+    ):
+        """
+        :param queue: Очередь видео
+        :param manager: Менеджер провайдера, через который скачиваются видео
+        :param async_task_factory: Фабрика задач скачивания
+        :param directory: Каталог предзагруженных файлов (очищается при запуске)
+        :param depth: Сколько видео из головы очереди держать скачанными (0 - выключено)
+        :param max_bytes: Максимальный суммарный размер предзагруженных файлов
+        :param interval: Период проверки головы очереди, сек
+        :param file_ids: file_id загруженных видео; такие видео не предзагружаются
+        """
+        self.queue = queue
+        self.manager = manager
+        self.async_task_factory = async_task_factory
+        self.directory = directory
+        self.depth = depth
+        self.max_bytes = max_bytes
+        self.interval = interval
+        self.file_ids = file_ids
+        self._ready: "OrderedDict[str, Tuple[str, int]]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._failed: Dict[str, float] = {}
+        # Размеры видео, не поместившихся в буфер: повторно скачиваются, когда место освободится
+        self._deferred: Dict[str, int] = {}
+        self._bytes = 0
+        self._wake = asyncio.Event()
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, url: str, filename: str) -> str:
+        # Имя по ссылке: у разных видео с одинаковым названием разные файлы
+        digest = hashlib.sha1(url.encode()).hexdigest()[:20]
+        return os.path.join(self.directory, digest + os.path.splitext(filename)[1])
+
+    def _discard(self, url: str) -> None:
+        path, size = self._ready.pop(url)
+        self._bytes -= size
+        try:
+            os.remove(path)
+        except OSError as e:
+            logger.warning(f"Не удалось удалить предзагруженный файл {path}: {e}")
+
+    async def _download(self, url: str) -> None:
+        task = self.async_task_factory.create(AsyncTaskType.VIDEO, url=url)
+        filename = await self.manager.process_task(task)
+        if not filename or not os.path.isfile(filename):
+            self._failed[url] = time.monotonic()
+            logger.warning(f"Предзагрузка {url} не удалась")
+            return
+
+        size = os.path.getsize(filename)
+        if size == 0 or self._bytes + size > self.max_bytes:
+            os.remove(filename)
+            if size == 0:
+                self._failed[url] = time.monotonic()
+                logger.warning(f"Предзагрузка {url}: пустой файл")
+            else:
+                self._deferred[url] = size
+                logger.info(f"Предзагрузка {url} отложена: буфер заполнен ({self._bytes} байт)")
+            return
+
+        path = self._path(url, filename)
+        os.replace(filename, path)
+        self._ready[url] = (path, size)
+        self._bytes += size
+        logger.info(f"Видео {url} предзагружено ({size / 2 ** 20:.1f} МБ)")
+
+    async def _fetch(self, url: str) -> None:
+        self._inflight[url] = asyncio.ensure_future(self._download(url))
+        try:
+            await self._inflight[url]
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self._failed[url] = time.monotonic()
+            logger.warning(f"Предзагрузка {url} не удалась: {e}")
+        finally:
+            self._inflight.pop(url, None)
+
+    async def refresh(self) -> None:
+        """Приводит буфер в соответствие с головой очереди"""
+        head: List[str] = []
+        for item in await self.queue.peek_many(self.depth):
+            url = item.get("url")
+            if url and url not in head:
+                head.append(url)
+        if self.file_ids is not None:
+            # Видео, уже загруженные в Telegram, отправляются по file_id
+            head = [url for url in head if not await self._uploaded(url)]
+
+        for url in [url for url in self._ready if url not in head]:
+            self._discard(url)
+
+        now = time.monotonic()
+        for url in head:
+            if url in self._ready:
+                continue
+            if now - self._failed.get(url, -FAILED_RETRY_INTERVAL) < FAILED_RETRY_INTERVAL:
+                continue
+            if self._bytes + self._deferred.get(url, 1) > self.max_bytes:
+                # Место освобождается в порядке очереди, поэтому дальше не идем
+                break
+            await self._fetch(url)
+        self._failed = {
+            url: failed_at for url, failed_at in self._failed.items()
+            if url in head and now - failed_at < FAILED_RETRY_INTERVAL
+        }
+        self._deferred = {url: size for url, size in self._deferred.items() if url in head}
+
+    async def _uploaded(self, url: str) -> bool:
+        video_key = tiktok_video_key(url)
+        return video_key is not None and await self.file_ids.get_file_id(video_key) is not None
+
+    async def take(self, url: str) -> Optional[str]:
+        """
+        Забирает предзагруженный файл видео
+
+        Если видео как раз скачивается, дожидается окончания загрузки.
+        Файл переходит во владение вызывающего (удаляется им после отправки).
+
+        :return: Путь к файлу или None, если видео не предзагружено
+        """
+        inflight = self._inflight.get(url)
+        if inflight is not None:
+            # shield: отмена публикации не прерывает общую загрузку
+            await asyncio.wait([asyncio.shield(inflight)])
+
+        entry = self._ready.pop(url, None)
+        if entry is None:
+            self.misses += 1
+            return None
+        path, size = entry
+        self._bytes -= size
+        self._wake.set()
+        if not os.path.isfile(path):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return path
+
+    async def run(self) -> None:
+        """Цикл предзагрузки"""
+        if self.depth <= 0:
+            return
+        shutil.rmtree(self.directory, ignore_errors=True)
+        os.makedirs(self.directory, exist_ok=True)
+        while True:
+            try:
+                await self.refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"[!] Ошибка предзагрузки видео: {e}")
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+
+    def close(self) -> None:
+        """Удаляет предзагруженные файлы"""
+        for url in list(self._ready):
+            self._discard(url)
+
+    def get_stats(self) -> dict:
+        return {
+            "ready": len(self._ready),
+            "bytes": self._bytes,
+            "downloading": list(self._inflight),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
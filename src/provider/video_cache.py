@@ -0,0 +1,205 @@
+import hashlib
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+import uuid
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+INDEX_FILE = "index.json"
+OBJECTS_DIR = "objects"
+HASH_CHUNK_SIZE = 1 << 20
+
+
+def file_digest(path: str) -> str:
+    """SHA-256 содержимого файла"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _link_or_copy(source: str, target: str) -> None:
+    try:
+        os.link(source, target)
+    except OSError:
+        # Другая файловая система или жесткие ссылки не поддерживаются
+        shutil.copyfile(source, target)
+
+
+class VideoCache:
+    """
+    Кеш скачанных видео на диске с адресацией по содержимому
+
+    Файлы хранятся под SHA-256 содержимого (одинаковое видео по разным
+    ключам занимает место один раз), ключ - id видео TikTok. Индекс с
+    временем последнего использования переживает рестарт; при превышении
+    max_bytes удаляются давно не использованные записи.
+
+    Вызывающая сторона получает жесткую ссылку на файл кеша, поэтому может
+    удалить ее после отправки, не затрагивая кеш. Методы блокирующие
+    (хеширование, файловые операции) и потокобезопасные: в async коде
+    вызываются через asyncio.to_thread.
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        """
+        Args:
+            directory: Каталог кеша
+            max_bytes: Максимальный суммарный размер файлов кеша
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.objects_dir = os.path.join(directory, OBJECTS_DIR)
+        self.index_path = os.path.join(directory, INDEX_FILE)
+        self._lock = threading.Lock()
+        # ключ -> {"digest", "ext", "size", "last_used"}
+        self._entries: Dict[str, dict] = {}
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(self.objects_dir, exist_ok=True)
+        self._load()
+
+    def _object_path(self, digest: str, ext: str) -> str:
+        return os.path.join(self.objects_dir, digest[:2], digest + ext)
+
+    def _load(self) -> None:
+        """Чтение индекса: записи без файла отбрасываются, файлы без записей удаляются"""
+        try:
+            with open(self.index_path) as f:
+                entries = json.load(f)
+        except FileNotFoundError:
+            entries = {}
+        except (OSError, ValueError) as e:
+            logger.warning(f"Индекс кеша видео поврежден, кеш очищается: {e}")
+            entries = {}
+
+        self._entries = {
+            key: entry for key, entry in entries.items()
+            if os.path.isfile(self._object_path(entry["digest"], entry["ext"]))
+        }
+        referenced = {self._object_path(entry["digest"], entry["ext"]) for entry in self._entries.values()}
+        for root, _, files in os.walk(self.objects_dir):
+            for name in files:
+                path = os.path.join(root, name)
+                if path not in referenced:
+                    os.remove(path)
+        self._evict()
+        self._save()
+
+    def _save(self) -> None:
+        """Атомарная запись индекса"""
+        tmp_path = f"{self.index_path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self._entries, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.index_path)
+
+    def _objects(self) -> Dict[str, int]:
+        """Размеры уникальных файлов кеша"""
+        return {
+            self._object_path(entry["digest"], entry["ext"]): entry["size"]
+            for entry in self._entries.values()
+        }
+
+    @property
+    def total_bytes(self) -> int:
+        with self._lock:
+            return sum(self._objects().values())
+
+    def _evict(self) -> None:
+        objects = self._objects()
+        total = sum(objects.values())
+        for key in sorted(self._entries, key=lambda k: self._entries[k]["last_used"]):
+            if total <= self.max_bytes:
+                break
+            entry = self._entries.pop(key)
+            path = self._object_path(entry["digest"], entry["ext"])
+            # Файл удаляется, когда на него не ссылается ни один ключ
+            if path not in self._objects():
+                total -= objects[path]
+                try:
+                    os.remove(path)
+                except OSError as e:
+                    logger.warning(f"Не удалось удалить файл кеша {path}: {e}")
+            logger.info(f"Видео {key} вытеснено из кеша")
+
+    def get(self, key: str, target_dir: str, name: Optional[str] = None) -> Optional[str]:
+        """
+        Копия видео из кеша в виде жесткой ссылки в target_dir
+
+        Args:
+            key: Ключ видео
+            target_dir: Каталог для ссылки
+            name: Имя файла без расширения (по умолчанию ключ с уникальным суффиксом,
+                чтобы одновременные запросы одного видео не делили один файл)
+
+        Returns:
+            Путь к файлу или None, если видео нет в кеше
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            source = self._object_path(entry["digest"], entry["ext"])
+            if name is None:
+                name = f"{key.replace('/', '_')}.{uuid.uuid4().hex}"
+            target = os.path.join(target_dir, name + entry["ext"])
+            try:
+                if os.path.getsize(source) != entry["size"]:
+                    raise OSError("размер файла не совпадает с индексом")
+                if os.path.exists(target):
+                    os.remove(target)
+                _link_or_copy(source, target)
+            except OSError as e:
+                logger.warning(f"Запись кеша {key} повреждена и удалена: {e}")
+                del self._entries[key]
+                self._save()
+                self.misses += 1
+                return None
+            entry["last_used"] = time.time()
+            self._save()
+            self.hits += 1
+            return target
+
+    def put(self, key: str, path: str) -> None:
+        """
+        Добавляет скачанный файл в кеш (сам файл остается на месте)
+
+        Args:
+            key: Ключ видео
+            path: Путь к файлу
+        """
+        size = os.path.getsize(path)
+        if size == 0 or size > self.max_bytes:
+            return
+        digest = file_digest(path)
+        ext = os.path.splitext(path)[1]
+        target = self._object_path(digest, ext)
+
+        with self._lock:
+            if not os.path.isfile(target):
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                tmp_path = f"{target}.{uuid.uuid4().hex}.tmp"
+                _link_or_copy(path, tmp_path)
+                os.replace(tmp_path, target)
+            self._entries[key] = {"digest": digest, "ext": ext, "size": size, "last_used": time.time()}
+            self._evict()
+            self._save()
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": sum(self._objects().values()),
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
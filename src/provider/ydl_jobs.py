@@ -0,0 +1,64 @@
+"""
+Задачи yt-dlp, выполняемые в рабочих процессах YtDlpProcessExecutor
+
+Каждый рабочий процесс держит свой YoutubeDLPool, созданный init_worker.
+"""
+import os
+from typing import Any, Dict, Optional, Tuple
+
+from src.provider.ydl_pool import YoutubeDLPool
+
+_pool: Optional[YoutubeDLPool] = None
+
+
+def init_worker(pool_size: int) -> None:
+    global _pool
+    _pool = YoutubeDLPool(max_size=pool_size)
+
+
+def extract_info(options: Dict[str, Any], url: str) -> Optional[Dict[str, Any]]:
+    """Информация о видео без скачивания"""
+    with _pool.acquire(options) as ydl:
+        info = ydl.extract_info(url, download=False)
+        # Результат передается в основной процесс через pickle
+        return ydl.sanitize_info(info)
+
+
+def download(
+        options: Dict[str, Any],
+        overrides: Dict[str, Any],
+        url: str,
+        job_dir: str,
+        target_dir: str
+) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Скачивает видео в каталог задачи и переносит готовый файл в target_dir
+
+    Незавершенные файлы (.part, промежуточные потоки до слияния) остаются в
+    job_dir, который вызывающая сторона удаляет целиком, в том числе после
+    прерывания задачи.
+
+    Имя по шаблону из настроек (по названию видео) дополняется именем
+    каталога задачи: у разных видео бывают одинаковые названия, а загрузки
+    слотов и предзагрузки выполняются одновременно. Явно заданное имя
+    файла (outtmpl в overrides) не меняется.
+
+    Returns:
+        Путь к файлу в target_dir (None, если yt-dlp не вернул путь) и id видео
+    """
+    template = os.path.basename(overrides.get('outtmpl', options['outtmpl']))
+    unique = 'outtmpl' not in overrides
+    overrides = {**overrides, 'outtmpl': os.path.join(job_dir, template)}
+    with _pool.acquire(options, overrides) as ydl:
+        info = ydl.extract_info(url, download=True)
+
+    if not info or not info.get('requested_downloads'):
+        return None, None
+    filepath = info['requested_downloads'][0]['filepath']
+    name = os.path.basename(filepath)
+    if unique:
+        stem, ext = os.path.splitext(name)
+        name = f"{stem}.{os.path.basename(job_dir).lstrip('.')}{ext}"
+    target = os.path.join(target_dir, name)
+    os.replace(filepath, target)
+    return target, info.get('id')
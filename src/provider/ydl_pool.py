@@ -0,0 +1,173 @@
+import json
+import logging
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from yt_dlp import YoutubeDL
+from yt_dlp.utils import DownloadError
+
+logger = logging.getLogger(__name__)
+
+# Параметры, которые yt-dlp читает при каждом вызове extract_info и которые
+# поэтому можно безопасно подменить на время одного вызова. Прокси, формат,
+# cookies и постпроцессоры применяются при создании экземпляра и входят в ключ пула
+OVERRIDABLE_PARAMS = frozenset({
+    'outtmpl',
+    'noplaylist',
+    'extractor_args',
+    'writethumbnail',
+    'writeinfojson',
+    'writesubtitles',
+    'writeautomaticsub',
+})
+
+# После стольких вызовов экземпляр пересоздается, чтобы подхватить обновленный cookies.txt
+MAX_USES = 200
+
+_MISSING = object()
+
+
+class YoutubeDLPool:
+    """
+    Пул долгоживущих экземпляров YoutubeDL
+
+    Создание YoutubeDL инициализирует экстракторы, читает файл cookies и
+    собирает HTTP-клиент, поэтому экземпляры переиспользуются между вызовами.
+    Ключ пула - параметры, применяемые при создании (профиль, прокси, формат,
+    файл cookies). Экземпляр выдается одному потоку за раз, свободные
+    экземпляры вытесняются по LRU при превышении max_size.
+    """
+
+    def __init__(self, max_size: int = 8, max_uses: int = MAX_USES):
+        """
+        Args:
+            max_size: Максимальное количество свободных экземпляров в пуле
+            max_uses: Количество вызовов, после которого экземпляр пересоздается
+        """
+        self.max_size = max_size
+        self.max_uses = max_uses
+        self._idle: "OrderedDict[Tuple[str, int], Tuple[YoutubeDL, int]]" = OrderedDict()
+        # Порядковый номер возврата: различает экземпляры одного ключа и задает порядок LRU
+        self._serial = 0
+        self._lock = threading.Lock()
+        self.created = 0
+        self.reused = 0
+
+    @staticmethod
+    def pool_key(options: Dict[str, Any]) -> str:
+        """Ключ пула: все параметры создания экземпляра в каноническом виде"""
+        return json.dumps(options, sort_keys=True, default=str)
+
+    def _checkout(self, key: str) -> Optional[Tuple[YoutubeDL, int]]:
+        with self._lock:
+            for slot in reversed(self._idle):
+                if slot[0] == key:
+                    self.reused += 1
+                    return self._idle.pop(slot)
+        return None
+
+    def _checkin(self, key: str, ydl: YoutubeDL, uses: int) -> None:
+        evicted: List[YoutubeDL] = []
+        with self._lock:
+            self._serial += 1
+            self._idle[(key, self._serial)] = (ydl, uses)
+            while len(self._idle) > self.max_size:
+                evicted.append(self._idle.popitem(last=False)[1][0])
+        for instance in evicted:
+            self._close(instance)
+
+    @staticmethod
+    def _close(ydl: YoutubeDL) -> None:
+        try:
+            ydl.close()
+        except Exception as e:
+            logger.warning(f"Ошибка при закрытии YoutubeDL: {e}")
+
+    @staticmethod
+    def _apply(ydl: YoutubeDL, overrides: Dict[str, Any]) -> Dict[str, Any]:
+        """Подменяет параметры экземпляра и возвращает прежние значения"""
+        saved = {}
+        for name, value in overrides.items():
+            saved[name] = ydl.params.get(name, _MISSING)
+            if name == 'outtmpl':
+                # После создания экземпляра outtmpl хранится словарем по типам файлов
+                value = {**ydl.params['outtmpl'], 'default': value}
+            ydl.params[name] = value
+        return saved
+
+    @staticmethod
+    def _restore(ydl: YoutubeDL, saved: Dict[str, Any]) -> None:
+        for name, value in saved.items():
+            if value is _MISSING:
+                ydl.params.pop(name, None)
+            else:
+                ydl.params[name] = value
+
+    @contextmanager
+    def acquire(
+            self,
+            options: Dict[str, Any],
+            overrides: Optional[Dict[str, Any]] = None
+    ) -> Iterator[YoutubeDL]:
+        """
+        Выдает экземпляр YoutubeDL в монопольное пользование
+
+        Args:
+            options: Параметры создания экземпляра (определяют ключ пула)
+            overrides: Параметры только для этого вызова (см. OVERRIDABLE_PARAMS)
+
+        Raises:
+            ValueError: Если переопределяется параметр, применяемый при создании
+        """
+        overrides = overrides or {}
+        for name in overrides:
+            if name not in OVERRIDABLE_PARAMS:
+                raise ValueError(f"Параметр {name} нельзя переопределить для отдельного вызова")
+
+        key = self.pool_key(options)
+        slot = self._checkout(key)
+        if slot is None:
+            ydl, uses = YoutubeDL(dict(options)), 0
+            with self._lock:
+                self.created += 1
+        else:
+            ydl, uses = slot
+
+        saved = self._apply(ydl, overrides)
+        try:
+            yield ydl
+        except DownloadError:
+            # Обычная ошибка скачивания (видео удалено, прокси недоступен): экземпляр исправен
+            self._restore(ydl, saved)
+            self._release(key, ydl, uses)
+            raise
+        except BaseException:
+            # Состояние экземпляра после непредвиденной ошибки не гарантировано
+            self._close(ydl)
+            raise
+        self._restore(ydl, saved)
+        self._release(key, ydl, uses)
+
+    def _release(self, key: str, ydl: YoutubeDL, uses: int) -> None:
+        if uses + 1 >= self.max_uses:
+            self._close(ydl)
+        else:
+            self._checkin(key, ydl, uses + 1)
+
+    def close(self) -> None:
+        """Закрывает все свободные экземпляры"""
+        with self._lock:
+            instances = [ydl for ydl, _ in self._idle.values()]
+            self._idle.clear()
+        for ydl in instances:
+            self._close(ydl)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "idle": len(self._idle),
+                "created": self.created,
+                "reused": self.reused,
+            }
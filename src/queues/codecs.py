@@ -0,0 +1,110 @@
+import json
+import struct
+from abc import ABC, abstractmethod
+from enum import Enum
+from typing import Any
+
+from src.abstract import BaseFactory
+from src.queues.models import VideoSource, VideoTaskRecord
+
+
+class Codec(ABC):
+    """Кодирование элементов очереди в байты для хранения"""
+
+    @abstractmethod
+    def encode(self, item: Any) -> bytes:
+        pass
+
+    @abstractmethod
+    def decode(self, data: bytes) -> Any:
+        pass
+
+
+class JsonCodec(Codec):
+    """Элементы хранятся как JSON (формат по умолчанию)"""
+
+    def encode(self, item: Any) -> bytes:
+        if isinstance(item, VideoTaskRecord):
+            item = item.to_dict()
+        return json.dumps(item).encode()
+
+    def decode(self, data: bytes) -> Any:
+        return json.loads(data)
+
+
+class VideoTaskCodec(Codec):
+    """
+    Версионированное бинарное кодирование задач на публикацию видео.
+
+    Первый байт - версия формата. Значения меньше 0x20 не встречаются
+    в начале JSON, поэтому элементы, записанные JsonCodec (и элементы,
+    которые нельзя представить записью), читаются тем же кодеком.
+
+    Формат v1 (little-endian), 20 байт + код короткой ссылки:
+        B version, B source, H retries, d enqueued_at, Q video_id, [short_code ascii]
+    Формат v2 добавляет после заголовка v1 байт приоритета (b, со знаком).
+    Формат v3 - заголовок v2, после которого у полной ссылки хранится имя
+    автора, у короткой - код ссылки. Записываются элементы в v3, v1 и v2
+    читаются без имени автора, v1 - с приоритетом 0.
+    """
+
+    VERSION = 3
+    HEADER_V1 = struct.Struct("<BBHdQ")
+    HEADER = struct.Struct("<BBHdQb")
+    SOURCES = tuple(VideoSource)
+
+    def __init__(self):
+        self._json = JsonCodec()
+
+    def encode(self, item: Any) -> bytes:
+        record = item
+        if isinstance(item, dict):
+            record = VideoTaskRecord.from_dict(item)
+        if not isinstance(record, VideoTaskRecord):
+            return self._json.encode(item)
+
+        header = self.HEADER.pack(
+            self.VERSION,
+            record.source,
+            min(record.retries, 0xFFFF),
+            record.enqueued_at,
+            record.video_id,
+            max(-128, min(record.priority, 127)),
+        )
+        if record.source == VideoSource.CANONICAL:
+            return header + record.username.encode("ascii")
+        return header + record.short_code.encode("ascii")
+
+    def decode(self, data: bytes) -> Any:
+        version = data[0]
+        if version >= 0x20:
+            return self._json.decode(data)
+
+        if version in (2, 3):
+            _, source, retries, enqueued_at, video_id, priority = self.HEADER.unpack_from(data)
+            header_size = self.HEADER.size
+        elif version == 1:
+            _, source, retries, enqueued_at, video_id = self.HEADER_V1.unpack_from(data)
+            priority = 0
+            header_size = self.HEADER_V1.size
+        else:
+            raise ValueError(f"Unsupported video task encoding version: {version}")
+
+        tail = data[header_size:].decode("ascii")
+        source = self.SOURCES[source]
+        if version == 3 and source == VideoSource.CANONICAL:
+            return VideoTaskRecord(video_id, source, retries, enqueued_at, "", priority, tail)
+        return VideoTaskRecord(video_id, source, retries, enqueued_at, tail, priority)
+
+
+class CodecType(Enum):
+    JSON = "json"
+    VIDEO_TASK = "video_task"
+
+
+class CodecFactory(BaseFactory[CodecType, Codec]):
+    pass
+
+
+CodecFactory.register(CodecType.JSON, JsonCodec)
+CodecFactory.register(CodecType.VIDEO_TASK, VideoTaskCodec)
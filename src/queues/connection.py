@@ -0,0 +1,81 @@
+import logging
+from dataclasses import dataclass
+from typing import Dict, Tuple
+
+import redis.asyncio as redis
+from redis.asyncio.retry import Retry
+from redis.backoff import ExponentialWithJitterBackoff
+from redis.exceptions import ConnectionError, TimeoutError
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class RedisPoolConfig:
+    max_connections: int = 32  # Размер пула для обычных команд
+    max_blocking_connections: int = 16  # Размер пула для BRPOP/BLMOVE/XREADGROUP BLOCK
+    pool_timeout: float = 5.0  # Ожидание свободного соединения из пула
+    health_check_interval: int = 15  # PING перед использованием простаивающего соединения
+    socket_connect_timeout: float = 5.0
+    socket_timeout: float = 10.0  # Для обычных команд; блокирующие ждут без таймаута
+    retries: int = 6
+    backoff_base: float = 0.05  # Первая задержка переподключения, сек
+    backoff_cap: float = 2.0  # Максимальная задержка переподключения, сек
+
+
+_config = RedisPoolConfig()
+# (redis_url, blocking) -> клиент поверх общего пула соединений процесса
+_clients: Dict[Tuple[str, bool], redis.Redis] = {}
+
+
+def configure_redis_pools(config: RedisPoolConfig) -> None:
+    """Задает параметры пулов; действует на пулы, созданные после вызова"""
+    global _config
+    _config = config
+
+
+def get_redis(redis_url: str, blocking: bool = False) -> redis.Redis:
+    """
+    Возвращает общий для процесса клиент Redis.
+
+    Все очереди и ключи флагов одного redis_url используют один пул соединений.
+    Блокирующие команды получают отдельный пул (blocking=True), чтобы долгое
+    ожидание не занимало соединения обычных команд. Разорванное соединение
+    переустанавливается с экспоненциальной задержкой со случайным разбросом,
+    а команда повторяется.
+    """
+    key = (redis_url, blocking)
+    client = _clients.get(key)
+    if client is not None:
+        return client
+
+    config = _config
+    pool = redis.BlockingConnectionPool.from_url(
+        redis_url,
+        max_connections=config.max_blocking_connections if blocking else config.max_connections,
+        timeout=config.pool_timeout,
+        health_check_interval=config.health_check_interval,
+        socket_keepalive=True,
+        socket_connect_timeout=config.socket_connect_timeout,
+        socket_timeout=None if blocking else config.socket_timeout,
+        retry=Retry(
+            ExponentialWithJitterBackoff(base=config.backoff_base, cap=config.backoff_cap),
+            config.retries,
+        ),
+        # OSError - отказ в подключении во время переустановки соединения
+        retry_on_error=[ConnectionError, TimeoutError, OSError],
+    )
+    client = redis.Redis(connection_pool=pool)
+    _clients[key] = client
+    return client
+
+
+async def close_redis_pools() -> None:
+    """Закрывает все соединения общих пулов (при остановке процесса)"""
+    clients = list(_clients.values())
+    _clients.clear()
+    for client in clients:
+        try:
+            await client.connection_pool.disconnect()
+        except Exception as e:
+            logger.warning(f"Ошибка при закрытии пула Redis: {e}")
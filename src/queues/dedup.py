@@ -0,0 +1,53 @@
+import hashlib
+import math
+from enum import Enum
+from typing import Any, List
+
+from src.queues.models import VideoSource, VideoTaskRecord
+from src.utils import extract_tiktok_short_code, extract_tiktok_video_id
+
+
+class DedupMode(Enum):
+    NONE = "none"
+    WINDOW = "window"  # Точная история ключей в ZSET за окно
+    BLOOM = "bloom"  # Фильтр Блума на битовой строке Redis для больших историй
+
+
+def dedup_key(item: Any) -> str:
+    """
+    Ключ дедупликации элемента очереди.
+
+    Для видео TikTok это канонический id, поэтому разные формы одной полной
+    ссылки совпадают; короткие ссылки до разрешения сравниваются по коду.
+    """
+    if isinstance(item, VideoTaskRecord):
+        if item.source == VideoSource.CANONICAL:
+            return str(item.video_id)
+        return f"short:{item.short_code}"
+
+    url = item.get("url") if isinstance(item, dict) else None
+    if not url:
+        return repr(item)
+
+    video_id = extract_tiktok_video_id(url)
+    if video_id is not None:
+        return str(video_id)
+    short = extract_tiktok_short_code(url)
+    if short is not None:
+        return f"short:{short[1]}"
+    return url.split("?", 1)[0].rstrip("/").lower()
+
+
+class BloomFilterParams:
+    """Размер битовой строки и число хеш-функций для заданной емкости и доли ложных срабатываний"""
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+
+    def offsets(self, key: str) -> List[int]:
+        """Номера битов ключа (двойное хеширование по Кирш-Митценмахеру)"""
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hash_count)]
@@ -2,8 +2,16 @@ from enum import Enum
 
 from src.interfaces import Command
 from src.queues.implementations.inmemory import InMemoryQueue
+from src.queues.implementations.inmemory_dead_letter import InMemoryDeadLetterQueue
+from src.queues.implementations.inmemory_delayed import InMemoryDelayedQueue
+from src.queues.implementations.inmemory_priority import InMemoryPriorityQueue
+from src.queues.implementations.local_durable import LocalDurableQueue
 from src.queues.implementations.redis import RedisAsyncQueue
-from src.queues.interfaces import Queue
+from src.queues.implementations.redis_dead_letter import RedisDeadLetterQueue
+from src.queues.implementations.redis_delayed import RedisDelayedQueue
+from src.queues.implementations.redis_priority import RedisPriorityQueue
+from src.queues.implementations.redis_stream import RedisStreamQueue
+from src.queues.interfaces import Queue, DelayedQueue, DeadLetterQueue
 
 from src.queues.tasks import TaskVideo, TaskLink
 from src.abstract import BaseFactory
@@ -11,7 +19,11 @@ from src.abstract import BaseFactory
 
 class QueueType(Enum):
     IN_MEMORY = "in_memory"
+    IN_MEMORY_PRIORITY = "in_memory_priority"
     REDIS = "redis"
+    REDIS_STREAM = "redis_stream"
+    REDIS_PRIORITY = "redis_priority"
+    LOCAL_DURABLE = "local_durable"
 
 
 class TaskType(Enum):
@@ -23,11 +35,37 @@ class QueueFactory(BaseFactory[QueueType, Queue]):
     pass
 
 
+class DelayedQueueType(Enum):
+    IN_MEMORY = "in_memory"
+    REDIS = "redis"
+
+
+class DelayedQueueFactory(BaseFactory[DelayedQueueType, DelayedQueue]):
+    pass
+
+
+class DeadLetterQueueType(Enum):
+    IN_MEMORY = "in_memory"
+    REDIS = "redis"
+
+
+class DeadLetterQueueFactory(BaseFactory[DeadLetterQueueType, DeadLetterQueue]):
+    pass
+
+
 class TaskFactory(BaseFactory[TaskType, Command]):
     pass
 
 
 QueueFactory.register(QueueType.IN_MEMORY, InMemoryQueue)
+QueueFactory.register(QueueType.IN_MEMORY_PRIORITY, InMemoryPriorityQueue)
 QueueFactory.register(QueueType.REDIS, RedisAsyncQueue)
+QueueFactory.register(QueueType.REDIS_STREAM, RedisStreamQueue)
+QueueFactory.register(QueueType.REDIS_PRIORITY, RedisPriorityQueue)
+QueueFactory.register(QueueType.LOCAL_DURABLE, LocalDurableQueue)
+DelayedQueueFactory.register(DelayedQueueType.IN_MEMORY, InMemoryDelayedQueue)
+DelayedQueueFactory.register(DelayedQueueType.REDIS, RedisDelayedQueue)
+DeadLetterQueueFactory.register(DeadLetterQueueType.IN_MEMORY, InMemoryDeadLetterQueue)
+DeadLetterQueueFactory.register(DeadLetterQueueType.REDIS, RedisDeadLetterQueue)
 TaskFactory.register(TaskType.VIDEO, TaskVideo)
 TaskFactory.register(TaskType.LINK, TaskLink)
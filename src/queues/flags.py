@@ -0,0 +1,102 @@
+import asyncio
+import logging
+from typing import Optional
+
+from src.queues.connection import get_redis
+
+logger = logging.getLogger(__name__)
+
+# Как часто проверять соединение подписки, если изменений нет, сек
+FLAG_PING_INTERVAL = 30.0
+
+# Пауза перед переподпиской после ошибки, сек
+FLAG_RESUBSCRIBE_DELAY = 1.0
+
+
+class RedisCachedFlag:
+    """
+    Булев флаг в Redis с кешем в памяти процесса
+
+    Значение читается из кеша без обращения к Redis. Кеш обновляется
+    сообщениями канала {key}:changed, которые публикует set() в любом
+    процессе, поэтому экземпляры бота видят изменение через миллисекунды.
+    Пока подписка не установлена или разорвана, чтение идет напрямую в Redis.
+    """
+
+    def __init__(self, key: str, redis_url: str):
+        """
+        Args:
+            key: Ключ флага
+            redis_url: Адрес Redis
+        """
+        self.key = key
+        self.channel = f"{key}:changed"
+        self.redis_url = redis_url
+        self._value: Optional[bool] = None
+        self._listener: Optional[asyncio.Task] = None
+
+    async def _read(self) -> bool:
+        value = await get_redis(self.redis_url).get(self.key)
+        return value == b"1"
+
+    async def get(self) -> bool:
+        """
+        Значение флага
+
+        Returns:
+            Значение из кеша, если подписка активна, иначе из Redis
+        """
+        if self._listener is None or self._listener.done():
+            self._listener = asyncio.create_task(self._listen())
+        if self._value is not None:
+            return self._value
+        return await self._read()
+
+    async def set(self, value: bool) -> None:
+        """
+        Установка флага и оповещение всех процессов
+
+        Args:
+            value: Значение флага
+        """
+        data = "1" if value else "0"
+        async with get_redis(self.redis_url).pipeline(transaction=True) as pipe:
+            pipe.set(self.key, data)
+            pipe.publish(self.channel, data)
+            await pipe.execute()
+        if self._value is not None:
+            self._value = value
+
+    async def _listen(self) -> None:
+        """Подписка на изменения флага с переподключением при ошибках"""
+        while True:
+            # Подписка держит соединение постоянно, поэтому берется из пула блокирующих команд
+            pubsub = get_redis(self.redis_url, blocking=True).pubsub(ignore_subscribe_messages=True)
+            try:
+                await pubsub.subscribe(self.channel)
+                # Чтение после подписки: изменение между ними придет сообщением
+                self._value = await self._read()
+                while True:
+                    message = await pubsub.get_message(timeout=FLAG_PING_INTERVAL)
+                    if message is None:
+                        await pubsub.ping()
+                    elif message["type"] == "message":
+                        self._value = message["data"] == b"1"
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Подписка на флаг {self.key} прервана: {e}")
+            finally:
+                self._value = None
+                try:
+                    await pubsub.aclose()
+                except Exception:
+                    pass
+            await asyncio.sleep(FLAG_RESUBSCRIBE_DELAY)
+
+    def close(self) -> None:
+        """Остановка подписки"""
+        if self._listener is not None:
+            self._listener.cancel()
+            self._listener = None
+        self._value = None
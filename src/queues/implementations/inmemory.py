@@ -1,8 +1,11 @@
 import asyncio
 from contextlib import asynccontextmanager
-from typing import Optional, AsyncIterable
+from itertools import islice
+from typing import Optional, AsyncIterable, Iterable, List
 
+from src.queues.codecs import Codec
 from src.queues.interfaces import AsyncQueue, T
+from src.queues.metrics import QueueMetrics, item_age, stamp_enqueued, timed_get, timed_put
 
 
 class InMemoryQueue(AsyncQueue[T]):
@@ -11,21 +14,32 @@ class InMemoryQueue(AsyncQueue[T]):
     Потокобезопасна и предназначена для использования в async/await коде.
     """
 
-    def __init__(self, maxsize: int = 0, name: str = "default"):
+    def __init__(self, maxsize: int = 0, name: str = "default", codec: Optional[Codec] = None):
         """
         Инициализирует очередь.
 
         :param maxsize: Максимальный размер очереди (0 - без ограничений)
         :param name: Имя очереди для идентификации
+        :param codec: Кодек для компактного хранения элементов (None - хранить объекты как есть)
         """
         self._queue = asyncio.Queue(maxsize=maxsize)
         self._name = name
+        self._codec = codec
         self._closed = False
         self._total_processed = 0
         self._total_added = 0
         self._flag = False
         self._flag_lock = asyncio.Lock()
+        self.metrics = QueueMetrics()
 
+    def _encode(self, item: T):
+        item = stamp_enqueued(item)
+        return self._codec.encode(item) if self._codec else item
+
+    def _decode(self, data) -> T:
+        return self._codec.decode(data) if self._codec else data
+
+    @timed_put
     async def put(self, item: T) -> None:
         """
         Добавляет элемент в очередь.
@@ -37,9 +51,10 @@ class InMemoryQueue(AsyncQueue[T]):
         if self._closed:
             raise RuntimeError(f"Queue '{self._name}' is closed")
 
-        await self._queue.put(item)
+        await self._queue.put(self._encode(item))
         self._total_added += 1
 
+    @timed_put
     async def put_nowait(self, item: T) -> None:
         """
         Добавляет элемент в очередь без блокировки.
@@ -51,9 +66,36 @@ class InMemoryQueue(AsyncQueue[T]):
         if self._closed:
             raise RuntimeError(f"Queue '{self._name}' is closed")
 
-        self._queue.put_nowait(item)
+        self._queue.put_nowait(self._encode(item))
         self._total_added += 1
 
+    @timed_put
+    async def put_many(self, items: Iterable[T]) -> int:
+        """
+        Добавляет пакет элементов в очередь.
+        Пока есть место, элементы добавляются без переключения контекста,
+        при заполнении очереди ожидает освобождения места.
+
+        :param items: Элементы для добавления
+        :return: Количество добавленных элементов
+        :raises RuntimeError: Если очередь закрыта
+        """
+        if self._closed:
+            raise RuntimeError(f"Queue '{self._name}' is closed")
+
+        added = 0
+        for item in items:
+            data = self._encode(item)
+            try:
+                self._queue.put_nowait(data)
+            except asyncio.QueueFull:
+                await self._queue.put(data)
+            added += 1
+
+        self._total_added += added
+        return added
+
+    @timed_get
     async def get(self, timeout: Optional[float] = None) -> T:
         """
         Извлекает элемент из очереди.
@@ -73,8 +115,9 @@ class InMemoryQueue(AsyncQueue[T]):
             item = await asyncio.wait_for(self._queue.get(), timeout)
 
         self._total_processed += 1
-        return item
+        return self._decode(item)
 
+    @timed_get
     async def get_nowait(self) -> T:
         """
         Извлекает элемент из очереди без блокировки.
@@ -88,7 +131,93 @@ class InMemoryQueue(AsyncQueue[T]):
 
         item = self._queue.get_nowait()
         self._total_processed += 1
-        return item
+        return self._decode(item)
+
+    @timed_get
+    async def get_many(self, max_items: int) -> List[T]:
+        """
+        Извлекает до max_items элементов без блокировки.
+
+        :param max_items: Максимальное количество элементов
+        :return: Список извлеченных элементов (пустой, если очередь пуста)
+        :raises RuntimeError: Если очередь закрыта и пуста
+        """
+        if self._closed and self._queue.empty():
+            raise RuntimeError(f"Queue '{self._name}' is closed and empty")
+
+        items = []
+        while len(items) < max_items and not self._queue.empty():
+            items.append(self._decode(self._queue.get_nowait()))
+
+        self._total_processed += len(items)
+        return items
+
+    @timed_get
+    async def get_batch(
+        self, max_items: int, max_wait: float = 0.0, timeout: Optional[float] = None
+    ) -> List[T]:
+        """
+        Извлекает пакет до max_items элементов за одно пробуждение.
+        Ожидает первый элемент, затем забирает все доступные и до max_wait секунд
+        дожидается новых, пока пакет не заполнится.
+
+        :param max_items: Максимальное количество элементов
+        :param max_wait: Время дозаполнения пакета после первого элемента (0 - не ждать)
+        :param timeout: Таймаут ожидания первого элемента (None - ждать бесконечно)
+        :return: Список извлеченных элементов (не пустой)
+        :raises asyncio.TimeoutError: Если таймаут истек
+        :raises RuntimeError: Если очередь закрыта и пуста
+        """
+        if self._closed and self._queue.empty():
+            raise RuntimeError(f"Queue '{self._name}' is closed and empty")
+        if max_items <= 0:
+            return []
+
+        queue = self._queue
+        if queue.empty():
+            if timeout is None:
+                batch = [await queue.get()]
+            else:
+                batch = [await asyncio.wait_for(queue.get(), timeout)]
+        else:
+            batch = [queue.get_nowait()]
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + max_wait
+        while len(batch) < max_items:
+            if not queue.empty():
+                batch.append(queue.get_nowait())
+                continue
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+
+        self._total_processed += len(batch)
+        return [self._decode(item) for item in batch]
+
+    async def ack(self, item: T) -> None:
+        """
+        Подтверждает обработку элемента, полученного через get.
+
+        :param item: Обработанный элемент
+        """
+        self._queue.task_done()
+
+    async def nack(self, item: T, requeue: bool = True) -> None:
+        """
+        Отказывается от обработки элемента.
+
+        :param item: Элемент, полученный через get
+        :param requeue: Вернуть элемент в очередь (иначе он отбрасывается)
+        """
+        self._queue.task_done()
+        if requeue:
+            self._queue.put_nowait(self._encode(item))
+            self._total_processed -= 1
 
     async def size(self) -> int:
         """Возвращает текущее количество элементов в очереди."""
@@ -117,16 +246,35 @@ class InMemoryQueue(AsyncQueue[T]):
         """Проверяет, закрыта ли очередь."""
         return self._closed
 
+    async def peek_many(self, limit: int) -> List[T]:
+        """
+        Возвращает до limit элементов в порядке извлечения, не извлекая их.
+
+        :param limit: Максимальное количество элементов
+        """
+        return [self._decode(entry) for entry in islice(self._queue._queue, limit)]
+
+    def _head(self) -> Optional[T]:
+        """Возвращает элемент, который будет извлечен следующим."""
+        entries = self._queue._queue
+        return self._decode(entries[0]) if entries else None
+
     async def get_stats(self) -> dict:
-        """Возвращает статистику по очереди."""
+        """Возвращает статистику по очереди и гистограммы задержек."""
+        head = self._head()
+        oldest_age = item_age(head) if head is not None else None
+        if oldest_age is not None:
+            self.metrics.oldest_age.observe(oldest_age)
         return {
             "name": self._name,
+            "oldest_age": oldest_age,
             "current_size": await self.size(),
             "is_empty": await self.is_empty(),
             "is_closed": self.is_closed(),
             "total_added": self._total_added,
             "total_processed": self._total_processed,
             "pending": self._total_added - self._total_processed,
+            **self.metrics.snapshot(),
         }
 
     def __aiter__(self) -> AsyncIterable[T]:
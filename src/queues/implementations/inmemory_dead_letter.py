@@ -0,0 +1,40 @@
+import time
+from collections import deque
+from typing import List
+
+from src.queues.interfaces import DeadLetterQueue, T
+
+
+class InMemoryDeadLetterQueue(DeadLetterQueue[T]):
+    """
+    Dead-letter очередь в оперативной памяти; записи не переживают рестарт.
+    """
+
+    def __init__(self, name: str = "default", max_size: int = 10000):
+        """
+        :param name: Имя очереди для идентификации
+        :param max_size: Максимальное количество хранимых записей (старые вытесняются)
+        """
+        self._name = name
+        self._entries = deque(maxlen=max_size)
+
+    async def add(self, item: T, error: str) -> None:
+        """Добавляет элемент вместе с текстом последней ошибки."""
+        self._entries.appendleft({"item": item, "error": error, "failed_at": time.time()})
+
+    async def items(self, limit: int) -> List[dict]:
+        """Возвращает последние limit записей, новые первыми."""
+        return [self._entries[i] for i in range(min(limit, len(self._entries)))]
+
+    async def take(self, limit: int) -> List[T]:
+        """Извлекает до limit самых старых элементов."""
+        items = []
+        while self._entries and len(items) < limit:
+            items.append(self._entries.pop()["item"])
+        return items
+
+    async def size(self) -> int:
+        return len(self._entries)
+
+    async def clear(self) -> None:
+        self._entries.clear()
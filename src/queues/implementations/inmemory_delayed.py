@@ -0,0 +1,98 @@
+import asyncio
+import heapq
+import itertools
+import json
+import time
+from typing import Dict, List, Optional, Tuple
+
+from src.queues.interfaces import DelayedQueue, T
+
+
+class InMemoryDelayedQueue(DelayedQueue[T]):
+    """
+    Очередь отложенной доставки в оперативной памяти на основе кучи.
+    Используется, когда Redis недоступен; расписание не переживает рестарт.
+    """
+
+    def __init__(self, name: str = "default"):
+        """
+        :param name: Имя очереди для идентификации
+        """
+        self._name = name
+        self._heap: List[Tuple[float, int, str, T]] = []
+        # Ключ элемента -> порядковый номер актуальной записи в куче.
+        # Отмененные и перепланированные записи удаляются из кучи лениво.
+        self._entries: Dict[str, int] = {}
+        self._seq = itertools.count()
+        self._changed = asyncio.Condition()
+
+    @staticmethod
+    def _key(item: T) -> str:
+        return json.dumps(item, sort_keys=True, default=str)
+
+    async def schedule(self, item: T, due_at: float, replace: bool = True) -> None:
+        """
+        Планирует элемент.
+
+        :param item: Элемент
+        :param due_at: Время доставки (unix timestamp)
+        :param replace: Перезаписать время, если элемент уже запланирован
+        """
+        key = self._key(item)
+        if key in self._entries and not replace:
+            return
+
+        seq = next(self._seq)
+        self._entries[key] = seq
+        heapq.heappush(self._heap, (due_at, seq, key, item))
+        async with self._changed:
+            self._changed.notify_all()
+
+    async def cancel(self, item: T) -> None:
+        """Отменяет запланированный элемент."""
+        self._entries.pop(self._key(item), None)
+
+    def _drop_stale(self) -> None:
+        while self._heap and self._entries.get(self._heap[0][2]) != self._heap[0][1]:
+            heapq.heappop(self._heap)
+
+    async def get(self, timeout: Optional[float] = None) -> T:
+        """
+        Ожидает наступления ближайшего элемента.
+
+        :param timeout: Таймаут в секундах (None - ждать бесконечно)
+        :raises asyncio.QueueEmpty: Если за таймаут ни один элемент не наступил
+        """
+        loop = asyncio.get_running_loop()
+        deadline = None if timeout is None else loop.time() + timeout
+        async with self._changed:
+            while True:
+                self._drop_stale()
+                wait = None
+                if self._heap:
+                    due_at, _, key, item = self._heap[0]
+                    wait = due_at - time.time()
+                    if wait <= 0:
+                        heapq.heappop(self._heap)
+                        del self._entries[key]
+                        return item
+
+                if deadline is not None:
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        raise asyncio.QueueEmpty(f"Queue '{self._name}' has no due items")
+                    wait = remaining if wait is None else min(wait, remaining)
+
+                try:
+                    await asyncio.wait_for(self._changed.wait(), wait)
+                except asyncio.TimeoutError:
+                    pass
+
+    async def size(self) -> int:
+        """Возвращает количество запланированных элементов."""
+        return len(self._entries)
+
+    async def clear(self) -> None:
+        """Удаляет все запланированные элементы."""
+        self._heap.clear()
+        self._entries.clear()
@@ -0,0 +1,58 @@
+import asyncio
+import heapq
+import itertools
+import time
+from typing import List, Optional
+
+from src.queues.codecs import Codec
+from src.queues.implementations.inmemory import InMemoryQueue
+from src.queues.interfaces import T
+from src.queues.models import item_priority
+
+
+class InMemoryPriorityQueue(InMemoryQueue[T]):
+    """
+    Асинхронная очередь с приоритетами в оперативной памяти (куча, O(log n)).
+
+    Порядок - по времени постановки, сдвинутому на priority * aging_interval
+    секунд в прошлое: срочный элемент обгоняет только элементы, поставленные
+    незадолго до него, поэтому обычные элементы не голодают бесконечно.
+    """
+
+    supports_priority = True
+
+    def __init__(
+        self,
+        maxsize: int = 0,
+        name: str = "default",
+        codec: Optional[Codec] = None,
+        aging_interval: float = 24 * 3600,
+    ):
+        """
+        Инициализирует очередь.
+
+        :param maxsize: Максимальный размер очереди (0 - без ограничений)
+        :param name: Имя очереди для идентификации
+        :param codec: Кодек для компактного хранения элементов
+        :param aging_interval: На сколько секунд один уровень приоритета продвигает элемент
+        """
+        super().__init__(maxsize=maxsize, name=name, codec=codec)
+        self._queue = asyncio.PriorityQueue(maxsize=maxsize)
+        self._aging_interval = aging_interval
+        # Порядковый номер сохраняет FIFO при равном счете
+        self._seq = itertools.count()
+
+    def _encode(self, item: T):
+        score = time.monotonic() - item_priority(item) * self._aging_interval
+        return score, next(self._seq), super()._encode(item)
+
+    def _decode(self, data) -> T:
+        return super()._decode(data[2])
+
+    async def peek_many(self, limit: int) -> List[T]:
+        """
+        Возвращает до limit элементов в порядке извлечения, не извлекая их.
+
+        :param limit: Максимальное количество элементов
+        """
+        return [self._decode(entry) for entry in heapq.nsmallest(limit, self._queue._queue)]
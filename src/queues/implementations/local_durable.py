@@ -0,0 +1,547 @@
+import asyncio
+import logging
+import queue as thread_queue
+import sqlite3
+import threading
+import time
+from contextlib import asynccontextmanager
+from typing import TypeVar, Optional, Iterable, List, Dict, Tuple, AsyncIterator, Callable, Any
+
+from src.queues.codecs import Codec, JsonCodec
+from src.queues.interfaces import AsyncQueue
+from src.queues.metrics import QueueMetrics, item_age, stamp_enqueued, timed_get, timed_put
+
+T = TypeVar('T')
+
+logger = logging.getLogger(__name__)
+
+# Максимальное количество операций, фиксируемых одной транзакцией
+GROUP_COMMIT_SIZE = 512
+
+# Максимальное время одного ожидания новых элементов, сек: элементы,
+# добавленные другими процессами, и истекшие аренды замечаются с этой задержкой
+POLL_INTERVAL = 1.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS items (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    data BLOB NOT NULL,
+    leased_until REAL NOT NULL DEFAULT 0  -- 0 - элемент не выдан
+);
+CREATE INDEX IF NOT EXISTS items_ready ON items (leased_until, id);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+# Выбор готовых элементов в порядке добавления (по индексу items_ready)
+_READY = "SELECT id FROM items WHERE leased_until = 0 ORDER BY id LIMIT ?"
+
+
+class LocalDurableQueue(AsyncQueue[T]):
+    """
+    Персистентная очередь на SQLite в режиме WAL для установок без Redis
+
+    Все операции выполняет один поток-писатель: накопившиеся к моменту
+    фиксации операции выполняются одной транзакцией (group commit), поэтому
+    стоимость fsync делится между ними. Извлечение атомарно (UPDATE/DELETE
+    ... RETURNING), так что файл очереди могут разделять несколько процессов.
+
+    В надежном режиме (reliable=True) полученный элемент остается в базе с
+    арендой на visibility_timeout секунд и удаляется только при ack; если
+    процесс упал, элемент снова выдается после истечения аренды.
+    """
+
+    def __init__(
+            self,
+            path: str = "queue.sqlite3",
+            queue_name: str = "default",
+            codec: Optional[Codec] = None,
+            reliable: bool = False,
+            visibility_timeout: float = 600.0,
+    ):
+        """
+        Args:
+            path: Путь к файлу базы очереди
+            queue_name: Имя очереди для идентификации
+            codec: Кодек элементов (по умолчанию JSON)
+            reliable: Удалять элемент только после ack
+            visibility_timeout: Время аренды полученного элемента в надежном режиме
+        """
+        self.path = path
+        self.queue_name = queue_name
+        self.codec = codec or JsonCodec()
+        self.reliable = reliable
+        self.visibility_timeout = visibility_timeout
+
+        # id(item) -> (item, id строки)
+        self._leases: Dict[int, Tuple[T, int]] = {}
+        self._closed = False
+        self._not_empty: Optional[asyncio.Event] = None
+        self.metrics = QueueMetrics()
+
+        self._requests: thread_queue.Queue = thread_queue.Queue()
+        self._connection = self._connect()
+        self._writer = threading.Thread(
+            target=self._writer_loop, name=f"queue-writer-{queue_name}", daemon=True
+        )
+        self._writer.start()
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+        connection.execute("PRAGMA journal_mode=WAL")
+        # В WAL режиме NORMAL не теряет целостность, а fsync выполняется только при checkpoint
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.execute("PRAGMA busy_timeout=5000")
+        connection.executescript(_SCHEMA)
+        return connection
+
+    def _writer_loop(self) -> None:
+        """Поток-писатель: выполняет накопившиеся операции одной транзакцией"""
+        while True:
+            request = self._requests.get()
+            if request is None:
+                break
+            batch = [request]
+            while len(batch) < GROUP_COMMIT_SIZE:
+                try:
+                    request = self._requests.get_nowait()
+                except thread_queue.Empty:
+                    break
+                if request is None:
+                    self._requests.put(None)
+                    break
+                batch.append(request)
+            self._execute(batch)
+
+    def _execute(self, batch: List[tuple]) -> None:
+        """Выполняет операции одной транзакцией и передает результаты ожидающим"""
+        results = []
+        try:
+            self._connection.execute("BEGIN IMMEDIATE")
+            for operation, args, future, undo in batch:
+                # Ошибка одной операции откатывает только ее
+                self._connection.execute("SAVEPOINT operation")
+                try:
+                    results.append((future, undo, operation(*args), None))
+                    self._connection.execute("RELEASE operation")
+                except Exception as e:
+                    self._connection.execute("ROLLBACK TO operation")
+                    self._connection.execute("RELEASE operation")
+                    results.append((future, undo, None, e))
+            self._connection.execute("COMMIT")
+        except Exception as e:
+            if self._connection.in_transaction:
+                self._connection.execute("ROLLBACK")
+            results = [(future, undo, None, e) for _, _, future, undo in batch]
+
+        for future, undo, result, error in results:
+            # У операций отката нет ожидающего
+            if future is not None:
+                future.get_loop().call_soon_threadsafe(self._resolve, future, undo, result, error)
+
+    def _finish(self) -> None:
+        """Выполняет операции, добавленные после остановки потока-писателя, и закрывает базу"""
+        batch = []
+        while True:
+            try:
+                request = self._requests.get_nowait()
+            except thread_queue.Empty:
+                break
+            if request is not None:
+                batch.append(request)
+        if batch:
+            self._execute(batch)
+        self._connection.close()
+
+    def _resolve(
+            self,
+            future: asyncio.Future,
+            undo: Optional[Callable[[Any], None]],
+            result: Any,
+            error: Optional[Exception],
+    ) -> None:
+        if future.done():
+            # Ожидающий отменен, а операция уже зафиксирована: ее результат
+            # (например, извлеченные строки) возвращается в очередь
+            if error is None and undo is not None:
+                self._requests.put((undo, (result,), None, None))
+                self._event().set()
+            return
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    async def _submit(
+            self,
+            operation: Callable[..., Any],
+            *args: Any,
+            undo: Optional[Callable[[Any], None]] = None,
+    ) -> Any:
+        """
+        Выполнение операции в потоке-писателе в составе ближайшей транзакции
+
+        Args:
+            operation: Операция потока-писателя
+            args: Аргументы операции
+            undo: Откат результата операции, если ожидающий отменен до его получения
+        """
+        if self._closed:
+            raise RuntimeError(f"Queue {self.queue_name} is closed")
+        future = asyncio.get_running_loop().create_future()
+        self._requests.put((operation, args, future, undo))
+        return await future
+
+    def _event(self) -> asyncio.Event:
+        if self._not_empty is None:
+            self._not_empty = asyncio.Event()
+        return self._not_empty
+
+    # Операции потока-писателя
+
+    def _insert(self, rows: List[Tuple[bytes]]) -> int:
+        self._connection.executemany("INSERT INTO items (data) VALUES (?)", rows)
+        return len(rows)
+
+    def _pop(self, count: int) -> List[Tuple[int, bytes]]:
+        now = time.time()
+        # Элементы с истекшей арендой возвращаются на свое место в очереди
+        self._connection.execute(
+            "UPDATE items SET leased_until = 0 WHERE leased_until > 0 AND leased_until < ?", (now,)
+        )
+        if self.reliable:
+            rows = self._connection.execute(
+                f"UPDATE items SET leased_until = ? WHERE id IN ({_READY}) RETURNING id, data",
+                (now + self.visibility_timeout, count),
+            ).fetchall()
+        else:
+            rows = self._connection.execute(
+                f"DELETE FROM items WHERE id IN ({_READY}) RETURNING id, data", (count,)
+            ).fetchall()
+        # RETURNING не гарантирует порядок строк
+        rows.sort()
+        return rows
+
+    def _restore(self, rows: List[Tuple[int, bytes]]) -> None:
+        """Возвращает строки, извлеченные для отмененного получения, на их место в очереди"""
+        if self.reliable:
+            self._connection.executemany(
+                "UPDATE items SET leased_until = 0 WHERE id = ?", [(row_id,) for row_id, _ in rows]
+            )
+        else:
+            self._connection.executemany("INSERT INTO items (id, data) VALUES (?, ?)", rows)
+
+    def _delete(self, row_id: int) -> None:
+        self._connection.execute("DELETE FROM items WHERE id = ?", (row_id,))
+
+    def _release_lease(self, row_id: int) -> None:
+        self._connection.execute("UPDATE items SET leased_until = 0 WHERE id = ?", (row_id,))
+
+    def _count_ready(self) -> int:
+        return self._connection.execute(
+            "SELECT COUNT(*) FROM items WHERE leased_until < ?",
+            (time.time(),),
+        ).fetchone()[0]
+
+    def _peek(self) -> Optional[bytes]:
+        row = self._connection.execute(
+            "SELECT data FROM items WHERE leased_until = 0 ORDER BY id LIMIT 1"
+        ).fetchone()
+        return row[0] if row else None
+
+    def _peek_many(self, limit: int) -> List[bytes]:
+        rows = self._connection.execute(
+            "SELECT data FROM items WHERE leased_until = 0 ORDER BY id LIMIT ?", (limit,)
+        ).fetchall()
+        return [row[0] for row in rows]
+
+    def _clear(self) -> None:
+        self._connection.execute("DELETE FROM items")
+
+    def _set_meta(self, key: str, value: str) -> None:
+        self._connection.execute(
+            "INSERT INTO meta (key, value) VALUES (?, ?) "
+            "ON CONFLICT (key) DO UPDATE SET value = excluded.value",
+            (key, value),
+        )
+
+    def _get_meta(self, key: str) -> Optional[str]:
+        row = self._connection.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    # Интерфейс очереди
+
+    @timed_put
+    async def put(self, item: T) -> None:
+        """
+        Добавление элемента в очередь
+
+        Args:
+            item: Элемент для добавления
+        """
+        await self.put_many([item])
+
+    @timed_put
+    async def put_nowait(self, item: T) -> None:
+        """
+        Добавление элемента в очередь (размер очереди не ограничен)
+
+        Args:
+            item: Элемент для добавления
+        """
+        await self.put_many([item])
+
+    @timed_put
+    async def put_many(self, items: Iterable[T]) -> int:
+        """
+        Пакетное добавление элементов одной транзакцией
+
+        Args:
+            items: Элементы для добавления
+
+        Returns:
+            Количество добавленных элементов
+        """
+        rows = [(self.codec.encode(stamp_enqueued(item)),) for item in items]
+        if not rows:
+            return 0
+        added = await self._submit(self._insert, rows)
+        self._event().set()
+        return added
+
+    def _accept(self, rows: List[Tuple[int, bytes]]) -> List[T]:
+        items = []
+        for row_id, data in rows:
+            item = self.codec.decode(data)
+            if self.reliable:
+                self._leases[id(item)] = (item, row_id)
+            items.append(item)
+        return items
+
+    @timed_get
+    async def get_many(self, max_items: int) -> List[T]:
+        """
+        Пакетное получение до max_items элементов без ожидания
+
+        Args:
+            max_items: Максимальное количество элементов
+
+        Returns:
+            Список элементов (пустой, если очередь пуста)
+        """
+        if max_items <= 0:
+            return []
+        return self._accept(await self._submit(self._pop, max_items, undo=self._restore))
+
+    @timed_get
+    async def get_nowait(self) -> T:
+        """
+        Получение элемента без ожидания
+
+        Raises:
+            asyncio.QueueEmpty: Если очередь пуста
+        """
+        items = await self.get_many(1)
+        if not items:
+            raise asyncio.QueueEmpty(f"Queue {self.queue_name} is empty")
+        return items[0]
+
+    @timed_get
+    async def get(self, timeout: Optional[float] = None) -> T:
+        """
+        Получение элемента с ожиданием
+
+        Args:
+            timeout: Таймаут в секундах (None - ждать бесконечно)
+
+        Raises:
+            asyncio.QueueEmpty: Если очередь пуста и таймаут истек
+        """
+        loop = asyncio.get_running_loop()
+        deadline = None if timeout is None else loop.time() + timeout
+        not_empty = self._event()
+        while True:
+            not_empty.clear()
+            items = await self.get_many(1)
+            if items:
+                return items[0]
+
+            wait = POLL_INTERVAL
+            if deadline is not None:
+                wait = min(wait, deadline - loop.time())
+                if wait <= 0:
+                    raise asyncio.QueueEmpty(f"Queue {self.queue_name} is empty")
+            try:
+                await asyncio.wait_for(not_empty.wait(), wait)
+            except asyncio.TimeoutError:
+                pass
+
+    def _release(self, item: T) -> Optional[int]:
+        lease = self._leases.pop(id(item), None)
+        if lease is None or lease[0] is not item:
+            logger.warning(f"Элемент не был получен из очереди {self.queue_name}: {item}")
+            return None
+        return lease[1]
+
+    async def ack(self, item: T) -> None:
+        """
+        Подтверждение обработки; в надежном режиме элемент удаляется из базы
+
+        Args:
+            item: Элемент, полученный через get/get_nowait/get_many
+        """
+        if not self.reliable:
+            return
+        row_id = self._release(item)
+        if row_id is not None:
+            await self._submit(self._delete, row_id)
+
+    async def nack(self, item: T, requeue: bool = True) -> None:
+        """
+        Отказ от обработки элемента
+
+        Args:
+            item: Элемент, полученный через get/get_nowait/get_many
+            requeue: Вернуть элемент в очередь (иначе он отбрасывается)
+        """
+        if not self.reliable:
+            if requeue:
+                await self.put(item)
+            return
+
+        row_id = self._release(item)
+        if row_id is None:
+            return
+        if requeue:
+            # Элемент сохраняет свой id и выдается раньше добавленных позже
+            await self._submit(self._release_lease, row_id)
+            self._event().set()
+        else:
+            await self._submit(self._delete, row_id)
+
+    async def size(self) -> int:
+        """
+        Получение размера очереди
+
+        Returns:
+            Количество элементов, доступных для получения
+        """
+        return await self._submit(self._count_ready)
+
+    async def is_empty(self) -> bool:
+        """
+        Проверка пустоты очереди
+
+        Returns:
+            True если очередь пуста
+        """
+        return await self.size() == 0
+
+    async def peek(self) -> Optional[T]:
+        """
+        Просмотр следующего элемента без его получения
+
+        Returns:
+            Элемент или None если очередь пуста
+        """
+        data = await self._submit(self._peek)
+        return None if data is None else self.codec.decode(data)
+
+    async def peek_many(self, limit: int) -> List[T]:
+        """
+        Просмотр до limit элементов в порядке выдачи без их получения
+
+        Args:
+            limit: Максимальное количество элементов
+
+        Returns:
+            Элементы, начиная со следующего к выдаче
+        """
+        if limit <= 0:
+            return []
+        rows = await self._submit(self._peek_many, limit)
+        return [self.codec.decode(data) for data in rows]
+
+    async def get_stats(self) -> dict:
+        """
+        Статистика очереди: размер, возраст головы очереди и гистограммы задержек
+
+        Returns:
+            Словарь со статистикой (длительности в секундах)
+        """
+        head = await self.peek()
+        oldest_age = item_age(head) if head is not None else None
+        if oldest_age is not None:
+            self.metrics.oldest_age.observe(oldest_age)
+        return {
+            "name": self.queue_name,
+            "current_size": await self.size(),
+            "oldest_age": oldest_age,
+            **self.metrics.snapshot(),
+        }
+
+    async def clear(self) -> None:
+        """Удаление всех элементов очереди"""
+        await self._submit(self._clear)
+        self._leases.clear()
+
+    async def close(self) -> None:
+        """Остановка потока-писателя и закрытие базы; записанные элементы сохраняются"""
+        if self._closed:
+            return
+        self._closed = True
+        self._requests.put(None)
+        await asyncio.to_thread(self._writer.join)
+        # Откаты получений, отмененных во время остановки, попадают в очередь
+        # запросов уже после завершения потока-писателя
+        await asyncio.to_thread(self._finish)
+
+    def __aiter__(self) -> AsyncIterator[T]:
+        return self
+
+    async def __anext__(self) -> T:
+        """
+        Получение следующего элемента; итерация завершается после close()
+        """
+        if self._closed:
+            raise StopAsyncIteration
+        try:
+            return await self.get()
+        except RuntimeError:
+            raise StopAsyncIteration
+
+    async def set_flag(self, value: bool) -> None:
+        """
+        Установка флага
+
+        Args:
+            value: Значение флага
+        """
+        await self._submit(self._set_meta, "flag", "1" if value else "0")
+
+    async def get_flag(self) -> bool:
+        """
+        Получение значения флага
+
+        Returns:
+            Значение флага
+        """
+        return await self._submit(self._get_meta, "flag") == "1"
+
+    @asynccontextmanager
+    async def flag_context(self, value: bool):
+        """
+        Контекстный менеджер для временного изменения флага
+
+        Args:
+            value: Временное значение флага
+        """
+        original_value = await self.get_flag()
+        await self.set_flag(value)
+
+        try:
+            yield
+        finally:
+            await self.set_flag(original_value)
@@ -1,19 +1,156 @@
 import asyncio
-import json
-from typing import TypeVar, Optional, AsyncIterator
+import logging
+import os
+import socket
+import time
+from typing import TypeVar, Optional, AsyncIterator, Dict, Tuple, Iterable, List, Set
 import redis.asyncio as redis
 from contextlib import asynccontextmanager
 
+from src.queues.codecs import Codec, JsonCodec
+from src.queues.connection import get_redis
+from src.queues.dedup import DedupMode, BloomFilterParams, dedup_key
+from src.queues.flags import RedisCachedFlag
 from src.queues.interfaces import AsyncQueue
+from src.queues.metrics import QueueMetrics, item_age, stamp_enqueued, timed_get, timed_put
+from src.queues.models import item_retries
 
 T = TypeVar('T')
 
+logger = logging.getLogger(__name__)
+
+# Выдача аренды элементу, только что перемещенному в processing-список.
+# Время берется с сервера Redis, чтобы часы разных хостов не влияли на дедлайны.
+_LEASE_SCRIPT = """
+local now = redis.call('TIME')
+local deadline = tonumber(now[1]) + tonumber(ARGV[2])
+redis.call('ZADD', KEYS[1], deadline, ARGV[1])
+redis.call('SADD', KEYS[2], ARGV[3])
+return deadline
+"""
+
+# Пакетное перемещение до ARGV[1] элементов в processing-список с выдачей аренды
+_MOVE_MANY_SCRIPT = """
+local now = tonumber(redis.call('TIME')[1])
+local items = {}
+for i = 1, tonumber(ARGV[1]) do
+    local item = redis.call('LMOVE', KEYS[1], KEYS[2], 'RIGHT', 'LEFT')
+    if not item then
+        break
+    end
+    redis.call('ZADD', KEYS[3], now + tonumber(ARGV[2]), item)
+    items[#items + 1] = item
+end
+if #items > 0 then
+    redis.call('SADD', KEYS[4], ARGV[3])
+end
+return items
+"""
+
+# Возврат элемента из processing-списка в голову очереди (nack)
+_REQUEUE_SCRIPT = """
+local removed = redis.call('LREM', KEYS[2], 1, ARGV[1])
+redis.call('ZREM', KEYS[3], ARGV[1])
+if removed > 0 and ARGV[2] == '1' then
+    redis.call('RPUSH', KEYS[1], ARGV[1])
+end
+return removed
+"""
+
+# Возврат в очередь всех элементов консьюмера с истекшей арендой.
+# Элементы без аренды (консьюмер упал между BLMOVE и выдачей аренды)
+# получают ее здесь и будут возвращены на одном из следующих проходов.
+_REAP_SCRIPT = """
+local now = tonumber(redis.call('TIME')[1])
+local items = redis.call('LRANGE', KEYS[2], 0, -1)
+for _, item in ipairs(items) do
+    redis.call('ZADD', KEYS[3], 'NX', now + tonumber(ARGV[1]), item)
+end
+local expired = redis.call('ZRANGEBYSCORE', KEYS[3], '-inf', now)
+local requeued = 0
+for _, item in ipairs(expired) do
+    if redis.call('LREM', KEYS[2], 1, item) > 0 then
+        redis.call('RPUSH', KEYS[1], item)
+        requeued = requeued + 1
+    end
+    redis.call('ZREM', KEYS[3], item)
+end
+return requeued
+"""
+
+
+# Добавление только ранее не встречавшихся элементов (история ключей в ZSET).
+# ARGV: окно истории в секундах (0 - бесконечно), затем пары (ключ, элемент)
+_DEDUP_WINDOW_SCRIPT = """
+local now = tonumber(redis.call('TIME')[1])
+local window = tonumber(ARGV[1])
+if window > 0 then
+    redis.call('ZREMRANGEBYSCORE', KEYS[2], '-inf', now - window)
+end
+local added = 0
+for i = 2, #ARGV, 2 do
+    if redis.call('ZADD', KEYS[2], 'NX', now, ARGV[i]) == 1 then
+        redis.call('LPUSH', KEYS[1], ARGV[i + 1])
+        added = added + 1
+    end
+end
+return added
+"""
+
+# То же на фильтре Блума: KEYS[2] - фильтр текущего окна, KEYS[3] - предыдущего.
+# ARGV: число хешей k, TTL фильтра, затем для каждого элемента: элемент и k номеров битов
+_DEDUP_BLOOM_SCRIPT = """
+local k = tonumber(ARGV[1])
+local ttl = tonumber(ARGV[2])
+local added = 0
+local i = 3
+while i <= #ARGV do
+    local in_current = true
+    local in_previous = true
+    for j = 1, k do
+        if in_current and redis.call('GETBIT', KEYS[2], ARGV[i + j]) == 0 then
+            in_current = false
+        end
+        if in_previous and redis.call('GETBIT', KEYS[3], ARGV[i + j]) == 0 then
+            in_previous = false
+        end
+    end
+    if not in_current and not in_previous then
+        for j = 1, k do
+            redis.call('SETBIT', KEYS[2], ARGV[i + j], 1)
+        end
+        redis.call('LPUSH', KEYS[1], ARGV[i])
+        added = added + 1
+    end
+    i = i + k + 1
+end
+if ttl > 0 and added > 0 then
+    redis.call('EXPIRE', KEYS[2], ttl)
+end
+return added
+"""
+
+# Максимальное количество значений в одной команде LPUSH
+PUSH_CHUNK_SIZE = 1000
+
 
 class RedisAsyncQueue(AsyncQueue[T]):
     """
     Асинхронная очередь на основе Redis
+
+    При включенной дедупликации (dedup) элемент добавляется только если его
+    ключ (канонический id видео) не встречался за dedup_window секунд; проверка
+    и добавление выполняются атомарно одним Lua-скриптом.
+
+    В надежном режиме (reliable=True) элемент при получении атомарно
+    перемещается (BLMOVE) в processing-список консьюмера и остается там
+    до вызова ack/nack. Если консьюмер не подтвердил элемент за
+    visibility_timeout секунд (например, упал посреди скачивания),
+    фоновый reaper возвращает элемент в очередь.
     """
 
+    REAP_SCRIPT = _REAP_SCRIPT
+
     async def put(self, item: T) -> None:
         pass
 
@@ -21,33 +158,78 @@ class RedisAsyncQueue(AsyncQueue[T]):
             self,
             queue_name: str,
             redis_url: str = "redis://localhost:6379",
-            serializer: callable = json.dumps,
-            deserializer: callable = json.loads,
-            flag_key_suffix: str = "_flag"
+            codec: Optional[Codec] = None,
+            flag_key_suffix: str = "_flag",
+            reliable: bool = False,
+            consumer_id: Optional[str] = None,
+            visibility_timeout: float = 600.0,
+            reaper_interval: float = 30.0,
+            dedup: DedupMode = DedupMode.NONE,
+            dedup_window: float = 7 * 24 * 3600,
+            bloom_capacity: int = 1_000_000,
+            bloom_error_rate: float = 0.001,
     ):
         self.queue_name = queue_name
         self.redis_url = redis_url
-        self.serializer = serializer
-        self.deserializer = deserializer
+        self.codec = codec or JsonCodec()
+        self.serializer = self._serialize
+        self.deserializer = self.codec.decode
         self.flag_key = f"{queue_name}{flag_key_suffix}"
+        self._flag = RedisCachedFlag(self.flag_key, redis_url)
+
+        self.reliable = reliable
+        self.consumer_id = consumer_id or f"{socket.gethostname()}:{os.getpid()}"
+        self.visibility_timeout = visibility_timeout
+        self.reaper_interval = reaper_interval
+        self.consumers_key = f"{queue_name}:consumers"
+        self.processing_key = self._processing_key(self.consumer_id)
+        self.leases_key = self._leases_key(self.consumer_id)
+
+        self.dedup = dedup
+        self.dedup_window = dedup_window
+        self.seen_key = f"{queue_name}:seen"
+        self.bloom = BloomFilterParams(bloom_capacity, bloom_error_rate) if dedup == DedupMode.BLOOM else None
 
         self._redis: Optional[redis.Redis] = None
+        self._blocking_redis: Optional[redis.Redis] = None
         self._closed = False
+        # id(item) -> (item, сериализованное значение) для элементов в обработке
+        self._leases: Dict[int, Tuple[T, bytes]] = {}
+        self._reaper_task: Optional[asyncio.Task] = None
+        # Блокирующие чтения итераторов, прерываемые при close()
+        self._iterator_waiters: Set[asyncio.Future] = set()
+        self.metrics = QueueMetrics()
+
+    def _serialize(self, item: T) -> bytes:
+        """Сериализация элемента с отметкой времени постановки"""
+        return self.codec.encode(stamp_enqueued(item))
 
-    async def _ensure_connection(self) -> redis.Redis:
-        """Обеспечивает подключение к Redis"""
+    def _processing_key(self, consumer_id: str) -> str:
+        return f"{self.queue_name}:processing:{consumer_id}"
+
+    def _leases_key(self, consumer_id: str) -> str:
+        return f"{self._processing_key(consumer_id)}:leases"
+
+    async def _ensure_connection(self, blocking: bool = False) -> redis.Redis:
+        """
+        Возвращает клиент общего для процесса пула соединений
+
+        Args:
+            blocking: Клиент для блокирующих команд (отдельный пул без таймаута сокета)
+        """
         if self._closed:
             raise RuntimeError("Queue is closed")
 
-        if self._redis is None:
-            self._redis = redis.from_url(
-                self.redis_url,
-                encoding="utf-8",
-                decode_responses=True
-            )
+        if blocking:
+            if self._blocking_redis is None:
+                self._blocking_redis = get_redis(self.redis_url, blocking=True)
+            return self._blocking_redis
 
+        if self._redis is None:
+            self._redis = get_redis(self.redis_url)
         return self._redis
 
+    @timed_put
     async def put(self, item: T, timeout: Optional[float] = None) -> None:
         """
         Добавление элемента в очередь с возможностью таймаута
@@ -70,6 +252,7 @@ class RedisAsyncQueue(AsyncQueue[T]):
             # Без таймаута - обычное добавление
             await self.put_nowait(item)
 
+    @timed_put
     async def put_nowait(self, item: T) -> None:
         """
         Добавление элемента в очередь без ожидания
@@ -77,10 +260,124 @@ class RedisAsyncQueue(AsyncQueue[T]):
         Args:
             item: Элемент для добавления
         """
+        if self.dedup != DedupMode.NONE:
+            await self.put_many([item])
+            return
+
         redis_client = await self._ensure_connection()
         serialized_item = self.serializer(item)
         await redis_client.lpush(self.queue_name, serialized_item)
 
+    @timed_put
+    async def put_many(self, items: Iterable[T]) -> int:
+        """
+        Пакетное добавление элементов за один round trip
+
+        Args:
+            items: Элементы для добавления
+
+        Returns:
+            Количество добавленных элементов (без отброшенных дубликатов)
+        """
+        if self.dedup == DedupMode.NONE:
+            return await self._push(items)
+
+        # Повторные попытки уже прошли проверку на дубликаты при первой постановке
+        fresh, retried = [], []
+        for item in items:
+            (retried if item_retries(item) else fresh).append(item)
+        return await self._put_unique(fresh) + await self._push(retried)
+
+    async def _push(self, items: Iterable[T]) -> int:
+        """Добавление элементов без проверки на дубликаты"""
+        serialized_items = [self.serializer(item) for item in items]
+        if not serialized_items:
+            return 0
+
+        redis_client = await self._ensure_connection()
+        async with redis_client.pipeline(transaction=False) as pipe:
+            for start in range(0, len(serialized_items), PUSH_CHUNK_SIZE):
+                pipe.lpush(self.queue_name, *serialized_items[start:start + PUSH_CHUNK_SIZE])
+            await pipe.execute()
+
+        return len(serialized_items)
+
+    def _bloom_keys(self) -> Tuple[str, str, int]:
+        """Ключи фильтров текущего и предыдущего окна и TTL фильтра"""
+        if not self.dedup_window:
+            key = f"{self.queue_name}:bloom"
+            return key, key, 0
+        generation = int(time.time() // self.dedup_window)
+        return (
+            f"{self.queue_name}:bloom:{generation}",
+            f"{self.queue_name}:bloom:{generation - 1}",
+            int(self.dedup_window * 2),
+        )
+
+    async def _put_unique(self, items: List[T]) -> int:
+        """Добавление элементов с атомарной проверкой на дубликаты"""
+        if not items:
+            return 0
+
+        redis_client = await self._ensure_connection()
+        async with redis_client.pipeline(transaction=False) as pipe:
+            for start in range(0, len(items), PUSH_CHUNK_SIZE):
+                chunk = items[start:start + PUSH_CHUNK_SIZE]
+                if self.dedup == DedupMode.WINDOW:
+                    args = [self.dedup_window]
+                    for item in chunk:
+                        args += [dedup_key(item), self.serializer(item)]
+                    pipe.eval(_DEDUP_WINDOW_SCRIPT, 2, self.queue_name, self.seen_key, *args)
+                else:
+                    current_key, previous_key, ttl = self._bloom_keys()
+                    args = [self.bloom.hash_count, ttl]
+                    for item in chunk:
+                        args.append(self.serializer(item))
+                        args += self.bloom.offsets(dedup_key(item))
+                    pipe.eval(_DEDUP_BLOOM_SCRIPT, 3, self.queue_name, current_key, previous_key, *args)
+            results = await pipe.execute()
+
+        added = sum(results)
+        if added < len(items):
+            logger.info(f"Отброшено {len(items) - added} дубликатов в очереди {self.queue_name}")
+        return added
+
+    @timed_get
+    async def get_many(self, max_items: int) -> List[T]:
+        """
+        Пакетное получение до max_items элементов без ожидания
+
+        Args:
+            max_items: Максимальное количество элементов
+
+        Returns:
+            Список элементов (пустой, если очередь пуста)
+        """
+        if max_items <= 0:
+            return []
+
+        redis_client = await self._ensure_connection()
+        if self.reliable:
+            serialized_items = await redis_client.eval(
+                _MOVE_MANY_SCRIPT,
+                4,
+                self.queue_name,
+                self.processing_key,
+                self.leases_key,
+                self.consumers_key,
+                max_items,
+                self.visibility_timeout,
+                self.consumer_id,
+            )
+            items = []
+            for serialized_item in serialized_items:
+                items.append(await self._accept(serialized_item, leased=True))
+            return items
+
+        serialized_items = await redis_client.rpop(self.queue_name, max_items)
+        return [self.deserializer(serialized_item) for serialized_item in serialized_items or []]
+
+    @timed_get
     async def get_nowait(self) -> T:
         """
         Получение элемента из очереди без ожидания
@@ -92,19 +389,26 @@ class RedisAsyncQueue(AsyncQueue[T]):
             asyncio.QueueEmpty: Если очередь пуста
         """
         redis_client = await self._ensure_connection()
-        serialized_item = await redis_client.rpop(self.queue_name)
+        if self.reliable:
+            serialized_item = await redis_client.lmove(
+                self.queue_name, self.processing_key, "RIGHT", "LEFT"
+            )
+        else:
+            serialized_item = await redis_client.rpop(self.queue_name)
 
         if serialized_item is None:
             raise asyncio.QueueEmpty(f"Queue {self.queue_name} is empty")
 
-        return self.deserializer(serialized_item)
+        return await self._accept(serialized_item)
 
+    @timed_get
     async def get(self, timeout: Optional[float] = None) -> T:
         """
-        Получение элемента из очереди с возможностью таймаута
+        Получение элемента из очереди с возможностью таймаута.
+        Ожидание происходит на стороне Redis (BRPOP/BLMOVE), без опроса.
 
         Args:
-            timeout: Таймаут в секундах
+            timeout: Таймаут в секундах (None - ждать бесконечно, 0 и меньше - не ждать)
 
         Returns:
             Элемент из очереди
@@ -112,40 +416,174 @@ class RedisAsyncQueue(AsyncQueue[T]):
         Raises:
             asyncio.QueueEmpty: Если очередь пуста и таймаут истек
         """
-        if timeout is None:
-            # Без таймаута - используем обычное получение
+        if timeout is not None and timeout <= 0:
             return await self.get_nowait()
+        redis_client = await self._ensure_connection(blocking=True)
+        # 0 означает бесконечное ожидание на стороне сервера
+        block_timeout = 0 if timeout is None else timeout
 
-        try:
-            # Используем brpop с таймаутом
+        if self.reliable:
+            serialized_item = await redis_client.blmove(
+                self.queue_name, self.processing_key, block_timeout, "RIGHT", "LEFT"
+            )
+        else:
+            # result содержит (key, value)
+            result = await redis_client.brpop(self.queue_name, timeout=block_timeout)
+            serialized_item = result[1] if result is not None else None
+
+        if serialized_item is None:
+            raise asyncio.QueueEmpty(f"Queue {self.queue_name} is empty")
+
+        return await self._accept(serialized_item)
+
+    async def _accept(self, serialized_item: bytes, leased: bool = False) -> T:
+        """
+        Десериализует полученный элемент и, в надежном режиме, запоминает его аренду
+
+        Args:
+            serialized_item: Значение, извлеченное из Redis
+            leased: Аренда уже выдана на стороне Redis (пакетное получение)
+        """
+        item = self.deserializer(serialized_item)
+        if not self.reliable:
+            return item
+
+        if not leased:
             redis_client = await self._ensure_connection()
-            result = await redis_client.brpop(
-                self.queue_name,
-                timeout=timeout
+            await redis_client.eval(
+                _LEASE_SCRIPT,
+                2,
+                self.leases_key,
+                self.consumers_key,
+                serialized_item,
+                self.visibility_timeout,
+                self.consumer_id,
             )
+        self._leases[id(item)] = (item, serialized_item)
+        self._ensure_reaper()
+        return item
+
+    def _release(self, item: T) -> bytes:
+        """Забирает сериализованное значение арендованного элемента"""
+        lease = self._leases.pop(id(item), None)
+        if lease is not None and lease[0] is item:
+            return lease[1]
+        return self.serializer(item)
+
+    async def ack(self, item: T) -> None:
+        """
+        Подтверждение успешной обработки элемента
 
-            if result is None:
-                raise asyncio.QueueEmpty(f"Queue {self.queue_name} is empty")
+        Args:
+            item: Элемент, полученный через get/get_nowait
+        """
+        if not self.reliable:
+            return
 
-            # result содержит (key, value)
-            _, serialized_item = result
-            return self.deserializer(serialized_item)
+        serialized_item = self._release(item)
+        redis_client = await self._ensure_connection()
+        async with redis_client.pipeline(transaction=True) as pipe:
+            pipe.lrem(self.processing_key, 1, serialized_item)
+            pipe.zrem(self.leases_key, serialized_item)
+            await pipe.execute()
+
+    async def nack(self, item: T, requeue: bool = True) -> None:
+        """
+        Отказ от обработки элемента
+
+        Args:
+            item: Элемент, полученный через get/get_nowait
+            requeue: Вернуть элемент в голову очереди (иначе он отбрасывается)
+        """
+        if not self.reliable:
+            if requeue:
+                redis_client = await self._ensure_connection()
+                await redis_client.rpush(self.queue_name, self.serializer(item))
+            return
 
-        except asyncio.TimeoutError:
-            raise asyncio.QueueEmpty(f"Timeout while waiting for item in {self.queue_name}")
+        serialized_item = self._release(item)
+        redis_client = await self._ensure_connection()
+        await redis_client.eval(
+            _REQUEUE_SCRIPT,
+            3,
+            self.queue_name,
+            self.processing_key,
+            self.leases_key,
+            serialized_item,
+            "1" if requeue else "0",
+        )
+
+    def _ensure_reaper(self) -> None:
+        if self._reaper_task is None or self._reaper_task.done():
+            self._reaper_task = asyncio.create_task(self._reaper_loop())
+
+    async def reap(self) -> int:
+        """
+        Возврат в очередь элементов с истекшей арендой у всех консьюмеров
+
+        Returns:
+            Количество возвращенных элементов
+        """
+        redis_client = await self._ensure_connection()
+        requeued = 0
+        for consumer_id in await redis_client.smembers(self.consumers_key):
+            consumer_id = consumer_id.decode()
+            processing_key = self._processing_key(consumer_id)
+            leases_key = self._leases_key(consumer_id)
+            requeued += await redis_client.eval(
+                self.REAP_SCRIPT,
+                3,
+                self.queue_name,
+                processing_key,
+                leases_key,
+                self.visibility_timeout,
+            )
+            # Консьюмер без элементов в обработке снова зарегистрируется при get
+            if consumer_id != self.consumer_id and not await redis_client.exists(
+                processing_key, leases_key
+            ):
+                await redis_client.srem(self.consumers_key, consumer_id)
+        return requeued
+
+    async def _reaper_loop(self) -> None:
+        while not self._closed:
+            try:
+                requeued = await self.reap()
+                if requeued:
+                    logger.warning(
+                        f"Возвращено в очередь {self.queue_name} {requeued} элементов с истекшей арендой"
+                    )
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Ошибка reaper очереди {self.queue_name}: {e}")
+            await asyncio.sleep(self.reaper_interval)
 
     async def clear(self) -> None:
-        """Очистка очереди"""
+        """Очистка очереди вместе с историей дедупликации"""
         redis_client = await self._ensure_connection()
         await redis_client.delete(self.queue_name)
-        await redis_client.delete(self.flag_key)
+        await self._flag.set(False)
+        if self.dedup == DedupMode.WINDOW:
+            await redis_client.delete(self.seen_key)
+        elif self.dedup == DedupMode.BLOOM:
+            current_key, previous_key, _ = self._bloom_keys()
+            await redis_client.delete(current_key, previous_key)
 
     async def close(self) -> None:
-        """Закрытие соединения с Redis"""
+        """
+        Закрытие очереди. Общий пул соединений не закрывается: им пользуются
+        другие очереди процесса (см. close_redis_pools)
+        """
         self._closed = True
-        if self._redis is not None:
-            await self._redis.close()
-            self._redis = None
+        if self._reaper_task is not None:
+            self._reaper_task.cancel()
+            self._reaper_task = None
+        for waiter in list(self._iterator_waiters):
+            waiter.cancel()
+        self._flag.close()
+        self._redis = None
+        self._blocking_redis = None
 
     def __aiter__(self) -> AsyncIterator[T]:
         """
@@ -157,7 +595,11 @@ class RedisAsyncQueue(AsyncQueue[T]):
         return self._QueueIterator(self)
 
     class _QueueIterator:
-        """Внутренний класс итератора для очереди"""
+        """
+        Итератор очереди: каждый шаг - одно блокирующее чтение на отдельном
+        пуле соединений (BRPOP/BLMOVE без таймаута), поэтому новый элемент
+        выдается сразу после добавления, а пустая очередь не опрашивается.
+        """
 
         def __init__(self, queue: 'RedisAsyncQueue'):
             self.queue = queue
@@ -173,41 +615,47 @@ class RedisAsyncQueue(AsyncQueue[T]):
                 Следующий элемент из очереди
 
             Raises:
-                StopAsyncIteration: Когда очередь закрыта или достигнут конец
+                StopAsyncIteration: Когда очередь закрыта
             """
-            try:
-                # Получаем элемент с небольшим таймаутом для возможности прерывания
-                return await self.queue.get(timeout=1.0)
-            except asyncio.QueueEmpty:
-                # Проверяем, не закрыта ли очередь
-                if self.queue._closed:
-                    raise StopAsyncIteration
-                # Продолжаем ждать новые элементы
-                return await self.__anext__()
-            except RuntimeError:
-                # Очередь закрыта
-                raise StopAsyncIteration
+            while not self.queue._closed:
+                waiter = asyncio.ensure_future(self.queue.get())
+                self.queue._iterator_waiters.add(waiter)
+                try:
+                    return await waiter
+                except asyncio.QueueEmpty:
+                    continue
+                except RuntimeError:
+                    # Очередь закрыта
+                    break
+                except asyncio.CancelledError:
+                    # Ожидание прервано вызовом close()
+                    if self.queue._closed and waiter.cancelled():
+                        break
+                    raise
+                finally:
+                    self.queue._iterator_waiters.discard(waiter)
+            raise StopAsyncIteration
 
     async def set_flag(self, value: bool) -> None:
         """
-        Установка флага в Redis
+        Установка флага в Redis с оповещением всех процессов
 
         Args:
             value: Значение флага
         """
-        redis_client = await self._ensure_connection()
-        await redis_client.set(self.flag_key, "1" if value else "0")
+        await self._ensure_connection()
+        await self._flag.set(value)
 
     async def get_flag(self) -> bool:
         """
-        Получение значения флага из Redis
+        Получение значения флага из кеша процесса (без обращения к Redis,
+        пока активна подписка на изменения)
 
         Returns:
             Значение флага
         """
-        redis_client = await self._ensure_connection()
-        value = await redis_client.get(self.flag_key)
-        return value == "1" if value is not None else False
+        await self._ensure_connection()
+        return await self._flag.get()
 
     @asynccontextmanager
     async def flag_context(self, value: bool):
@@ -257,4 +705,39 @@ class RedisAsyncQueue(AsyncQueue[T]):
         if serialized_item is None:
             return None
 
-        return self.deserializer(serialized_item)
\ No newline at end of file
+        return self.deserializer(serialized_item)
+
+    async def peek_many(self, limit: int) -> List[T]:
+        """
+        Просмотр до limit элементов в порядке выдачи без их удаления
+
+        Args:
+            limit: Максимальное количество элементов
+
+        Returns:
+            Элементы, начиная со следующего к выдаче
+        """
+        if limit <= 0:
+            return []
+        redis_client = await self._ensure_connection()
+        # Элементы выдаются с правого конца списка
+        serialized_items = await redis_client.lrange(self.queue_name, -limit, -1)
+        return [self.deserializer(data) for data in reversed(serialized_items)]
+
+    async def get_stats(self) -> dict:
+        """
+        Статистика очереди: размер, возраст головы очереди и гистограммы задержек
+
+        Returns:
+            Словарь со статистикой (длительности в секундах)
+        """
+        head = await self.peek()
+        oldest_age = item_age(head) if head is not None else None
+        if oldest_age is not None:
+            self.metrics.oldest_age.observe(oldest_age)
+        return {
+            "name": self.queue_name,
+            "current_size": await self.size(),
+            "oldest_age": oldest_age,
+            **self.metrics.snapshot(),
+        }
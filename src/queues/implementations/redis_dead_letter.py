@@ -0,0 +1,79 @@
+import time
+from typing import TypeVar, List
+
+import redis.asyncio as redis
+
+from src.queues.codecs import JsonCodec
+from src.queues.connection import get_redis
+from src.queues.interfaces import DeadLetterQueue
+from src.queues.models import VideoTaskRecord
+
+T = TypeVar('T')
+
+
+class RedisDeadLetterQueue(DeadLetterQueue[T]):
+    """
+    Dead-letter очередь на основе списка Redis
+
+    Записи хранятся в JSON вместе с текстом ошибки и временем последней
+    неудачи; новые записи добавляются в голову списка, длина ограничена.
+    """
+
+    def __init__(self, queue_name: str, redis_url: str = "redis://localhost:6379", max_size: int = 10000):
+        """
+        Args:
+            queue_name: Имя очереди (ключ списка)
+            redis_url: Адрес Redis
+            max_size: Максимальное количество хранимых записей (старые вытесняются)
+        """
+        self.queue_name = queue_name
+        self.redis_url = redis_url
+        self.max_size = max_size
+        self.codec = JsonCodec()
+
+    def _client(self) -> redis.Redis:
+        return get_redis(self.redis_url)
+
+    async def add(self, item: T, error: str) -> None:
+        """
+        Добавление элемента в dead-letter очередь
+
+        Args:
+            item: Элемент, исчерпавший повторные попытки
+            error: Текст последней ошибки
+        """
+        entry = {
+            "item": item.to_dict() if isinstance(item, VideoTaskRecord) else item,
+            "error": error,
+            "failed_at": time.time(),
+        }
+        async with self._client().pipeline(transaction=True) as pipe:
+            pipe.lpush(self.queue_name, self.codec.encode(entry))
+            pipe.ltrim(self.queue_name, 0, self.max_size - 1)
+            await pipe.execute()
+
+    async def items(self, limit: int) -> List[dict]:
+        """
+        Просмотр последних записей без удаления
+
+        Returns:
+            Записи {"item", "error", "failed_at"}, новые первыми
+        """
+        entries = await self._client().lrange(self.queue_name, 0, limit - 1)
+        return [self.codec.decode(entry) for entry in entries]
+
+    async def take(self, limit: int) -> List[T]:
+        """
+        Извлечение самых старых элементов
+
+        Returns:
+            Элементы в порядке попадания в dead-letter очередь
+        """
+        entries = await self._client().rpop(self.queue_name, limit)
+        return [self.codec.decode(entry)["item"] for entry in entries or []]
+
+    async def size(self) -> int:
+        return await self._client().llen(self.queue_name)
+
+    async def clear(self) -> None:
+        await self._client().delete(self.queue_name)
@@ -0,0 +1,142 @@
+import asyncio
+from typing import TypeVar, Optional
+
+import redis.asyncio as redis
+
+from src.queues.codecs import Codec, JsonCodec
+from src.queues.connection import get_redis
+from src.queues.interfaces import DelayedQueue
+
+T = TypeVar('T')
+
+# Перенос наступивших элементов из ZSET в список готовых (не более ARGV[1] за вызов).
+# Возвращает количество перенесенных и время до следующего элемента (-1 - пусто)
+_MOVE_DUE_SCRIPT = """
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local due = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', now, 'LIMIT', 0, tonumber(ARGV[1]))
+for _, item in ipairs(due) do
+    redis.call('LPUSH', KEYS[2], item)
+    redis.call('ZREM', KEYS[1], item)
+end
+local head = redis.call('ZRANGE', KEYS[1], 0, 0, 'WITHSCORES')
+local wait = -1
+if head[2] then
+    wait = tonumber(head[2]) - now
+end
+return {#due, tostring(wait)}
+"""
+
+
+class RedisDelayedQueue(DelayedQueue[T]):
+    """
+    Очередь отложенной доставки на основе Redis
+
+    Элементы хранятся в ZSET со счетом, равным времени доставки. Наступившие
+    элементы атомарно переносятся Lua-скриптом в список готовых, откуда их
+    забирает ровно один консьюмер, поэтому расписание переживает рестарт и
+    может обслуживаться несколькими процессами.
+    """
+
+    def __init__(
+            self,
+            queue_name: str,
+            redis_url: str = "redis://localhost:6379",
+            codec: Optional[Codec] = None,
+            batch_size: int = 100,
+            max_wait: float = 5.0,
+    ):
+        """
+        Args:
+            queue_name: Имя очереди (префикс ключей)
+            redis_url: Адрес Redis
+            codec: Кодек элементов; кодирование должно быть детерминированным
+            batch_size: Сколько наступивших элементов переносить за один вызов
+            max_wait: Максимальное время одного ожидания между проверками расписания
+        """
+        self.queue_name = queue_name
+        self.redis_url = redis_url
+        self.codec = codec or JsonCodec()
+        self.batch_size = batch_size
+        self.max_wait = max_wait
+        self.delayed_key = f"{queue_name}:delayed"
+        self.ready_key = f"{queue_name}:ready"
+        # Сигнал ожидающим консьюмерам о новом запланированном элементе
+        self.wake_key = f"{queue_name}:wake"
+
+    def _client(self, blocking: bool = False) -> redis.Redis:
+        return get_redis(self.redis_url, blocking=blocking)
+
+    async def schedule(self, item: T, due_at: float, replace: bool = True) -> None:
+        """
+        Планирование элемента
+
+        Args:
+            item: Элемент
+            due_at: Время доставки (unix timestamp)
+            replace: Перезаписать время, если элемент уже запланирован
+        """
+        async with self._client().pipeline(transaction=True) as pipe:
+            pipe.zadd(self.delayed_key, {self.codec.encode(item): due_at}, nx=not replace)
+            pipe.lpush(self.wake_key, "1")
+            pipe.ltrim(self.wake_key, 0, 0)
+            await pipe.execute()
+
+    async def cancel(self, item: T) -> None:
+        """Отмена запланированного элемента"""
+        await self._client().zrem(self.delayed_key, self.codec.encode(item))
+
+    async def move_due(self) -> float:
+        """
+        Перенос наступивших элементов в список готовых
+
+        Returns:
+            Секунды до следующего запланированного элемента (-1 если их нет)
+        """
+        _, wait = await self._client().eval(
+            _MOVE_DUE_SCRIPT, 2, self.delayed_key, self.ready_key, self.batch_size
+        )
+        return float(wait)
+
+    async def get(self, timeout: Optional[float] = None) -> T:
+        """
+        Ожидание наступившего элемента
+
+        Args:
+            timeout: Таймаут в секундах (None - ждать бесконечно)
+
+        Raises:
+            asyncio.QueueEmpty: Если за таймаут ни один элемент не наступил
+        """
+        loop = asyncio.get_running_loop()
+        deadline = None if timeout is None else loop.time() + timeout
+        while True:
+            next_due = await self.move_due()
+
+            wait = self.max_wait if next_due < 0 else min(self.max_wait, next_due)
+            if deadline is not None:
+                wait = min(wait, deadline - loop.time())
+            # Меньше BRPOP не ждет; заодно не даем уйти в бесконечное ожидание (0)
+            wait = max(wait, 0.01)
+
+            # Ожидание прерывается готовым элементом или сигналом о новом элементе,
+            # который может наступить раньше текущего ближайшего
+            result = await self._client(blocking=True).brpop(
+                [self.ready_key, self.wake_key], timeout=wait
+            )
+            if result is not None and result[0] == self.ready_key.encode():
+                return self.codec.decode(result[1])
+            if deadline is not None and loop.time() >= deadline:
+                raise asyncio.QueueEmpty(f"Queue {self.queue_name} has no due items")
+
+    async def size(self) -> int:
+        """Количество запланированных и готовых элементов"""
+        async with self._client().pipeline(transaction=False) as pipe:
+            pipe.zcard(self.delayed_key)
+            pipe.llen(self.ready_key)
+            delayed, ready = await pipe.execute()
+        return delayed + ready
+
+    async def clear(self) -> None:
+        """Удаление всех запланированных и готовых элементов"""
+        await self._client().delete(self.delayed_key, self.ready_key, self.wake_key)
@@ -0,0 +1,346 @@
+import asyncio
+from typing import TypeVar, Optional, Iterable, List
+
+from src.queues.codecs import Codec
+from src.queues.dedup import DedupMode, dedup_key
+from src.queues.implementations.redis import RedisAsyncQueue, PUSH_CHUNK_SIZE
+from src.queues.metrics import timed_get, timed_put
+from src.queues.models import item_priority, item_retries
+
+T = TypeVar('T')
+
+# Длина префикса порядкового номера в элементе ZSET (hex)
+SEQ_PREFIX_SIZE = 16
+
+# Максимальное время одного ожидания сигнала о новых элементах, сек
+WAKE_WAIT_SLICE = 5.0
+
+# Добавление элементов в ZSET. Счет = время постановки - приоритет * aging_interval,
+# поэтому срочный элемент обгоняет только элементы, поставленные не раньше чем
+# за priority * aging_interval секунд до него. Префикс с порядковым номером делает
+# элементы уникальными и сохраняет FIFO при равном счете.
+# ARGV: aging_interval, окно дедупликации (-1 - без дедупликации),
+# затем тройки (ключ дедупликации или пустая строка без проверки, приоритет, элемент)
+_PUSH_SCRIPT = """
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local aging = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+if window > 0 then
+    redis.call('ZREMRANGEBYSCORE', KEYS[4], '-inf', now - window)
+end
+local added = 0
+for i = 3, #ARGV, 3 do
+    if window < 0 or ARGV[i] == '' or redis.call('ZADD', KEYS[4], 'NX', now, ARGV[i]) == 1 then
+        local seq = redis.call('INCR', KEYS[2])
+        local score = now - tonumber(ARGV[i + 1]) * aging
+        redis.call('ZADD', KEYS[1], score, string.format('%016x', seq) .. ARGV[i + 2])
+        added = added + 1
+    end
+end
+if added > 0 then
+    redis.call('LPUSH', KEYS[3], '1')
+    redis.call('LTRIM', KEYS[3], 0, 0)
+end
+return added
+"""
+
+# Извлечение до ARGV[1] элементов с наименьшим счетом; в надежном режиме
+# элементы атомарно перемещаются в processing-список с выдачей аренды.
+# Если в очереди что-то осталось, сигнал передается следующему консьюмеру.
+_POP_SCRIPT = """
+local popped = redis.call('ZPOPMIN', KEYS[1], ARGV[1])
+local items = {}
+local now = tonumber(redis.call('TIME')[1])
+for i = 1, #popped, 2 do
+    local member = popped[i]
+    if ARGV[2] == '1' then
+        redis.call('LPUSH', KEYS[3], member)
+        redis.call('ZADD', KEYS[4], now + tonumber(ARGV[3]), member)
+    end
+    items[#items + 1] = member
+end
+if #items > 0 and ARGV[2] == '1' then
+    redis.call('SADD', KEYS[5], ARGV[4])
+end
+if redis.call('ZCARD', KEYS[1]) > 0 then
+    redis.call('LPUSH', KEYS[2], '1')
+    redis.call('LTRIM', KEYS[2], 0, 0)
+end
+return items
+"""
+
+# Возврат элемента в начало очереди (счет 0 меньше любого времени постановки)
+_REQUEUE_SCRIPT = """
+local removed = 1
+if ARGV[2] == '1' then
+    removed = redis.call('LREM', KEYS[2], 1, ARGV[1])
+    redis.call('ZREM', KEYS[3], ARGV[1])
+end
+if removed > 0 and ARGV[3] == '1' then
+    redis.call('ZADD', KEYS[1], 0, ARGV[1])
+    redis.call('LPUSH', KEYS[4], '1')
+    redis.call('LTRIM', KEYS[4], 0, 0)
+end
+return removed
+"""
+
+# Аналог reaper-скрипта списковой очереди, возвращающий элементы в ZSET
+_REAP_SCRIPT = """
+local now = tonumber(redis.call('TIME')[1])
+local items = redis.call('LRANGE', KEYS[2], 0, -1)
+for _, item in ipairs(items) do
+    redis.call('ZADD', KEYS[3], 'NX', now + tonumber(ARGV[1]), item)
+end
+local expired = redis.call('ZRANGEBYSCORE', KEYS[3], '-inf', now)
+local requeued = 0
+for _, item in ipairs(expired) do
+    if redis.call('LREM', KEYS[2], 1, item) > 0 then
+        redis.call('ZADD', KEYS[1], 0, item)
+        requeued = requeued + 1
+    end
+    redis.call('ZREM', KEYS[3], item)
+end
+return requeued
+"""
+
+
+class RedisPriorityQueue(RedisAsyncQueue[T]):
+    """
+    Асинхронная очередь с приоритетами на основе Redis ZSET
+
+    Приоритет берется из элемента (поле priority). Вставка и извлечение -
+    O(log n). Элемент с приоритетом p обгоняет только элементы, поставленные
+    в очередь не раньше чем за p * aging_interval секунд до него, поэтому
+    время ожидания обычного элемента ограничено (нет бесконечного голодания).
+
+    Ожидающие консьюмеры блокируются на списке-сигнале (BRPOP), в который
+    каждое добавление кладет один токен.
+    """
+
+    REAP_SCRIPT = _REAP_SCRIPT
+    supports_priority = True
+
+    def __init__(
+            self,
+            queue_name: str,
+            redis_url: str = "redis://localhost:6379",
+            codec: Optional[Codec] = None,
+            flag_key_suffix: str = "_flag",
+            reliable: bool = False,
+            consumer_id: Optional[str] = None,
+            visibility_timeout: float = 600.0,
+            reaper_interval: float = 30.0,
+            dedup: DedupMode = DedupMode.NONE,
+            dedup_window: float = 7 * 24 * 3600,
+            aging_interval: float = 24 * 3600,
+    ):
+        if dedup == DedupMode.BLOOM:
+            raise ValueError("Bloom filter deduplication is not supported by the priority queue")
+
+        super().__init__(
+            queue_name,
+            redis_url=redis_url,
+            codec=codec,
+            flag_key_suffix=flag_key_suffix,
+            reliable=reliable,
+            consumer_id=consumer_id,
+            visibility_timeout=visibility_timeout,
+            reaper_interval=reaper_interval,
+            dedup=dedup,
+            dedup_window=dedup_window,
+        )
+        self.aging_interval = aging_interval
+        self.zset_key = f"{queue_name}:priority"
+        self.seq_key = f"{queue_name}:priority:seq"
+        self.wake_key = f"{queue_name}:priority:wake"
+
+    @timed_put
+    async def put_nowait(self, item: T) -> None:
+        """
+        Добавление элемента в очередь с учетом его приоритета
+
+        Args:
+            item: Элемент для добавления
+        """
+        await self.put_many([item])
+
+    @timed_put
+    async def put_many(self, items: Iterable[T]) -> int:
+        """
+        Пакетное добавление элементов за один round trip
+
+        Args:
+            items: Элементы для добавления
+
+        Returns:
+            Количество добавленных элементов (без отброшенных дубликатов)
+        """
+        items = list(items)
+        if not items:
+            return 0
+
+        # Без дедупликации ключ не используется
+        window = self.dedup_window if self.dedup == DedupMode.WINDOW else -1
+        redis_client = await self._ensure_connection()
+        async with redis_client.pipeline(transaction=False) as pipe:
+            for start in range(0, len(items), PUSH_CHUNK_SIZE):
+                args = [self.aging_interval, window]
+                for item in items[start:start + PUSH_CHUNK_SIZE]:
+                    # Повторные попытки уже прошли проверку на дубликаты
+                    key = dedup_key(item) if window >= 0 and not item_retries(item) else ""
+                    args += [key, item_priority(item), self.serializer(item)]
+                pipe.eval(
+                    _PUSH_SCRIPT, 4, self.zset_key, self.seq_key, self.wake_key, self.seen_key, *args
+                )
+            results = await pipe.execute()
+
+        return sum(results)
+
+    async def _pop(self, count: int) -> List[T]:
+        redis_client = await self._ensure_connection()
+        members = await redis_client.eval(
+            _POP_SCRIPT,
+            5,
+            self.zset_key,
+            self.wake_key,
+            self.processing_key,
+            self.leases_key,
+            self.consumers_key,
+            count,
+            "1" if self.reliable else "0",
+            self.visibility_timeout,
+            self.consumer_id,
+        )
+        return [await self._accept(member, leased=True) for member in members]
+
+    async def _accept(self, serialized_item: bytes, leased: bool = False) -> T:
+        """Десериализует элемент ZSET (без префикса порядкового номера)"""
+        item = self.deserializer(serialized_item[SEQ_PREFIX_SIZE:])
+        if self.reliable:
+            self._leases[id(item)] = (item, serialized_item)
+            self._ensure_reaper()
+        return item
+
+    @timed_get
+    async def get_nowait(self) -> T:
+        """
+        Получение самого приоритетного элемента без ожидания
+
+        Raises:
+            asyncio.QueueEmpty: Если очередь пуста
+        """
+        items = await self._pop(1)
+        if not items:
+            raise asyncio.QueueEmpty(f"Queue {self.queue_name} is empty")
+        return items[0]
+
+    @timed_get
+    async def get(self, timeout: Optional[float] = None) -> T:
+        """
+        Получение самого приоритетного элемента с ожиданием
+
+        Args:
+            timeout: Таймаут в секундах (None - ждать бесконечно)
+
+        Raises:
+            asyncio.QueueEmpty: Если очередь пуста и таймаут истек
+        """
+        loop = asyncio.get_running_loop()
+        deadline = None if timeout is None else loop.time() + timeout
+        while True:
+            items = await self._pop(1)
+            if items:
+                return items[0]
+
+            wait = WAKE_WAIT_SLICE
+            if deadline is not None:
+                wait = min(wait, deadline - loop.time())
+                if wait <= 0:
+                    raise asyncio.QueueEmpty(f"Queue {self.queue_name} is empty")
+            blocking_client = await self._ensure_connection(blocking=True)
+            await blocking_client.brpop(self.wake_key, timeout=wait)
+
+    @timed_get
+    async def get_many(self, max_items: int) -> List[T]:
+        """
+        Пакетное получение до max_items самых приоритетных элементов без ожидания
+        """
+        if max_items <= 0:
+            return []
+        return await self._pop(max_items)
+
+    async def nack(self, item: T, requeue: bool = True) -> None:
+        """
+        Отказ от обработки элемента; при requeue элемент возвращается в начало очереди
+
+        Args:
+            item: Элемент, полученный через get/get_nowait/get_many
+            requeue: Вернуть элемент в очередь (иначе он отбрасывается)
+        """
+        if self.reliable:
+            member = self._release(item)
+        else:
+            if not requeue:
+                return
+            redis_client = await self._ensure_connection()
+            seq = await redis_client.incr(self.seq_key)
+            member = f"{seq:016x}".encode() + self.serializer(item)
+
+        redis_client = await self._ensure_connection()
+        await redis_client.eval(
+            _REQUEUE_SCRIPT,
+            4,
+            self.zset_key,
+            self.processing_key,
+            self.leases_key,
+            self.wake_key,
+            member,
+            "1" if self.reliable else "0",
+            "1" if requeue else "0",
+        )
+
+    async def clear(self) -> None:
+        """Очистка очереди вместе с историей дедупликации"""
+        redis_client = await self._ensure_connection()
+        await redis_client.delete(self.zset_key, self.wake_key, self.seen_key)
+        await self._flag.set(False)
+
+    async def size(self) -> int:
+        """
+        Получение размера очереди
+
+        Returns:
+            Количество элементов в очереди
+        """
+        redis_client = await self._ensure_connection()
+        return await redis_client.zcard(self.zset_key)
+
+    async def peek_many(self, limit: int) -> List[T]:
+        """
+        Просмотр до limit самых приоритетных элементов без их удаления
+
+        Args:
+            limit: Максимальное количество элементов
+
+        Returns:
+            Элементы в порядке выдачи
+        """
+        if limit <= 0:
+            return []
+        redis_client = await self._ensure_connection()
+        members = await redis_client.zrange(self.zset_key, 0, limit - 1)
+        return [self.deserializer(member[SEQ_PREFIX_SIZE:]) for member in members]
+
+    async def peek(self) -> Optional[T]:
+        """
+        Просмотр самого приоритетного элемента без его удаления
+
+        Returns:
+            Элемент или None если очередь пуста
+        """
+        redis_client = await self._ensure_connection()
+        members = await redis_client.zrange(self.zset_key, 0, 0)
+        if not members:
+            return None
+        return self.deserializer(members[0][SEQ_PREFIX_SIZE:])
@@ -0,0 +1,376 @@
+import asyncio
+import logging
+from collections import deque
+from typing import TypeVar, Optional, Dict, Tuple, Iterable, List, Deque
+
+from redis.exceptions import ResponseError
+
+from src.queues.codecs import Codec
+from src.queues.implementations.redis import RedisAsyncQueue, PUSH_CHUNK_SIZE
+from src.queues.metrics import timed_get, timed_put
+
+T = TypeVar('T')
+
+logger = logging.getLogger(__name__)
+
+# Имя поля записи стрима, в котором хранится сериализованный элемент
+DATA_FIELD = b"data"
+# Сколько ожидающих записей просматривать за один XPENDING
+REAP_BATCH_SIZE = 100
+
+
+class RedisStreamQueue(RedisAsyncQueue[T]):
+    """
+    Асинхронная очередь на основе Redis Streams с группой консьюмеров
+
+    Несколько процессов бота или воркеров читают стрим через одну группу
+    (XREADGROUP), поэтому каждая запись достается ровно одному консьюмеру.
+    Запись остается в списке ожидающих (PEL) до ack; записи, которые консьюмер
+    не подтвердил за visibility_timeout секунд, забираются другими через
+    XPENDING/XCLAIM. Гарантия доставки - at-least-once.
+    """
+
+    def __init__(
+            self,
+            queue_name: str,
+            redis_url: str = "redis://localhost:6379",
+            codec: Optional[Codec] = None,
+            flag_key_suffix: str = "_flag",
+            group_name: str = "workers",
+            consumer_id: Optional[str] = None,
+            visibility_timeout: float = 600.0,
+            reaper_interval: float = 30.0,
+    ):
+        super().__init__(
+            queue_name,
+            redis_url=redis_url,
+            codec=codec,
+            flag_key_suffix=flag_key_suffix,
+            reliable=True,
+            consumer_id=consumer_id,
+            visibility_timeout=visibility_timeout,
+            reaper_interval=reaper_interval,
+        )
+        self.stream_key = f"{queue_name}:stream"
+        self.group_name = group_name
+
+        self._group_ready = False
+        # Позиция чтения собственных неподтвержденных записей, оставшихся
+        # от предыдущего запуска; None - все такие записи уже выданы
+        self._pending_cursor: Optional[bytes] = b"0"
+        # Записи, полученные через XCLAIM, но еще не выданные потребителю
+        self._claimed: Deque[Tuple[bytes, Dict[bytes, bytes]]] = deque()
+        # id(item) -> (item, id записи стрима)
+        self._entries: Dict[int, Tuple[T, bytes]] = {}
+
+    async def _ensure_group(self):
+        """Создает стрим и группу консьюмеров, если их еще нет"""
+        redis_client = await self._ensure_connection()
+        if self._group_ready:
+            return redis_client
+
+        try:
+            await redis_client.xgroup_create(
+                self.stream_key, self.group_name, id="0", mkstream=True
+            )
+        except ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+        self._group_ready = True
+        return redis_client
+
+    @timed_put
+    async def put_nowait(self, item: T) -> None:
+        """
+        Добавление элемента в стрим
+
+        Args:
+            item: Элемент для добавления
+        """
+        redis_client = await self._ensure_group()
+        await redis_client.xadd(self.stream_key, {DATA_FIELD: self.serializer(item)})
+
+    @timed_put
+    async def put_many(self, items: Iterable[T]) -> int:
+        """
+        Пакетное добавление элементов за один round trip
+
+        Args:
+            items: Элементы для добавления
+
+        Returns:
+            Количество добавленных элементов
+        """
+        serialized_items = [self.serializer(item) for item in items]
+        if not serialized_items:
+            return 0
+
+        redis_client = await self._ensure_group()
+        for start in range(0, len(serialized_items), PUSH_CHUNK_SIZE):
+            async with redis_client.pipeline(transaction=False) as pipe:
+                for serialized_item in serialized_items[start:start + PUSH_CHUNK_SIZE]:
+                    pipe.xadd(self.stream_key, {DATA_FIELD: serialized_item})
+                await pipe.execute()
+
+        return len(serialized_items)
+
+    async def _read(self, count: int, block_ms: Optional[int]) -> List[Tuple[bytes, Dict[bytes, bytes]]]:
+        """
+        Чтение записей для текущего консьюмера
+
+        Порядок: записи, забранные у упавших консьюмеров, затем собственные
+        неподтвержденные записи (один раз после старта), затем новые записи.
+        """
+        entries = []
+        while self._claimed and len(entries) < count:
+            entries.append(self._claimed.popleft())
+        if len(entries) >= count:
+            return entries
+
+        redis_client = await self._ensure_group()
+        if self._pending_cursor is not None:
+            response = await redis_client.xreadgroup(
+                self.group_name,
+                self.consumer_id,
+                {self.stream_key: self._pending_cursor},
+                count=count - len(entries),
+            )
+            pending = response[0][1] if response else []
+            if pending:
+                self._pending_cursor = pending[-1][0]
+            else:
+                self._pending_cursor = None
+            # Записи, удаленные из стрима, приходят без полей
+            entries.extend((entry_id, fields) for entry_id, fields in pending if fields)
+            if entries:
+                return entries
+
+        if block_ms is not None:
+            redis_client = await self._ensure_connection(blocking=True)
+        response = await redis_client.xreadgroup(
+            self.group_name,
+            self.consumer_id,
+            {self.stream_key: ">"},
+            count=count - len(entries),
+            block=block_ms,
+        )
+        if response:
+            entries.extend(response[0][1])
+        return entries
+
+    def _accept_entry(self, entry_id: bytes, fields: Dict[bytes, bytes]) -> T:
+        item = self.deserializer(fields[DATA_FIELD])
+        self._entries[id(item)] = (item, entry_id)
+        self._ensure_reaper()
+        return item
+
+    @timed_get
+    async def get_nowait(self) -> T:
+        """
+        Получение элемента из стрима без ожидания
+
+        Returns:
+            Элемент из очереди
+
+        Raises:
+            asyncio.QueueEmpty: Если новых записей нет
+        """
+        entries = await self._read(1, block_ms=None)
+        if not entries:
+            raise asyncio.QueueEmpty(f"Queue {self.queue_name} is empty")
+        return self._accept_entry(*entries[0])
+
+    @timed_get
+    async def get(self, timeout: Optional[float] = None) -> T:
+        """
+        Получение элемента с ожиданием на стороне Redis (XREADGROUP BLOCK)
+
+        Args:
+            timeout: Таймаут в секундах (None - ждать бесконечно, 0 и меньше - не ждать)
+
+        Returns:
+            Элемент из очереди
+
+        Raises:
+            asyncio.QueueEmpty: Если таймаут истек
+        """
+        if timeout is not None and timeout <= 0:
+            return await self.get_nowait()
+        # BLOCK 0 означает бесконечное ожидание, поэтому короткий таймаут не округляется до 0
+        block_ms = 0 if timeout is None else max(int(timeout * 1000), 1)
+        entries = await self._read(1, block_ms=block_ms)
+        if not entries:
+            raise asyncio.QueueEmpty(f"Queue {self.queue_name} is empty")
+        return self._accept_entry(*entries[0])
+
+    @timed_get
+    async def get_many(self, max_items: int) -> List[T]:
+        """
+        Пакетное получение до max_items записей без ожидания
+
+        Args:
+            max_items: Максимальное количество элементов
+
+        Returns:
+            Список элементов (пустой, если новых записей нет)
+        """
+        if max_items <= 0:
+            return []
+        entries = await self._read(max_items, block_ms=None)
+        return [self._accept_entry(entry_id, fields) for entry_id, fields in entries]
+
+    def _release_entry(self, item: T) -> Optional[bytes]:
+        entry = self._entries.pop(id(item), None)
+        if entry is None or entry[0] is not item:
+            logger.warning(f"Элемент не был получен из стрима {self.stream_key}: {item}")
+            return None
+        return entry[1]
+
+    async def ack(self, item: T) -> None:
+        """
+        Подтверждение обработки: запись удаляется из PEL и из стрима
+
+        Args:
+            item: Элемент, полученный через get/get_nowait/get_many
+        """
+        entry_id = self._release_entry(item)
+        if entry_id is None:
+            return
+
+        redis_client = await self._ensure_group()
+        async with redis_client.pipeline(transaction=True) as pipe:
+            pipe.xack(self.stream_key, self.group_name, entry_id)
+            pipe.xdel(self.stream_key, entry_id)
+            await pipe.execute()
+
+    async def nack(self, item: T, requeue: bool = True) -> None:
+        """
+        Отказ от обработки записи
+
+        Args:
+            item: Элемент, полученный через get/get_nowait/get_many
+            requeue: Добавить элемент в стрим заново (иначе он отбрасывается)
+        """
+        entry_id = self._release_entry(item)
+        if entry_id is None:
+            return
+
+        redis_client = await self._ensure_group()
+        async with redis_client.pipeline(transaction=True) as pipe:
+            if requeue:
+                pipe.xadd(self.stream_key, {DATA_FIELD: self.serializer(item)})
+            pipe.xack(self.stream_key, self.group_name, entry_id)
+            pipe.xdel(self.stream_key, entry_id)
+            await pipe.execute()
+
+    async def reap(self) -> int:
+        """
+        Забирает себе записи, которые другие консьюмеры держат дольше visibility_timeout
+
+        Владелец записи проверяется через XPENDING: собственные записи в
+        обработке не забираются, а уже забранные или выданные не попадают
+        в очередь повторно. Записи забираются через XCLAIM с тем же
+        min_idle_time, поэтому запись, которую владелец успел продлить или
+        подтвердить, остается у него.
+
+        Returns:
+            Количество забранных записей
+        """
+        redis_client = await self._ensure_group()
+        min_idle_ms = int(self.visibility_timeout * 1000)
+        consumer = self.consumer_id.encode()
+        held = {entry_id for _, entry_id in self._entries.values()}
+        held.update(entry_id for entry_id, _ in self._claimed)
+        claimed = 0
+        start_id = "-"
+        while True:
+            pending = await redis_client.xpending_range(
+                self.stream_key,
+                self.group_name,
+                min=start_id,
+                max="+",
+                count=REAP_BATCH_SIZE,
+                idle=min_idle_ms,
+            )
+            message_ids = [
+                entry["message_id"] for entry in pending
+                if entry["consumer"] != consumer and entry["message_id"] not in held
+            ]
+            if message_ids:
+                entries = await redis_client.xclaim(
+                    self.stream_key,
+                    self.group_name,
+                    self.consumer_id,
+                    min_idle_time=min_idle_ms,
+                    message_ids=message_ids,
+                )
+                # Записи, удаленные из стрима, приходят без полей
+                for entry_id, fields in entries:
+                    if fields:
+                        self._claimed.append((entry_id, fields))
+                        held.add(entry_id)
+                        claimed += 1
+            if len(pending) < REAP_BATCH_SIZE:
+                return claimed
+            start_id = "(" + pending[-1]["message_id"].decode()
+
+    async def clear(self) -> None:
+        """Очистка стрима вместе с группой консьюмеров"""
+        redis_client = await self._ensure_connection()
+        await redis_client.delete(self.stream_key)
+        await self._flag.set(False)
+        self._group_ready = False
+        self._claimed.clear()
+        self._entries.clear()
+
+    async def size(self) -> int:
+        """
+        Количество записей, еще не выданных ни одному консьюмеру
+
+        Returns:
+            Количество элементов в очереди
+        """
+        redis_client = await self._ensure_group()
+        async with redis_client.pipeline(transaction=False) as pipe:
+            pipe.xlen(self.stream_key)
+            pipe.xpending(self.stream_key, self.group_name)
+            length, pending = await pipe.execute()
+        return max(length - pending["pending"], 0)
+
+    async def peek_many(self, limit: int) -> List[T]:
+        """
+        Просмотр до limit записей, еще не выданных группе консьюмеров
+
+        Args:
+            limit: Максимальное количество элементов
+
+        Returns:
+            Элементы в порядке выдачи
+        """
+        if limit <= 0:
+            return []
+        redis_client = await self._ensure_group()
+        groups = await redis_client.xinfo_groups(self.stream_key)
+        last_id = next(
+            (group["last-delivered-id"] for group in groups
+             if group["name"] == self.group_name.encode()),
+            b"0-0",
+        )
+        # Исключающая граница: записи строго после последней выданной
+        entries = await redis_client.xrange(
+            self.stream_key, min=b"(" + last_id, count=limit
+        )
+        return [self.deserializer(fields[DATA_FIELD]) for _, fields in entries]
+
+    async def peek(self) -> Optional[T]:
+        """
+        Просмотр самой старой записи стрима без ее получения
+
+        Returns:
+            Элемент или None если стрим пуст
+        """
+        redis_client = await self._ensure_group()
+        entries = await redis_client.xrange(self.stream_key, count=1)
+        if not entries:
+            return None
+        return self.deserializer(entries[0][1][DATA_FIELD])
@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import AsyncIterable, Optional, Generic, TypeVar
+from typing import AsyncIterable, Optional, Generic, TypeVar, Iterable, List
 
 
 T = TypeVar("T")
@@ -28,6 +28,9 @@ class Queue(ABC, Generic[T]):
 class AsyncQueue(Queue[T]):
     """Расширенный асинхронный интерфейс с дополнительными методами"""
 
+    # Учитывает ли очередь поле priority элемента (иначе порядок FIFO)
+    supports_priority: bool = False
+
     @abstractmethod
     async def get_nowait(self) -> T:
         pass
@@ -41,6 +44,26 @@ class AsyncQueue(Queue[T]):
     async def put_nowait(self, item: T) -> None:
         pass
 
+    @abstractmethod
+    async def put_many(self, items: Iterable[T]) -> int:
+        """Пакетное добавление элементов, возвращает количество добавленных"""
+        pass
+
+    @abstractmethod
+    async def get_many(self, max_items: int) -> List[T]:
+        """Пакетное получение до max_items элементов без ожидания"""
+        pass
+
+    @abstractmethod
+    async def ack(self, item: T) -> None:
+        """Подтверждение успешной обработки полученного элемента"""
+        pass
+
+    @abstractmethod
+    async def nack(self, item: T, requeue: bool = True) -> None:
+        """Отказ от обработки элемента с возвратом в очередь"""
+        pass
+
     @abstractmethod
     async def clear(self) -> None:
         pass
@@ -53,6 +76,16 @@ class AsyncQueue(Queue[T]):
     def __aiter__(self) -> AsyncIterable[T]:
         pass
 
+    @abstractmethod
+    async def peek_many(self, limit: int) -> List[T]:
+        """До limit элементов в порядке выдачи без их получения"""
+        pass
+
+    @abstractmethod
+    async def get_stats(self) -> dict:
+        """Размер, возраст головы очереди (oldest_age, сек) и гистограммы задержек"""
+        pass
+
     @abstractmethod
     async def set_flag(self, value: bool) -> None:
         pass
@@ -64,3 +97,59 @@ class AsyncQueue(Queue[T]):
     @abstractmethod
     async def flag_context(self, value: bool):
         pass
+
+
+class DelayedQueue(ABC, Generic[T]):
+    """Очередь отложенной доставки: элемент становится доступен в заданное время"""
+
+    @abstractmethod
+    async def schedule(self, item: T, due_at: float, replace: bool = True) -> None:
+        """
+        Запланировать элемент на время due_at (unix timestamp).
+        Одинаковые элементы хранятся в одном экземпляре: replace=False
+        оставляет уже запланированное время без изменений.
+        """
+        pass
+
+    @abstractmethod
+    async def cancel(self, item: T) -> None:
+        pass
+
+    @abstractmethod
+    async def get(self, timeout: Optional[float] = None) -> T:
+        """Ожидание ближайшего наступившего элемента"""
+        pass
+
+    @abstractmethod
+    async def size(self) -> int:
+        pass
+
+    @abstractmethod
+    async def clear(self) -> None:
+        pass
+
+
+class DeadLetterQueue(ABC, Generic[T]):
+    """Хранилище элементов, исчерпавших повторные попытки"""
+
+    @abstractmethod
+    async def add(self, item: T, error: str) -> None:
+        pass
+
+    @abstractmethod
+    async def items(self, limit: int) -> List[dict]:
+        """Последние limit записей {"item", "error", "failed_at"}, новые первыми"""
+        pass
+
+    @abstractmethod
+    async def take(self, limit: int) -> List[T]:
+        """Извлечение до limit самых старых элементов (для повторной постановки)"""
+        pass
+
+    @abstractmethod
+    async def size(self) -> int:
+        pass
+
+    @abstractmethod
+    async def clear(self) -> None:
+        pass
@@ -0,0 +1,144 @@
+import functools
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Any, List, Optional
+
+from src.queues.models import VideoTaskRecord
+
+# Верхние границы корзин гистограммы, сек: от 1 мкс до ~25 суток с шагом x2
+BUCKET_BOUNDS = [1e-6 * 2 ** i for i in range(42)]
+
+# Замер уже идет во внешнем вызове (put -> put_nowait -> put_many)
+_measuring: ContextVar[bool] = ContextVar("queue_measuring", default=False)
+
+
+class Histogram:
+    """Гистограмма длительностей с логарифмическими корзинами"""
+
+    __slots__ = ("counts", "count", "total", "max")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKET_BOUNDS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(BUCKET_BOUNDS, value)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, q: float) -> float:
+        """Оценка квантиля сверху (граница корзины, не больше максимума)"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= rank and bucket_count:
+                bound = BUCKET_BOUNDS[index] if index < len(BUCKET_BOUNDS) else self.max
+                return min(bound, self.max)
+        return self.max
+
+    def snapshot(self) -> dict:
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else 0.0,
+            "p50": self.quantile(0.5),
+            "p90": self.quantile(0.9),
+            "p99": self.quantile(0.99),
+            "max": self.max,
+        }
+
+
+class QueueMetrics:
+    """Гистограммы очереди: задержки put/get, время в очереди и возраст головы очереди"""
+
+    def __init__(self):
+        self.put = Histogram()
+        self.get = Histogram()
+        self.time_in_queue = Histogram()
+        # Заполняется при каждом вызове get_stats
+        self.oldest_age = Histogram()
+
+    def observe_received(self, items: List[Any]) -> None:
+        now = time.time()
+        for item in items:
+            stamp = enqueued_at(item)
+            if stamp is not None:
+                self.time_in_queue.observe(max(now - stamp, 0.0))
+
+    def snapshot(self) -> dict:
+        return {
+            "put_latency": self.put.snapshot(),
+            "get_latency": self.get.snapshot(),
+            "time_in_queue": self.time_in_queue.snapshot(),
+            "oldest_age_samples": self.oldest_age.snapshot(),
+        }
+
+
+def stamp_enqueued(item: Any) -> Any:
+    """Элемент с отметкой времени постановки (словарь копируется, отметка не перезаписывается)"""
+    if isinstance(item, dict) and "enqueued_at" not in item:
+        return {**item, "enqueued_at": time.time()}
+    return item
+
+
+def enqueued_at(item: Any) -> Optional[float]:
+    if isinstance(item, VideoTaskRecord):
+        return item.enqueued_at
+    if isinstance(item, dict):
+        return item.get("enqueued_at")
+    return None
+
+
+def item_age(item: Any) -> Optional[float]:
+    """Сколько секунд элемент находится в очереди"""
+    stamp = enqueued_at(item)
+    return None if stamp is None else max(time.time() - stamp, 0.0)
+
+
+def timed_put(method):
+    """Замер длительности успешного вызова метода добавления (учитывается только внешний вызов)"""
+
+    @functools.wraps(method)
+    async def wrapper(self, *args, **kwargs):
+        if _measuring.get():
+            return await method(self, *args, **kwargs)
+        token = _measuring.set(True)
+        start = time.perf_counter()
+        try:
+            result = await method(self, *args, **kwargs)
+        finally:
+            _measuring.reset(token)
+        self.metrics.put.observe(time.perf_counter() - start)
+        return result
+
+    return wrapper
+
+
+def timed_get(method):
+    """
+    Замер длительности успешного вызова метода получения (включая ожидание
+    элемента) и времени, проведенного полученными элементами в очереди
+    """
+
+    @functools.wraps(method)
+    async def wrapper(self, *args, **kwargs):
+        if _measuring.get():
+            return await method(self, *args, **kwargs)
+        token = _measuring.set(True)
+        start = time.perf_counter()
+        try:
+            result = await method(self, *args, **kwargs)
+        finally:
+            _measuring.reset(token)
+        self.metrics.get.observe(time.perf_counter() - start)
+        self.metrics.observe_received(result if isinstance(result, list) else [result])
+        return result
+
+    return wrapper
@@ -0,0 +1,142 @@
+import re
+import time
+from enum import IntEnum
+from typing import Any, Optional
+
+from src.utils import (
+    canonical_tiktok_url,
+    extract_tiktok_short_code,
+    extract_tiktok_video_id,
+)
+
+
+class VideoSource(IntEnum):
+    """Откуда взята ссылка на видео"""
+
+    CANONICAL = 0  # tiktok.com/@user/video/<id>
+    SHORT_VM = 1  # vm.tiktok.com/<code>
+    SHORT_VT = 2  # vt.tiktok.com/<code>
+
+
+SHORT_HOSTS = {
+    VideoSource.SHORT_VM: "vm.tiktok.com",
+    VideoSource.SHORT_VT: "vt.tiktok.com",
+}
+
+TIKTOK_USERNAME_PATTERN = re.compile(r"tiktok\.com/@([\w.-]*)/", re.IGNORECASE)
+
+
+class VideoTaskRecord:
+    """
+    Компактная запись задачи на публикацию видео для хранения в очереди.
+
+    Вместо ссылки хранится числовой id видео TikTok и имя автора; короткие
+    ссылки, для которых id еще неизвестен, хранят только код ссылки.
+    Записью представляются только ссылки, которые восстанавливаются из нее
+    без изменений (не фото, без параметров запроса).
+    """
+
+    __slots__ = ("video_id", "source", "retries", "enqueued_at", "short_code", "priority", "username")
+
+    def __init__(
+        self,
+        video_id: int = 0,
+        source: VideoSource = VideoSource.CANONICAL,
+        retries: int = 0,
+        enqueued_at: Optional[float] = None,
+        short_code: str = "",
+        priority: int = 0,
+        username: str = "",
+    ):
+        self.video_id = video_id
+        self.source = source
+        self.retries = retries
+        self.enqueued_at = time.time() if enqueued_at is None else enqueued_at
+        self.short_code = short_code
+        self.priority = priority
+        self.username = username
+
+    @classmethod
+    def from_url(cls, url: str, **kwargs: Any) -> Optional["VideoTaskRecord"]:
+        """Создает запись из TikTok ссылки, None если ссылку нельзя представить компактно"""
+        record = None
+        video_id = extract_tiktok_video_id(url)
+        if video_id is not None:
+            match = TIKTOK_USERNAME_PATTERN.search(url)
+            username = match.group(1) if match else ""
+            record = cls(video_id=video_id, source=VideoSource.CANONICAL, username=username, **kwargs)
+        else:
+            short = extract_tiktok_short_code(url)
+            if short is not None:
+                host, code = short
+                source = VideoSource.SHORT_VM if host == SHORT_HOSTS[VideoSource.SHORT_VM] else VideoSource.SHORT_VT
+                record = cls(source=source, short_code=code, **kwargs)
+
+        # Ссылки на фото, с параметрами запроса и другие формы остаются как есть
+        if record is None or record.url != url or not record.username.isascii():
+            return None
+        return record
+
+    @classmethod
+    def from_dict(cls, item: dict) -> Optional["VideoTaskRecord"]:
+        """Создает запись из словаря формата {"url": ...}"""
+        url = item.get("url")
+        if not url or set(item) - {"url", "retries", "enqueued_at", "priority"}:
+            return None
+        return cls.from_url(
+            url,
+            retries=item.get("retries", 0),
+            enqueued_at=item.get("enqueued_at"),
+            priority=item.get("priority", 0),
+        )
+
+    @property
+    def url(self) -> str:
+        if self.source == VideoSource.CANONICAL:
+            return canonical_tiktok_url(self.video_id, self.username)
+        return f"https://{SHORT_HOSTS[self.source]}/{self.short_code}/"
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Доступ к полям как у словаря задачи ({"url": ...}) для совместимости"""
+        return getattr(self, key, default)
+
+    def to_dict(self) -> dict:
+        return {
+            "url": self.url,
+            "retries": self.retries,
+            "enqueued_at": self.enqueued_at,
+            "priority": self.priority,
+        }
+
+    def __repr__(self) -> str:
+        return f"VideoTaskRecord({self.url}, retries={self.retries})"
+
+
+def item_priority(item: Any) -> int:
+    """Приоритет элемента очереди (0 - обычный, больше - срочнее)"""
+    if isinstance(item, VideoTaskRecord):
+        return item.priority
+    if isinstance(item, dict):
+        return int(item.get("priority", 0))
+    return 0
+
+
+def item_retries(item: Any) -> int:
+    """Сколько раз обработка элемента уже завершилась ошибкой"""
+    if isinstance(item, VideoTaskRecord):
+        return item.retries
+    if isinstance(item, dict):
+        return int(item.get("retries", 0))
+    return 0
+
+
+def with_retries(item: Any, retries: int) -> Any:
+    """Копия элемента с новым счетчиком неудачных попыток"""
+    if isinstance(item, VideoTaskRecord):
+        return VideoTaskRecord(
+            item.video_id, item.source, retries, item.enqueued_at, item.short_code, item.priority,
+            item.username,
+        )
+    if isinstance(item, dict):
+        return {**item, "retries": retries}
+    return item
@@ -0,0 +1,112 @@
+import asyncio
+import logging
+import random
+import time
+from typing import Any
+
+from src.queues.interfaces import AsyncQueue, DeadLetterQueue, DelayedQueue
+from src.queues.models import item_retries, with_retries
+
+logger = logging.getLogger(__name__)
+
+# Пауза после ошибки чтения очереди повторов (удваивается до максимума), сек
+QUEUE_ERROR_DELAY = 1.0
+QUEUE_ERROR_DELAY_MAX = 60.0
+
+
+class RetryScheduler:
+    """
+    Обработка неудачных элементов очереди: повторная постановка с
+    экспоненциальной задержкой и перенос в dead-letter очередь после
+    max_retries неудач.
+
+    Ожидающие повтора элементы хранятся в очереди отложенной доставки и
+    возвращаются в основную очередь циклом run(), поэтому неудачный элемент
+    не занимает слот публикации, пока не наступит время повтора.
+    """
+
+    def __init__(
+        self,
+        queue: AsyncQueue,
+        retry_queue: DelayedQueue,
+        dead_letters: DeadLetterQueue,
+        max_retries: int = 5,
+        backoff_base: float = 300.0,
+        backoff_cap: float = 6 * 3600,
+    ):
+        """
+        :param queue: Основная очередь
+        :param retry_queue: Очередь отложенной доставки для ожидающих повтора элементов
+        :param dead_letters: Очередь элементов, исчерпавших повторные попытки
+        :param max_retries: Количество повторных попыток
+        :param backoff_base: Задержка перед первым повтором, сек
+        :param backoff_cap: Максимальная задержка между повторами, сек
+        """
+        self.queue = queue
+        self.retry_queue = retry_queue
+        self.dead_letters = dead_letters
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+
+    def backoff(self, retries: int) -> float:
+        """Задержка перед повтором номер retries (с разбросом, чтобы повторы не совпадали)"""
+        delay = min(self.backoff_cap, self.backoff_base * 2 ** (retries - 1))
+        return delay * random.uniform(0.5, 1.0)
+
+    async def fail(self, item: Any, error: str) -> bool:
+        """
+        Регистрирует неудачную обработку элемента, полученного из основной очереди.
+
+        :param item: Элемент
+        :param error: Текст ошибки
+        :return: True если запланирован повтор, False если элемент перенесен в dead-letter очередь
+        """
+        retries = item_retries(item) + 1
+        failed = with_retries(item, retries)
+
+        # Сначала сохраняем элемент, затем подтверждаем: при падении между
+        # этими шагами элемент будет обработан повторно, но не потерян
+        if retries > self.max_retries:
+            await self.dead_letters.add(failed, error)
+            logger.warning(f"Элемент перенесен в dead-letter очередь после {retries} неудач: {error}")
+        else:
+            delay = self.backoff(retries)
+            await self.retry_queue.schedule(failed, time.time() + delay)
+            logger.info(f"Повтор {retries}/{self.max_retries} через {delay:.0f} сек: {error}")
+        await self.queue.ack(item)
+        return retries <= self.max_retries
+
+    async def replay(self, limit: int) -> int:
+        """
+        Возвращает до limit самых старых элементов dead-letter очереди в основную.
+        Счетчик неудач сохраняется: повторно упавший элемент сразу вернется обратно.
+
+        :return: Количество возвращенных элементов
+        """
+        items = await self.dead_letters.take(limit)
+        if not items:
+            return 0
+        return await self.queue.put_many(items)
+
+    async def run(self) -> None:
+        """Цикл возврата элементов, для которых наступило время повтора"""
+        error_delay = QUEUE_ERROR_DELAY
+        while True:
+            try:
+                item = await self.retry_queue.get()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Ошибка чтения очереди повторов, повтор через {error_delay:.0f} сек: {e}")
+                await asyncio.sleep(error_delay)
+                error_delay = min(error_delay * 2, QUEUE_ERROR_DELAY_MAX)
+                continue
+            error_delay = QUEUE_ERROR_DELAY
+            try:
+                await self.queue.put_many([item])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Не удалось вернуть элемент в очередь, повтор через минуту: {e}")
+                await self.retry_queue.schedule(item, time.time() + 60)
@@ -1,14 +1,19 @@
 import asyncio
 import logging
 import os
+from typing import Optional
 
 from src.contexts import context_video
 from src.interfaces import Command
 from aiogram import Bot
-from aiogram.types import FSInputFile
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.types import FSInputFile, Message
 from src.provider.factories import AsyncTaskFactory
 from src.provider.manager import AsyncProviderManager
+from src.provider.prefetch import VideoPrefetcher
 from src.provider.tasks import AsyncTaskType
+from src.repository.telegram_files import TelegramFileRepository
+from src.utils import tiktok_video_key
 
 logger = logging.getLogger(__name__)
 
@@ -22,8 +27,9 @@ class TaskVideo(Command):
 
 
 class TaskLink(Command):
-    def __init__(self, url: str) -> Command:
+    def __init__(self, url: str, priority: int = 0) -> Command:
         self.url = url
+        self.priority = priority
 
     async def execute(
         self,
@@ -31,19 +37,63 @@ class TaskLink(Command):
         manager: AsyncProviderManager,
         factory: AsyncTaskFactory,
         channel_id: str,
+        prefetcher: Optional[VideoPrefetcher] = None,
+        file_ids: Optional[TelegramFileRepository] = None,
     ):
-        task_browser = factory.create(AsyncTaskType.VIDEO, url=self.url)
-        filename = await manager.process_task(task_browser, timeout=10000)
-        try:
-            await bot.send_video(chat_id=channel_id, video=FSInputFile(filename), supports_streaming=True)
-            await asyncio.sleep(5)
+        """
+        Скачивает и публикует видео.
 
-        except Exception as e:
-            logger.error(f"Ошибка при отправке видео: {e}")
+        :param prefetcher: Буфер предзагрузки; если видео уже скачано, повторной загрузки нет
+        :param file_ids: file_id уже загруженных видео; известное видео отправляется без загрузки
+        :raises RuntimeError: Если видео не удалось скачать
+        """
+        video_key = tiktok_video_key(self.url) if file_ids else None
+        if video_key and await self._send_known(bot, channel_id, file_ids, video_key):
+            return
 
+        filename = await prefetcher.take(self.url) if prefetcher else None
+        if filename is None:
+            task_browser = factory.create(AsyncTaskType.VIDEO, url=self.url)
+            filename = await manager.process_task(task_browser, timeout=10000)
+        if not filename:
+            raise RuntimeError(f"Не удалось скачать видео {self.url}")
+
+        try:
+            message = await bot.send_video(chat_id=channel_id, video=FSInputFile(filename), supports_streaming=True)
+            if video_key:
+                await self._remember(file_ids, video_key, message)
+            await asyncio.sleep(5)
         finally:
             await self._safe_delete_file(filename)
 
+    async def _send_known(
+        self, bot: Bot, channel_id: str, file_ids: TelegramFileRepository, video_key: str
+    ) -> bool:
+        """Отправка по сохраненному file_id; False, если видео нужно загрузить"""
+        file_id = await file_ids.get_file_id(video_key)
+        if file_id is None:
+            return False
+        try:
+            await bot.send_video(chat_id=channel_id, video=file_id, supports_streaming=True)
+        except TelegramBadRequest as e:
+            # file_id устарел или принадлежит другому боту
+            logger.warning(f"Не удалось отправить {self.url} по file_id, видео будет загружено заново: {e}")
+            await file_ids.remove(video_key)
+            return False
+        logger.info(f"Видео {self.url} отправлено по file_id без загрузки")
+        await asyncio.sleep(5)
+        return True
+
+    async def _remember(self, file_ids: TelegramFileRepository, video_key: str, message: Message):
+        media = message.video or message.animation or message.document
+        if media is None:
+            return
+        try:
+            await file_ids.save_file_id(video_key, media.file_id, media.file_unique_id)
+        except Exception as e:
+            # Видео уже отправлено, ошибка сохранения не должна приводить к повтору
+            logger.warning(f"Не удалось сохранить file_id для {self.url}: {e}")
+
 
     async def _safe_delete_file(self, filename: str):
         """Безопасное удаление файла с повторными попытками"""
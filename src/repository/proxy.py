@@ -1,12 +1,18 @@
+import asyncio
+import logging
+from collections import deque
 from datetime import datetime
 import re
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 from sqlalchemy.future import select
-from sqlalchemy import delete
-from typing import List, Optional
+from sqlalchemy import bindparam, delete, update
+from typing import Deque, Dict, List, Optional, Set
 import time
 
 from src.models import Proxy
+from src.services.proxy_health import ProxyHealth
+
+logger = logging.getLogger(__name__)
 
 proxy_regex = re.compile(
     r"^(http|https|socks4|socks5)://"  # протокол
@@ -15,8 +21,59 @@ proxy_regex = re.compile(
 )
 
 class ProxyRepository:
-    def __init__(self, session_maker: async_sessionmaker[AsyncSession]):
+    """
+    Прокси с ротацией в памяти процесса
+
+    Набор прокси загружается из БД при первом обращении и перечитывается
+    после add_proxy/remove_proxy, поэтому выбор прокси не обращается к БД.
+    Время последнего использования копится в памяти и записывается в БД
+    пакетом (flush_usage, периодически из run_write_back).
+    """
+
+    def __init__(
+        self,
+        session_maker: async_sessionmaker[AsyncSession],
+        health: Optional[ProxyHealth] = None,
+    ):
+        """
+        :param session_maker: Фабрика сессий БД
+        :param health: Оценка состояния прокси; без нее прокси выбираются по очереди
+        """
         self.session_maker = session_maker
+        self.health = health
+        self._proxies: Dict[int, Proxy] = {}
+        # Порядок ротации: id прокси, первым идет давно не использованный
+        self._rotation: Deque[int] = deque()
+        # id -> время использования, еще не записанное в БД
+        self._usage: Dict[int, datetime] = {}
+        # id прокси, не прошедших фоновую проверку
+        self._unusable: Set[int] = set()
+        self._loaded = False
+        self._load_lock = asyncio.Lock()
+
+    async def load(self) -> None:
+        """Перечитывает набор прокси из БД"""
+        async with self._load_lock:
+            async with self.session_maker() as session:
+                result = await session.execute(
+                    select(Proxy).order_by(Proxy.last_used_at.asc().nullsfirst(), Proxy.id)
+                )
+                proxies = result.scalars().all()
+            self._proxies = {proxy.id: proxy for proxy in proxies}
+            # Незаписанное время использования новее прочитанного из БД
+            self._usage = {id: used_at for id, used_at in self._usage.items() if id in self._proxies}
+            for id, used_at in self._usage.items():
+                self._proxies[id].last_used_at = used_at
+            self._unusable &= set(self._proxies)
+            self._rotation = deque(
+                sorted(self._proxies, key=lambda id: (self._proxies[id].last_used_at is not None,
+                                                      self._proxies[id].last_used_at or datetime.min, id))
+            )
+            self._loaded = True
+
+    async def _ensure_loaded(self) -> None:
+        if not self._loaded:
+            await self.load()
 
     async def add_proxy(self, server: str, username: Optional[str], password: Optional[str]):
         if not proxy_regex.match(server):
@@ -24,6 +81,7 @@ class ProxyRepository:
         async with self.session_maker() as session:
             async with session.begin():
                 session.add(Proxy(server=server, username=username, password=password))
+        await self.load()
 
     async def remove_proxy(self, id: int):
         async with self.session_maker() as session:
@@ -33,30 +91,105 @@ class ProxyRepository:
                 if not proxy:
                     raise ValueError(f"Proxy with id {id} not found")
                 await session.delete(proxy)
+        if self.health is not None:
+            self.health.forget(id)
+        await self.load()
 
     async def remove_all_proxies(self):
         async with self.session_maker() as session:
             async with session.begin():
                 await session.execute(delete(Proxy))
+        if self.health is not None:
+            for id in self._proxies:
+                self.health.forget(id)
+        await self.load()
 
     async def get_proxies(self) -> List[Proxy]:
-        async with self.session_maker() as session:
-            result = await session.execute(select(Proxy))
-            return result.scalars().all()
+        await self._ensure_loaded()
+        return sorted(self._proxies.values(), key=lambda proxy: proxy.id)
 
     async def get_next_proxy(self) -> Optional[Proxy]:
-        async with self.session_maker() as session:
-            async with session.begin():
-                result = await session.execute(
-                    select(Proxy)
-                    .order_by(Proxy.last_used_at.asc().nullsfirst())
-                    .limit(1)
-                )
-                proxy = result.scalars().first()
-                if not proxy:
-                    return None
+        await self._ensure_loaded()
+        if not self._rotation:
+            return None
+        if self.health is None:
+            # Непроверенные пропускаются, если остались исправные
+            for _ in range(len(self._rotation)):
+                id = self._rotation[0]
+                self._rotation.rotate(-1)
+                if id not in self._unusable:
+                    break
+            proxy = self._proxies[id]
+        else:
+            # Взвешенный выбор по состоянию прокси
+            proxy = self.health.choose(list(self._proxies.values()))
+
+        proxy.last_used_at = datetime.utcnow()
+        self._usage[proxy.id] = proxy.last_used_at
+        return proxy
+
+    async def flush_usage(self) -> None:
+        """Записывает накопленное время использования прокси одним пакетом"""
+        usage, self._usage = self._usage, {}
+        if not usage:
+            return
+        try:
+            async with self.session_maker() as session:
+                async with session.begin():
+                    # Core UPDATE: прокси, удаленный за это время, просто не обновляется
+                    table = Proxy.__table__
+                    await session.execute(
+                        update(table)
+                        .where(table.c.id == bindparam("proxy_id"))
+                        .values(last_used_at=bindparam("used_at")),
+                        [{"proxy_id": id, "used_at": used_at} for id, used_at in usage.items()],
+                    )
+        except Exception:
+            # Более новые отметки, сделанные во время записи, не перезаписываются
+            self._usage = {**usage, **self._usage}
+            raise
+
+    async def run_write_back(self, interval: float = 60.0) -> None:
+        """Периодическая запись времени использования прокси"""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.flush_usage()
+            except Exception as e:
+                logger.warning(f"Не удалось записать время использования прокси: {e}")
+
+    def report(
+        self,
+        proxy_id: int,
+        ok: bool,
+        latency: Optional[float] = None,
+        bytes_downloaded: Optional[int] = None,
+    ) -> None:
+        """
+        Результат попытки через прокси для оценки его состояния
+
+        :param proxy_id: Id прокси
+        :param ok: Успешна ли попытка
+        :param latency: Длительность попытки, сек
+        :param bytes_downloaded: Размер скачанного файла
+        """
+        if self.health is not None:
+            self.health.record(proxy_id, ok, latency, bytes_downloaded)
+
+    def mark_usable(self, proxy_id: int, usable: bool) -> None:
+        """
+        Результат фоновой проверки прокси
+
+        :param proxy_id: Id прокси
+        :param usable: Прошел ли прокси проверку
+        """
+        if usable:
+            self._unusable.discard(proxy_id)
+        else:
+            self._unusable.add(proxy_id)
+        if self.health is not None:
+            self.health.record_probe(proxy_id, usable)
 
-                proxy.last_used_at = datetime.utcnow()
-                session.add(proxy)  # необязательно, но безопасно
-                await session.flush()
-                return proxy
+    def is_available(self, proxy_id: int) -> bool:
+        """Не исключен ли прокси из ротации"""
+        return self.health is None or self.health.is_available(proxy_id)
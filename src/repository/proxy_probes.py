@@ -0,0 +1,57 @@
+from datetime import datetime
+from typing import Dict, Iterable, Optional
+
+from sqlalchemy import delete
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.future import select
+
+from src.models import ProxyProbe
+
+
+class ProxyProbeRepository:
+    """Результаты последней проверки каждого прокси"""
+
+    def __init__(self, session_maker: async_sessionmaker[AsyncSession]):
+        self.session_maker = session_maker
+
+    async def get_probes(self) -> Dict[int, ProxyProbe]:
+        async with self.session_maker() as session:
+            result = await session.execute(select(ProxyProbe))
+            return {probe.proxy_id: probe for probe in result.scalars().all()}
+
+    async def save_probe(
+        self,
+        proxy_id: int,
+        ok: bool,
+        connect_time: Optional[float] = None,
+        tls_time: Optional[float] = None,
+        fetch_time: Optional[float] = None,
+        status: Optional[int] = None,
+        error: Optional[str] = None,
+    ) -> None:
+        values = dict(
+            ok=ok,
+            connect_time=connect_time,
+            tls_time=tls_time,
+            fetch_time=fetch_time,
+            status=status,
+            error=error[:255] if error else None,
+            checked_at=datetime.utcnow(),
+        )
+        async with self.session_maker() as session:
+            async with session.begin():
+                result = await session.execute(
+                    select(ProxyProbe).where(ProxyProbe.proxy_id == proxy_id)
+                )
+                probe = result.scalars().first()
+                if probe is None:
+                    session.add(ProxyProbe(proxy_id=proxy_id, **values))
+                else:
+                    for key, value in values.items():
+                        setattr(probe, key, value)
+
+    async def remove_except(self, proxy_ids: Iterable[int]) -> None:
+        """Удаляет результаты удаленных прокси (id в SQLite могут использоваться повторно)"""
+        async with self.session_maker() as session:
+            async with session.begin():
+                await session.execute(delete(ProxyProbe).where(ProxyProbe.proxy_id.not_in(list(proxy_ids))))
@@ -1,3 +1,5 @@
+from typing import Optional
+
 from sqlalchemy.ext.asyncio.session import AsyncSession
 from sqlalchemy.sql.expression import select, delete
 
@@ -8,9 +10,20 @@ class PublicationSlotRepository:
     @staticmethod
     async def add_publication_slot(
         db: AsyncSession, week_day: str, time: str, content_type: str
-    ):
-        db.add(PublicationSlot(week_day=week_day, time=time, content_type=content_type))
+    ) -> PublicationSlot:
+        slot = PublicationSlot(week_day=week_day, time=time, content_type=content_type)
+        db.add(slot)
         await db.commit()
+        return slot
+
+    @staticmethod
+    async def get_slot(db: AsyncSession, slot_id: int) -> Optional[PublicationSlot]:
+        return await db.get(PublicationSlot, slot_id)
+
+    @staticmethod
+    async def get_all_slots(db: AsyncSession) -> list[PublicationSlot]:
+        result = await db.execute(select(PublicationSlot))
+        return result.scalars().all()
 
     @staticmethod
     async def get_slots_for_day(
@@ -0,0 +1,43 @@
+from typing import Optional
+
+from sqlalchemy import delete
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.future import select
+
+from src.models import TelegramFile
+
+
+class TelegramFileRepository:
+    """Соответствие ключа видео (см. tiktok_video_key) и file_id загруженного в Telegram файла"""
+
+    def __init__(self, session_maker: async_sessionmaker[AsyncSession]):
+        self.session_maker = session_maker
+
+    async def get_file_id(self, video_key: str) -> Optional[str]:
+        async with self.session_maker() as session:
+            result = await session.execute(
+                select(TelegramFile.file_id).where(TelegramFile.video_key == video_key)
+            )
+            return result.scalars().first()
+
+    async def save_file_id(
+        self, video_key: str, file_id: str, file_unique_id: Optional[str] = None
+    ) -> None:
+        async with self.session_maker() as session:
+            async with session.begin():
+                result = await session.execute(
+                    select(TelegramFile).where(TelegramFile.video_key == video_key)
+                )
+                record = result.scalars().first()
+                if record is None:
+                    session.add(
+                        TelegramFile(video_key=video_key, file_id=file_id, file_unique_id=file_unique_id)
+                    )
+                else:
+                    record.file_id = file_id
+                    record.file_unique_id = file_unique_id
+
+    async def remove(self, video_key: str) -> None:
+        async with self.session_maker() as session:
+            async with session.begin():
+                await session.execute(delete(TelegramFile).where(TelegramFile.video_key == video_key))
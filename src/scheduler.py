@@ -1,21 +1,39 @@
 import asyncio
 import logging
+import time
 from datetime import datetime, timedelta
+from typing import Optional, Set
+from zoneinfo import ZoneInfo
+
 from aiogram import Bot
-from apscheduler.schedulers.asyncio import AsyncIOScheduler
-from sqlalchemy.ext.asyncio.session import AsyncSession, async_sessionmaker
+from sqlalchemy.ext.asyncio.session import async_sessionmaker
 
 from src.facts import get_next_short_fact, get_next_medium_fact
-from src.models import FactType
+from src.models import FactType, PublicationSlot
 from src.provider.factories import AsyncTaskFactory
 from src.provider.manager import AsyncBrowserProviderManager, AsyncProviderManager
+from src.provider.prefetch import VideoPrefetcher
 from src.queues.factories import TaskType, TaskFactory
-from src.queues.interfaces import AsyncQueue
+from src.queues.interfaces import AsyncQueue, DelayedQueue
+from src.queues.models import item_priority
+from src.queues.retry import RetryScheduler
 from src.repository.facts import FactRepository
 from src.repository.publication_slot import PublicationSlotRepository
+from src.repository.telegram_files import TelegramFileRepository
 
 logger = logging.getLogger()
-scheduler = AsyncIOScheduler(timezone="Europe/Moscow")
+
+TIMEZONE = ZoneInfo("Europe/Moscow")
+WEEKDAYS = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+# Насколько поздно (сек) слот еще публикуется, например после короткого рестарта
+MISFIRE_GRACE_TIME = 15 * 60
+# Сколько видео из очереди пробовать опубликовать в одном слоте
+VIDEO_SLOT_ATTEMPTS = 3
+# Пауза после ошибки очереди публикаций (удваивается до максимума), сек
+QUEUE_ERROR_DELAY = 1.0
+QUEUE_ERROR_DELAY_MAX = 60.0
+# Через сколько секунд повторить слот, который не удалось прочитать из БД
+SLOT_RETRY_DELAY = 30.0
 
 
 async def publish(
@@ -23,10 +41,13 @@ async def publish(
     channel_id: str,
     fact_repository: FactRepository,
     queue: AsyncQueue,
+    retry_scheduler: RetryScheduler,
     manager: AsyncBrowserProviderManager,
     async_task_factory: AsyncTaskFactory,
     task_factory: TaskFactory,
     content_type: str,
+    prefetcher: Optional[VideoPrefetcher] = None,
+    file_ids: Optional[TelegramFileRepository] = None,
 ):
     try:
         if content_type == "short_fact":
@@ -38,73 +59,232 @@ async def publish(
             if fact:
                 await bot.send_message(channel_id, fact)
         elif content_type == "video":
-            try:
-                task_dict = await queue.get(timeout=10)
-                task = task_factory.create(TaskType.LINK, url=task_dict.get("url"))
-                await task.execute(bot, manager, async_task_factory, channel_id)
-            except asyncio.TimeoutError:
-                await bot.send_message(
-                    channel_id,
-                    "[!] Очередь видео пуста — публикация пропущена.",
+            # Неудачное видео уходит на повтор, а слот занимает следующее
+            for _ in range(VIDEO_SLOT_ATTEMPTS):
+                try:
+                    task_dict = await queue.get(timeout=10)
+                except (asyncio.TimeoutError, asyncio.QueueEmpty):
+                    await bot.send_message(
+                        channel_id,
+                        "[!] Очередь видео пуста — публикация пропущена.",
+                    )
+                    return
+                task = task_factory.create(
+                    TaskType.LINK, url=task_dict.get("url"), priority=item_priority(task_dict)
                 )
+                if task.priority > 0:
+                    logger.info(f"Публикация срочного видео (приоритет {task.priority}): {task.url}")
+                try:
+                    await task.execute(
+                        bot, manager, async_task_factory, channel_id, prefetcher, file_ids
+                    )
+                except Exception as e:
+                    logger.warning(f"[!] Не удалось опубликовать видео {task.url}: {e}")
+                    await retry_scheduler.fail(task_dict, str(e))
+                    continue
+                # Подтверждаем только после отправки: при падении процесса
+                # элемент вернется в очередь по истечении аренды
+                await queue.ack(task_dict)
+                return
     except Exception as e:
         logger.warning(f"[!] Ошибка при публикации {content_type}: {e}")
 
 
-async def schedule_today(
+def next_slot_time(week_day: str, time_str: str, after: datetime) -> float:
+    """Ближайшее после after время слота (unix timestamp) в часовом поясе канала"""
+    hour, minute = map(int, time_str.split(":"))
+    after = after.astimezone(TIMEZONE)
+    days_ahead = (WEEKDAYS.index(week_day) - after.weekday()) % 7
+    run_at = (after + timedelta(days=days_ahead)).replace(
+        hour=hour, minute=minute, second=0, microsecond=0
+    )
+    if run_at <= after:
+        run_at += timedelta(days=7)
+    return run_at.timestamp()
+
+
+def slot_event(slot: PublicationSlot) -> dict:
+    """
+    Элемент очереди отложенной доставки для слота. Время в элемент не входит,
+    поэтому у каждого слота ровно одна запланированная публикация.
+    """
+    return {"slot_id": slot.id, "content_type": slot.content_type}
+
+
+async def schedule_slot(
+    publication_queue: DelayedQueue, slot: PublicationSlot, replace: bool = False
+):
+    due_at = next_slot_time(slot.week_day, slot.time, datetime.now(TIMEZONE))
+    await publication_queue.schedule(slot_event(slot), due_at, replace=replace)
+
+
+async def sync_slots(session_maker: async_sessionmaker, publication_queue: DelayedQueue):
+    """
+    Планирует слоты, которых еще нет в очереди (после рестарта или первого запуска).
+    Уже запланированные публикации не сдвигаются.
+    """
+    async with session_maker() as db_session:
+        slots = await PublicationSlotRepository.get_all_slots(db_session)
+    for slot in slots:
+        await schedule_slot(publication_queue, slot)
+    logger.info(f"Расписание синхронизировано: {len(slots)} слотов")
+
+
+async def _retry_until_done(action, description: str):
+    """Повторяет action с экспоненциальной паузой, пока он не выполнится"""
+    delay = QUEUE_ERROR_DELAY
+    while True:
+        try:
+            return await action()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"[!] {description}, повтор через {delay:.0f} сек: {e}")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, QUEUE_ERROR_DELAY_MAX)
+
+
+async def _process_slot_event(
+    event: dict,
+    popped_at: datetime,
+    session_maker: async_sessionmaker,
+    publication_queue: DelayedQueue,
+    publish_content,
+):
+    """
+    Публикация по наступившему слоту и планирование его следующей публикации
+
+    Опоздание считается от момента извлечения события из очереди, а не от
+    окончания других публикаций. Слот планируется заново и после ошибки
+    публикации; если сам слот не удалось прочитать, событие возвращается
+    в очередь через SLOT_RETRY_DELAY секунд.
+    """
+    slot = None
+    failed = False
+    try:
+        async with session_maker() as db_session:
+            slot = await PublicationSlotRepository.get_slot(db_session, event["slot_id"])
+        if slot is None:
+            # Слот удален после планирования
+            return
+
+        due_at = next_slot_time(slot.week_day, slot.time, popped_at) - timedelta(days=7).total_seconds()
+        if popped_at.timestamp() - due_at > MISFIRE_GRACE_TIME:
+            logger.warning(
+                f"[!] Публикация слота {slot.week_day} {slot.time} пропущена: бот был недоступен"
+            )
+        else:
+            await publish_content(slot.content_type)
+    except asyncio.CancelledError:
+        # При остановке бота слот запланирует sync_slots следующего запуска
+        raise
+    except Exception as e:
+        failed = True
+        logger.warning(f"[!] Ошибка обработки слота {event}: {e}")
+
+    if slot is not None:
+        await _retry_until_done(
+            lambda: schedule_slot(publication_queue, slot),
+            f"Не удалось запланировать слот {slot.week_day} {slot.time}",
+        )
+    elif failed:
+        await _retry_until_done(
+            lambda: publication_queue.schedule(event, time.time() + SLOT_RETRY_DELAY),
+            f"Не удалось вернуть в очередь слот {event}",
+        )
+
+
+async def run_publications(
     bot: Bot,
-    db_session: AsyncSession,
+    session_maker: async_sessionmaker,
+    publication_queue: DelayedQueue,
     fact_repository: FactRepository,
     queue: AsyncQueue,
+    retry_scheduler: RetryScheduler,
     manager: AsyncProviderManager,
     async_task_factory: AsyncTaskFactory,
     task_factory: TaskFactory,
     channel_id: str,
+    prefetcher: Optional[VideoPrefetcher] = None,
+    file_ids: Optional[TelegramFileRepository] = None,
 ):
-    weekday = datetime.now().strftime("%A").lower()  # monday, tuesday, ...
-    slots = await PublicationSlotRepository.get_slots_for_day(db_session, weekday)
-    for slot in slots:
-        hour, minute = map(int, slot.time.split(":"))
-        dt = datetime.now().replace(hour=hour, minute=minute, second=0, microsecond=0)
-        if dt < datetime.now():
-            dt += timedelta(days=1)
-        scheduler.add_job(
-            publish,
-            "date",
-            run_date=dt,
-            args=[
-                bot,
-                channel_id,
-                fact_repository,
-                queue,
-                manager,
-                async_task_factory,
-                task_factory,
-                slot.content_type,
-            ],
+    """
+    Цикл публикаций: ожидает наступления слота, публикует и планирует его на неделю вперед
+
+    Каждый слот публикуется в отдельной задаче, поэтому долгая загрузка
+    видео не задерживает слоты, наступившие одновременно с ним.
+    """
+    async def publish_content(content_type: str):
+        await publish(
+            bot,
+            channel_id,
+            fact_repository,
+            queue,
+            retry_scheduler,
+            manager,
+            async_task_factory,
+            task_factory,
+            content_type,
+            prefetcher,
+            file_ids,
         )
 
+    # Ссылки на задачи слотов, чтобы их не собрал сборщик мусора
+    slot_tasks: Set[asyncio.Task] = set()
+    error_delay = QUEUE_ERROR_DELAY
+    try:
+        while True:
+            try:
+                event = await publication_queue.get()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Ошибка Redis не должна останавливать цикл публикаций навсегда
+                logger.error(f"[!] Ошибка чтения очереди публикаций, повтор через {error_delay:.0f} сек: {e}")
+                await asyncio.sleep(error_delay)
+                error_delay = min(error_delay * 2, QUEUE_ERROR_DELAY_MAX)
+                continue
+            error_delay = QUEUE_ERROR_DELAY
+            task = asyncio.create_task(
+                _process_slot_event(
+                    event, datetime.now(TIMEZONE), session_maker, publication_queue, publish_content
+                )
+            )
+            slot_tasks.add(task)
+            task.add_done_callback(slot_tasks.discard)
+    finally:
+        for task in slot_tasks:
+            task.cancel()
+
 
 async def setup_scheduler(
     bot: Bot,
     session_maker: async_sessionmaker,
+    publication_queue: DelayedQueue,
     fact_repository: FactRepository,
     queue: AsyncQueue,
+    retry_scheduler: RetryScheduler,
     manager: AsyncProviderManager,
     async_task_factory: AsyncTaskFactory,
     task_factory: TaskFactory,
     channel_id: str,
-):
-    async with session_maker() as db_session:
-        scheduler.add_job(
-            schedule_today,
-            "cron",
-            hour=0,
-            minute=0,
-            args=[bot, db_session, fact_repository, queue, manager, async_task_factory, task_factory, channel_id],
+    prefetcher: Optional[VideoPrefetcher] = None,
+    file_ids: Optional[TelegramFileRepository] = None,
+) -> asyncio.Task:
+    await sync_slots(session_maker, publication_queue)
+    return asyncio.create_task(
+        run_publications(
+            bot,
+            session_maker,
+            publication_queue,
+            fact_repository,
+            queue,
+            retry_scheduler,
+            manager,
+            async_task_factory,
+            task_factory,
+            channel_id,
+            prefetcher,
+            file_ids,
         )
-        await schedule_today(
-            bot, db_session, fact_repository, queue, manager, async_task_factory, task_factory, channel_id
-        )
-
-        scheduler.start()
+    )
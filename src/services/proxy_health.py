@@ -0,0 +1,240 @@
+import logging
+import random
+import statistics
+import time
+from dataclasses import dataclass
+from enum import Enum
+from typing import Dict, List, Optional, Sequence, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class CircuitState(Enum):
+    CLOSED = "closed"  # Прокси в ротации
+    OPEN = "open"  # Исключен до окончания паузы
+    HALF_OPEN = "half_open"  # Пауза истекла, идет одна пробная попытка
+
+
+@dataclass
+class ProxyHealthConfig:
+    alpha: float = 0.3  # Вес последнего замера в EWMA
+    failure_threshold: int = 3  # Подряд неудачных попыток до исключения
+    min_success_rate: float = 0.3  # Исключение при меньшей доле успехов (после min_samples попыток)
+    min_samples: int = 5
+    open_timeout: float = 60.0  # Пауза до пробной попытки, удваивается после неудачной пробы
+    max_open_timeout: float = 30 * 60.0
+    half_open_timeout: float = 10 * 60.0  # Пробная попытка без результата считается потерянной
+
+
+@dataclass
+class ProxyStats:
+    latency: Optional[float] = None  # EWMA длительности попытки, сек
+    success_rate: float = 1.0  # EWMA доли успешных попыток
+    throughput: Optional[float] = None  # EWMA скорости загрузки, байт/сек
+    attempts: int = 0
+    failures: int = 0
+    consecutive_failures: int = 0
+    state: CircuitState = CircuitState.CLOSED
+    opened_at: float = 0.0
+    open_timeout: float = 0.0
+    probe_started_at: Optional[float] = None
+    probe_failed: bool = False  # Не прошел фоновую проверку: исключен до успешной
+
+
+class ProxyHealth:
+    """
+    Оценка состояния прокси по результатам реальных загрузок
+
+    Для каждого прокси считаются EWMA длительности попытки, доли успехов и
+    скорости загрузки. Вес прокси при выборе пропорционален квадрату доли
+    успехов, обратно пропорционален длительности и поправлен на скорость
+    относительно медианы, поэтому основную нагрузку берут быстрые и
+    надежные прокси. Прокси с серией ошибок исключается (circuit breaker);
+    после паузы ему дается одна пробная попытка: успех возвращает прокси в
+    ротацию, неудача удваивает паузу. Состояние хранится в памяти процесса.
+    """
+
+    def __init__(self, config: Optional[ProxyHealthConfig] = None):
+        """
+        Args:
+            config: Параметры оценки и исключения прокси
+        """
+        self.config = config or ProxyHealthConfig()
+        self._stats: Dict[int, ProxyStats] = {}
+
+    def stats(self, proxy_id: int) -> ProxyStats:
+        if proxy_id not in self._stats:
+            self._stats[proxy_id] = ProxyStats()
+        return self._stats[proxy_id]
+
+    def _ewma(self, current: Optional[float], value: float) -> float:
+        if current is None:
+            return value
+        return self.config.alpha * value + (1 - self.config.alpha) * current
+
+    def _available(self, stats: ProxyStats, now: float) -> bool:
+        if stats.probe_failed:
+            return False
+        if stats.state == CircuitState.CLOSED:
+            return True
+        if stats.state == CircuitState.OPEN:
+            return now - stats.opened_at >= stats.open_timeout
+        # Пробная попытка уже идет; потерянная проба не блокирует прокси навсегда
+        return now - stats.probe_started_at >= self.config.half_open_timeout
+
+    def is_available(self, proxy_id: int) -> bool:
+        """Можно ли сейчас выбрать прокси (не исключен или готов к пробной попытке)"""
+        return self._available(self.stats(proxy_id), time.monotonic())
+
+    def _weight(self, stats: ProxyStats, latency: float, throughput: Optional[float]) -> float:
+        weight = stats.success_rate ** 2 / max(stats.latency or latency, 0.1)
+        if throughput and stats.throughput:
+            weight *= min(max(stats.throughput / throughput, 0.5), 2.0)
+        return weight
+
+    def choose(self, candidates: Sequence[T], key=lambda proxy: proxy.id) -> Optional[T]:
+        """
+        Взвешенный случайный выбор прокси
+
+        Args:
+            candidates: Прокси для выбора
+            key: Функция получения id прокси
+
+        Returns:
+            Выбранный прокси; если исключены все - тот, чья пауза истекает раньше;
+            None для пустого списка
+        """
+        if not candidates:
+            return None
+        now = time.monotonic()
+        available: List[T] = [proxy for proxy in candidates if self._available(self.stats(key(proxy)), now)]
+        if not available:
+            # Не прошедшие фоновую проверку - в последнюю очередь
+            proxy = min(candidates, key=lambda p: (
+                self.stats(key(p)).probe_failed,
+                self.stats(key(p)).opened_at + self.stats(key(p)).open_timeout,
+            ))
+            logger.warning(f"Все прокси исключены, используется прокси {key(proxy)}")
+            stats = self.stats(key(proxy))
+            if stats.state == CircuitState.OPEN:
+                # Вынужденная попытка считается пробной: ее результат закроет
+                # или продлит исключение, а не оставит прокси в OPEN навсегда
+                stats.state = CircuitState.HALF_OPEN
+                stats.probe_started_at = now
+            return proxy
+
+        latencies = [self.stats(key(proxy)).latency for proxy in available]
+        known = [latency for latency in latencies if latency is not None]
+        # Новый прокси получает оптимистичную оценку, чтобы набрать статистику
+        default_latency = min(known) if known else 1.0
+        throughputs = [self.stats(key(proxy)).throughput for proxy in available]
+        known_throughputs = [value for value in throughputs if value]
+        median_throughput = statistics.median(known_throughputs) if known_throughputs else None
+        weights = [
+            self._weight(self.stats(key(proxy)), default_latency, median_throughput)
+            for proxy in available
+        ]
+        proxy = random.choices(available, weights=weights)[0]
+
+        stats = self.stats(key(proxy))
+        if stats.state != CircuitState.CLOSED:
+            stats.state = CircuitState.HALF_OPEN
+            stats.probe_started_at = now
+            logger.info(f"Пробная попытка через исключенный прокси {key(proxy)}")
+        return proxy
+
+    def record(
+            self,
+            proxy_id: int,
+            ok: bool,
+            latency: Optional[float] = None,
+            bytes_downloaded: Optional[int] = None
+    ) -> None:
+        """
+        Учитывает результат попытки через прокси
+
+        Args:
+            proxy_id: Id прокси
+            ok: Успешна ли попытка
+            latency: Длительность попытки, сек
+            bytes_downloaded: Размер скачанного файла для оценки скорости
+        """
+        config = self.config
+        stats = self.stats(proxy_id)
+        stats.attempts += 1
+        stats.success_rate = self._ewma(stats.success_rate, 1.0 if ok else 0.0)
+        if latency is not None:
+            stats.latency = self._ewma(stats.latency, latency)
+        if ok and bytes_downloaded and latency:
+            stats.throughput = self._ewma(stats.throughput, bytes_downloaded / latency)
+
+        now = time.monotonic()
+        if ok:
+            stats.consecutive_failures = 0
+            if stats.state != CircuitState.CLOSED:
+                logger.info(f"Прокси {proxy_id} снова в ротации")
+            stats.state = CircuitState.CLOSED
+            stats.open_timeout = 0.0
+            return
+
+        stats.failures += 1
+        stats.consecutive_failures += 1
+        if stats.state == CircuitState.HALF_OPEN:
+            stats.open_timeout = min(stats.open_timeout * 2, config.max_open_timeout)
+        elif stats.state == CircuitState.CLOSED and (
+            stats.consecutive_failures >= config.failure_threshold
+            or (stats.attempts >= config.min_samples and stats.success_rate < config.min_success_rate)
+        ):
+            stats.open_timeout = config.open_timeout
+        else:
+            return
+        stats.state = CircuitState.OPEN
+        stats.opened_at = now
+        logger.warning(
+            f"Прокси {proxy_id} исключен на {stats.open_timeout:.0f} сек: "
+            f"ошибок подряд {stats.consecutive_failures}, успешных {stats.success_rate:.0%}"
+        )
+
+    def record_probe(self, proxy_id: int, ok: bool) -> None:
+        """
+        Учитывает результат фоновой проверки прокси
+
+        Неудачная проверка исключает прокси до следующей успешной проверки:
+        пробные попытки реальных загрузок ему не выдаются. Успешная проверка
+        возвращает прокси в ротацию, в том числе исключенный по ошибкам
+        загрузок. Статистика загрузок не меняется: проверка не похожа на
+        реальную загрузку.
+
+        Args:
+            proxy_id: Id прокси
+            ok: Прошел ли прокси проверку
+        """
+        stats = self.stats(proxy_id)
+        if ok:
+            if stats.probe_failed or stats.state != CircuitState.CLOSED:
+                logger.info(f"Прокси {proxy_id} прошел проверку и снова в ротации")
+            stats.probe_failed = False
+            stats.state = CircuitState.CLOSED
+            stats.consecutive_failures = 0
+            stats.open_timeout = 0.0
+            return
+        if not stats.probe_failed:
+            logger.warning(f"Прокси {proxy_id} не прошел проверку и исключен до успешной проверки")
+        stats.probe_failed = True
+
+    def forget(self, proxy_id: int) -> None:
+        """Удаляет статистику прокси (после удаления прокси)"""
+        self._stats.pop(proxy_id, None)
+
+    def describe(self, proxy_id: int) -> str:
+        """Краткое описание состояния прокси для сообщений бота"""
+        stats = self.stats(proxy_id)
+        state = "не прошел проверку" if stats.probe_failed else stats.state.value
+        parts = [state, f"успешных {stats.success_rate:.0%} из {stats.attempts}"]
+        if stats.latency is not None:
+            parts.append(f"{stats.latency:.1f} сек")
+        if stats.throughput:
+            parts.append(f"{stats.throughput / 2 ** 20:.1f} МБ/с")
+        return ", ".join(parts)
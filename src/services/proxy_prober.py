@@ -0,0 +1,289 @@
+import asyncio
+import base64
+import logging
+import socket
+import ssl
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+from src.repository.proxy import ProxyRepository
+from src.repository.proxy_probes import ProxyProbeRepository
+
+logger = logging.getLogger(__name__)
+
+# Сколько байт ответа читать при проверочном запросе
+PROBE_MAX_BYTES = 64 * 1024
+MAX_HEADER_BYTES = 16 * 1024
+
+
+@dataclass
+class ProbeResult:
+    ok: bool
+    connect_time: Optional[float] = None  # TCP подключение к прокси, сек
+    tls_time: Optional[float] = None  # TLS с целевым сервером через CONNECT, сек
+    fetch_time: Optional[float] = None  # Запрос и чтение ответа, сек
+    status: Optional[int] = None
+    error: Optional[str] = None
+
+
+def _read_headers(sock: socket.socket) -> bytes:
+    data = b""
+    while b"\r\n\r\n" not in data:
+        chunk = sock.recv(4096)
+        if not chunk:
+            raise ConnectionError("соединение закрыто до конца заголовков")
+        data += chunk
+        if len(data) > MAX_HEADER_BYTES:
+            raise ConnectionError("слишком длинные заголовки ответа")
+    return data
+
+
+def _status(head: bytes) -> int:
+    parts = head.split(b"\r\n", 1)[0].split()
+    if len(parts) < 2 or not parts[1].isdigit():
+        raise ConnectionError(f"некорректный ответ: {head[:50]!r}")
+    return int(parts[1])
+
+
+class _TunneledTLS:
+    """
+    TLS с целевым сервером внутри TLS-соединения с https прокси
+
+    ssl.wrap_socket не умеет TLS поверх SSLSocket, поэтому внутреннее
+    соединение ведется через SSLObject и MemoryBIO. Поддерживает
+    sendall/recv/close, как сокет.
+    """
+
+    def __init__(self, sock: socket.socket, context: ssl.SSLContext, server_hostname: str):
+        self.sock = sock
+        self.incoming = ssl.MemoryBIO()
+        self.outgoing = ssl.MemoryBIO()
+        self.tls = context.wrap_bio(self.incoming, self.outgoing, server_hostname=server_hostname)
+        self._run(self.tls.do_handshake)
+
+    def _flush(self) -> None:
+        data = self.outgoing.read()
+        if data:
+            self.sock.sendall(data)
+
+    def _run(self, fn, *args):
+        while True:
+            try:
+                result = fn(*args)
+            except ssl.SSLWantReadError:
+                self._flush()
+                data = self.sock.recv(16384)
+                if data:
+                    self.incoming.write(data)
+                else:
+                    self.incoming.write_eof()
+                continue
+            self._flush()
+            return result
+
+    def sendall(self, data: bytes) -> None:
+        self._run(self.tls.write, data)
+
+    def recv(self, size: int) -> bytes:
+        try:
+            return self._run(self.tls.read, size)
+        except (ssl.SSLZeroReturnError, ssl.SSLEOFError):
+            return b""
+
+    def close(self) -> None:
+        self.sock.close()
+
+
+def probe_proxy(
+        server: str,
+        username: Optional[str],
+        password: Optional[str],
+        target_url: str,
+        timeout: float = 10.0,
+        ssl_context: Optional[ssl.SSLContext] = None,
+        proxy_ssl_context: Optional[ssl.SSLContext] = None,
+) -> ProbeResult:
+    """
+    Проверка прокси: TCP подключение, TLS через CONNECT и небольшой запрос
+
+    Функция блокирующая, в async коде вызывается через asyncio.to_thread.
+    Для SOCKS прокси проверяется только TCP подключение.
+
+    Args:
+        server: Адрес прокси (scheme://host:port)
+        username: Имя пользователя прокси
+        password: Пароль прокси
+        target_url: Ссылка для проверочного запроса (http или https)
+        timeout: Таймаут каждой операции с сокетом, сек
+        ssl_context: Контекст TLS для целевого сервера (по умолчанию системный)
+        proxy_ssl_context: Контекст TLS для https прокси (по умолчанию системный)
+
+    Returns:
+        Время этапов; при ошибке - этап, на котором она произошла
+    """
+    proxy = urlparse(server)
+    target = urlparse(target_url)
+    result = ProbeResult(ok=False)
+    auth = ""
+    if username:
+        credentials = base64.b64encode(f"{username}:{password or ''}".encode()).decode()
+        auth = f"Proxy-Authorization: Basic {credentials}\r\n"
+
+    started = time.monotonic()
+    try:
+        sock = socket.create_connection((proxy.hostname, proxy.port), timeout=timeout)
+    except OSError as e:
+        result.error = f"TCP: {e}"
+        return result
+    result.connect_time = time.monotonic() - started
+
+    stage = "CONNECT"
+    try:
+        if proxy.scheme.startswith("socks"):
+            result.ok = True
+            return result
+        if proxy.scheme == "https":
+            sock = (proxy_ssl_context or ssl.create_default_context()).wrap_socket(
+                sock, server_hostname=proxy.hostname
+            )
+
+        host = target.hostname
+        path = target.path or "/"
+        if target.query:
+            path += "?" + target.query
+        if target.scheme == "https":
+            port = target.port or 443
+            sock.sendall(f"CONNECT {host}:{port} HTTP/1.1\r\nHost: {host}:{port}\r\n{auth}\r\n".encode())
+            status = _status(_read_headers(sock))
+            if status != 200:
+                result.status = status
+                result.error = f"CONNECT: HTTP {status}"
+                return result
+            stage = "TLS"
+            started = time.monotonic()
+            context = ssl_context or ssl.create_default_context()
+            if isinstance(sock, ssl.SSLSocket):
+                sock = _TunneledTLS(sock, context, host)
+            else:
+                sock = context.wrap_socket(sock, server_hostname=host)
+            result.tls_time = time.monotonic() - started
+            request = f"GET {path} HTTP/1.1\r\nHost: {host}\r\n"
+        else:
+            # Обычный HTTP: запрос в абсолютной форме к самому прокси
+            request = f"GET {target_url} HTTP/1.1\r\nHost: {host}\r\n{auth}"
+
+        stage = "запрос"
+        started = time.monotonic()
+        sock.sendall(f"{request}Connection: close\r\nUser-Agent: Mozilla/5.0\r\n\r\n".encode())
+        head = _read_headers(sock)
+        result.status = _status(head)
+        received = len(head)
+        while received < PROBE_MAX_BYTES:
+            chunk = sock.recv(8192)
+            if not chunk:
+                break
+            received += len(chunk)
+        result.fetch_time = time.monotonic() - started
+        result.ok = result.status < 400
+        if not result.ok:
+            result.error = f"HTTP {result.status}"
+    except (OSError, ssl.SSLError) as e:
+        result.error = f"{stage}: {e}"
+    finally:
+        sock.close()
+    return result
+
+
+class ProxyProber:
+    """
+    Фоновая проверка всех прокси по расписанию
+
+    Прокси проверяются параллельно (не больше concurrency одновременно)
+    до того, как от них зависит публикация. Результаты сохраняются в
+    proxy_probes и показываются в /proxy_list; прокси, не прошедший
+    проверку, исключается из ротации до успешной проверки.
+    """
+
+    def __init__(
+            self,
+            proxy_repository: ProxyRepository,
+            probe_repository: ProxyProbeRepository,
+            target_url: str = "https://www.tiktok.com/robots.txt",
+            interval: float = 600.0,
+            concurrency: int = 8,
+            timeout: float = 10.0,
+            ssl_context: Optional[ssl.SSLContext] = None,
+            proxy_ssl_context: Optional[ssl.SSLContext] = None,
+    ):
+        """
+        Args:
+            proxy_repository: Репозиторий прокси
+            probe_repository: Хранилище результатов проверок
+            target_url: Ссылка для проверочного запроса через прокси
+            interval: Период проверки, сек
+            concurrency: Сколько прокси проверять одновременно
+            timeout: Таймаут каждой операции с сокетом, сек
+            ssl_context: Контекст TLS для целевого сервера (для проверки на локальном сервере)
+            proxy_ssl_context: Контекст TLS для https прокси (для проверки на локальном сервере)
+        """
+        self.proxy_repository = proxy_repository
+        self.probe_repository = probe_repository
+        self.target_url = target_url
+        self.interval = interval
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.ssl_context = ssl_context
+        self.proxy_ssl_context = proxy_ssl_context
+
+    async def probe_all(self) -> Dict[int, ProbeResult]:
+        """
+        Проверяет все прокси и сохраняет результаты
+
+        Returns:
+            id прокси -> результат проверки
+        """
+        proxies = await self.proxy_repository.get_proxies()
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def probe(proxy) -> ProbeResult:
+            async with semaphore:
+                return await asyncio.to_thread(
+                    probe_proxy, proxy.server, proxy.username, proxy.password,
+                    self.target_url, self.timeout, self.ssl_context, self.proxy_ssl_context,
+                )
+
+        results = dict(zip(
+            (proxy.id for proxy in proxies),
+            await asyncio.gather(*(probe(proxy) for proxy in proxies)),
+        ))
+        for proxy_id, result in results.items():
+            self.proxy_repository.mark_usable(proxy_id, result.ok)
+            await self.probe_repository.save_probe(
+                proxy_id,
+                result.ok,
+                connect_time=result.connect_time,
+                tls_time=result.tls_time,
+                fetch_time=result.fetch_time,
+                status=result.status,
+                error=result.error,
+            )
+        await self.probe_repository.remove_except(results)
+
+        failed = [proxy_id for proxy_id, result in results.items() if not result.ok]
+        if failed:
+            logger.warning(f"Прокси не прошли проверку: {failed}")
+        logger.info(f"Проверено прокси: {len(results)}, исправных {len(results) - len(failed)}")
+        return results
+
+    async def run(self) -> None:
+        """Цикл проверки"""
+        while True:
+            try:
+                await self.probe_all()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"[!] Ошибка проверки прокси: {e}")
+            await asyncio.sleep(self.interval)
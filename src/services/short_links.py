@@ -0,0 +1,215 @@
+import asyncio
+import logging
+import re
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urljoin
+
+import aiohttp
+
+from src.contexts import get_http_session
+from src.queues.connection import get_redis
+from src.utils import (
+    canonical_tiktok_url,
+    extract_tiktok_short_code,
+    extract_tiktok_video_id,
+    tiktok_video_key,
+)
+
+logger = logging.getLogger(__name__)
+
+TIKTOK_USERNAME_PATTERN = re.compile(r"tiktok\.com/@([\w.-]+)/", re.IGNORECASE)
+
+# Ограничение на длину цепочки редиректов короткой ссылки
+MAX_REDIRECTS = 5
+REDIRECT_STATUSES = {301, 302, 303, 307, 308}
+RESOLVE_TIMEOUT = aiohttp.ClientTimeout(total=15)
+
+# Сколько разрешенных ссылок держать в памяти процесса
+MEMORY_CACHE_SIZE = 10000
+
+
+def canonical_url(url: str) -> Optional[str]:
+    """Каноническая ссылка tiktok.com/@user/video/<id> для полной ссылки на видео, иначе None"""
+    video_id = extract_tiktok_video_id(url)
+    if video_id is None or "/photo/" in url.lower():
+        return None
+    match = TIKTOK_USERNAME_PATTERN.search(url)
+    return canonical_tiktok_url(video_id, match.group(1) if match else "")
+
+
+class ShortLinkResolver:
+    """
+    Разрешение коротких ссылок vm/vt.tiktok.com в канонические
+
+    Ссылки разрешаются при добавлении в очередь, параллельно и через общую
+    HTTP-сессию, поэтому при скачивании редиректы уже не проходятся, а одно
+    видео под разными ссылками распознается дедупликацией очереди по id.
+    Результаты хранятся с TTL в памяти процесса и, если задан redis_url,
+    в Redis (общий кеш для всех экземпляров бота). Ссылка, которую не
+    удалось разрешить, остается короткой: yt-dlp пройдет редиректы сам.
+    """
+
+    def __init__(
+            self,
+            redis_url: Optional[str] = None,
+            ttl: float = 30 * 24 * 3600,
+            concurrency: int = 8,
+            key_prefix: str = "tiktok:short:",
+    ):
+        """
+        Args:
+            redis_url: Адрес Redis для общего кеша (None - только память процесса)
+            ttl: Время жизни разрешенной ссылки в кеше, сек
+            concurrency: Сколько ссылок разрешать одновременно
+            key_prefix: Префикс ключей кеша в Redis
+        """
+        self.redis_url = redis_url
+        self.ttl = ttl
+        self.key_prefix = key_prefix
+        self._semaphore = asyncio.Semaphore(concurrency)
+        # "host_code" -> (каноническая ссылка, истекает в)
+        self._memory: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.failures = 0
+
+    def _memory_get(self, key: str) -> Optional[str]:
+        entry = self._memory.get(key)
+        if entry is None:
+            return None
+        url, expires_at = entry
+        if expires_at < time.monotonic():
+            del self._memory[key]
+            return None
+        self._memory.move_to_end(key)
+        return url
+
+    def _memory_put(self, key: str, url: str) -> None:
+        self._memory[key] = (url, time.monotonic() + self.ttl)
+        self._memory.move_to_end(key)
+        while len(self._memory) > MEMORY_CACHE_SIZE:
+            self._memory.popitem(last=False)
+
+    async def _cache_get_many(self, keys: List[str]) -> Dict[str, str]:
+        found = {}
+        for key in keys:
+            url = self._memory_get(key)
+            if url is not None:
+                found[key] = url
+        missing = [key for key in keys if key not in found]
+        if self.redis_url and missing:
+            try:
+                values = await get_redis(self.redis_url).mget(
+                    [self.key_prefix + key for key in missing]
+                )
+            except Exception as e:
+                logger.warning(f"Кеш коротких ссылок в Redis недоступен: {e}")
+                values = [None] * len(missing)
+            for key, value in zip(missing, values):
+                if value is not None:
+                    found[key] = value.decode()
+                    self._memory_put(key, found[key])
+        return found
+
+    async def _cache_put_many(self, resolved: Dict[str, str]) -> None:
+        for key, url in resolved.items():
+            self._memory_put(key, url)
+        if self.redis_url and resolved:
+            try:
+                async with get_redis(self.redis_url).pipeline(transaction=False) as pipe:
+                    for key, url in resolved.items():
+                        pipe.set(self.key_prefix + key, url, ex=int(self.ttl))
+                    await pipe.execute()
+            except Exception as e:
+                logger.warning(f"Не удалось сохранить короткие ссылки в Redis: {e}")
+
+    async def _follow(self, url: str) -> Optional[str]:
+        """
+        Проходит редиректы короткой ссылки без загрузки страниц
+
+        Returns:
+            Каноническая ссылка или None, если видео не найдено
+        """
+        session = get_http_session()
+        for _ in range(MAX_REDIRECTS):
+            # Тело ответа не читается: нужен только заголовок Location
+            async with session.get(url, allow_redirects=False, timeout=RESOLVE_TIMEOUT) as resp:
+                location = resp.headers.get("Location")
+                if resp.status not in REDIRECT_STATUSES or not location:
+                    return None
+            url = urljoin(url, location)
+            canonical = canonical_url(url)
+            if canonical is not None:
+                return canonical
+        return None
+
+    async def _resolve_one(self, url: str) -> Optional[str]:
+        async with self._semaphore:
+            try:
+                return await self._follow(url)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                logger.warning(f"Не удалось разрешить короткую ссылку {url}: {e}")
+                return None
+
+    async def resolve_many(self, urls: Iterable[str]) -> Dict[str, str]:
+        """
+        Разрешает короткие ссылки
+
+        Args:
+            urls: Короткие ссылки vm/vt.tiktok.com (остальные пропускаются)
+
+        Returns:
+            Короткая ссылка -> каноническая, только для разрешенных
+        """
+        keys: Dict[str, str] = {}
+        for url in urls:
+            short = extract_tiktok_short_code(url)
+            if short is not None:
+                keys[url] = "_".join(short)
+        if not keys:
+            return {}
+
+        cached = await self._cache_get_many(list(set(keys.values())))
+        self.hits += sum(1 for key in keys.values() if key in cached)
+        pending: Dict[str, str] = {}
+        for url, key in keys.items():
+            if key not in cached and key not in pending:
+                pending[key] = url
+        self.misses += len(pending)
+
+        results = await asyncio.gather(*(self._resolve_one(url) for url in pending.values()))
+        resolved = {key: canonical for key, canonical in zip(pending, results) if canonical}
+        self.failures += len(pending) - len(resolved)
+        await self._cache_put_many(resolved)
+
+        cached.update(resolved)
+        return {url: cached[key] for url, key in keys.items() if key in cached}
+
+    async def canonicalize(self, urls: Iterable[str]) -> List[str]:
+        """
+        Приводит ссылки на видео к каноническому виду с сохранением порядка
+
+        Полные ссылки нормализуются без запросов, короткие разрешаются;
+        повторы одного видео удаляются.
+        """
+        urls = list(urls)
+        resolved = await self.resolve_many(urls)
+        result = []
+        seen = set()
+        for url in urls:
+            url = resolved.get(url) or canonical_url(url) or url
+            key = tiktok_video_key(url) or url
+            if key not in seen:
+                seen.add(key)
+                result.append(url)
+        return result
+
+    def get_stats(self) -> dict:
+        return {
+            "memory_entries": len(self._memory),
+            "hits": self.hits,
+            "misses": self.misses,
+            "failures": self.failures,
+        }
@@ -52,6 +52,50 @@ def extract_mp4_url(rapid_url: str) -> str:
     return payload.get("url")
 
 
+TIKTOK_VIDEO_ID_PATTERN = re.compile(
+    r"^https?://(?:[\w-]+\.)?tiktok\.com/(?:[^?#\s]*/)?(?:video|v|photo)/(\d{1,20})",
+    re.IGNORECASE,
+)
+TIKTOK_SHORT_LINK_PATTERN = re.compile(
+    r"^https?://(vm\.tiktok\.com|vt\.tiktok\.com)/([A-Za-z0-9_-]+)/?(?:[?#].*)?$",
+    re.IGNORECASE,
+)
+
+
+def extract_tiktok_video_id(url: str) -> Optional[int]:
+    """Извлекает числовой id видео из полной TikTok ссылки (None для коротких ссылок)."""
+    match = TIKTOK_VIDEO_ID_PATTERN.match(url)
+    if not match:
+        return None
+    video_id = int(match.group(1))
+    # id видео TikTok помещается в 64 бита
+    return video_id if video_id < 2 ** 64 else None
+
+
+def extract_tiktok_short_code(url: str) -> Optional[Tuple[str, str]]:
+    """Возвращает (хост, код) для коротких ссылок vm/vt.tiktok.com."""
+    match = TIKTOK_SHORT_LINK_PATTERN.match(url)
+    if not match:
+        return None
+    return match.group(1).lower(), match.group(2)
+
+
+def tiktok_video_key(url: str) -> Optional[str]:
+    """Ключ видео для кешей: id видео, для коротких ссылок - хост и код ссылки."""
+    video_id = extract_tiktok_video_id(url)
+    if video_id is not None:
+        return str(video_id)
+    short = extract_tiktok_short_code(url)
+    if short is not None:
+        return "_".join(short)
+    return None
+
+
+def canonical_tiktok_url(video_id: int, username: str = "") -> str:
+    """Каноническая ссылка на видео, понятная yt-dlp (имя пользователя необязательно)."""
+    return f"https://www.tiktok.com/@{username}/video/{video_id}"
+
+
 def extract_tiktok_links(text: str) -> List[str]:
     """Извлекает TikTok ссылки из текста."""
     # Регулярное выражение для TikTok ссылок